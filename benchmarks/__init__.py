@@ -0,0 +1,3 @@
+"""
+Standalone performance benchmarks, run with ``python -m benchmarks.<name>``.
+"""
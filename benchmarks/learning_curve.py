@@ -0,0 +1,58 @@
+"""
+Rendering time of the learning curve as the episode count grows.
+
+Usage:
+    python -m benchmarks.learning_curve --episodes 10000 --episodes 1000000
+
+Synthetic episode rewards are added to a LearningCurvePlotter at once, then
+1000 more are added incrementally, and the plot is rendered. The rendering
+time should stay roughly flat, as at most ``max_points`` bins are drawn.
+"""
+
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import typer
+
+from utils.plot_utils import LearningCurvePlotter
+from utils.types import RLModel
+
+
+def synthetic_rewards(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Rewards of battles whose win rate rises from 20% to 80%."""
+    won = rng.random(n) < np.linspace(0.2, 0.8, n)
+    return np.where(won, 30.0, -30.0) + rng.normal(0, 5, n)
+
+
+def main(
+    episodes: list[int] = typer.Option(
+        [10_000, 100_000, 1_000_000], "--episodes", help="Episode counts to benchmark"
+    ),
+    dpi: int = typer.Option(300, "--dpi", help="Resolution of the rendered plot"),
+    seed: int = typer.Option(0, "--seed", help="Random seed"),
+):
+    rng = np.random.default_rng(seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n in episodes:
+            plotter = LearningCurvePlotter(RLModel.PPO)
+            start = time.perf_counter()
+            plotter.update(synthetic_rewards(n, rng))
+            update_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            plotter.update(synthetic_rewards(1000, rng))
+            incremental_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            plotter.render(Path(tmp_dir) / "learning_curve.png", dpi=dpi)
+            render_time = time.perf_counter() - start
+            print(
+                f"{n:>10} episodes: {len(plotter._bins['count'])} bins of {plotter.bin_size}, "
+                f"update {update_time:.3f}s, +1000 episodes {incremental_time * 1e3:.2f}ms, "
+                f"render {render_time:.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    typer.run(main)
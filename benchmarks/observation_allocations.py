@@ -0,0 +1,186 @@
+"""
+Memory allocated per observation by simple_embed_battle and ObservationBuilder.
+
+Usage:
+    python -m benchmarks.observation_allocations --battles 200
+
+Random battles are replayed through poke-env's protocol parser, with switches,
+damage, faints and revivals. Both embeddings are checked to give identical
+observations, then traced with tracemalloc: the memory kept per step (new
+observation arrays) and the peak of temporary allocations during a step.
+"""
+
+import logging
+import random
+import time
+import tracemalloc
+import typer
+from poke_env.environment import Battle
+
+from utils.model import simple_embed_battle
+from utils.observation import ObservationBuilder
+
+
+OWN_TEAM = ["Pikachu", "Eevee", "Ditto", "Snorlax", "Mew", "Onix"]
+OPPONENT_TEAM = ["Charizard", "Gengar", "Lapras", "Dragonite", "Scizor", "Garchomp"]
+MOVES = ["tackle", "thunderbolt", "surf", "earthquake", "flamethrower", "icebeam"]
+
+
+def make_request(rng: random.Random, moves: dict, fainted: set, active: str) -> dict:
+    """Request of the player side, as sent by the server every turn."""
+    return {
+        "active": [
+            {
+                "moves": [
+                    {"move": m, "id": m, "pp": 10, "maxpp": 10, "disabled": False}
+                    for m in rng.sample(moves[active], rng.randint(1, 4))
+                ]
+            }
+        ],
+        "side": {
+            "name": "player",
+            "id": "p1",
+            "pokemon": [
+                {
+                    "ident": f"p1: {name}",
+                    "details": f"{name}, L50",
+                    "condition": "0 fnt" if name in fainted else "100/100",
+                    "active": name == active,
+                    "stats": {"atk": 50, "def": 50, "spa": 50, "spd": 50, "spe": 50},
+                    "moves": moves[name],
+                    "baseAbility": "static",
+                    "item": "",
+                    "pokeball": "pokeball",
+                    "ability": "static",
+                }
+                for name in OWN_TEAM
+            ],
+        },
+        "rqid": 1,
+    }
+
+
+def replay_battles(n_battles: int, seed: int = 0):
+    """Yield the battle after each turn of random protocol events."""
+    rng = random.Random(seed)
+    moves = {name: rng.sample(MOVES, 4) for name in OWN_TEAM}
+    for battle_id in range(n_battles):
+        battle = Battle(
+            f"battle-gen9randombattle-{battle_id}",
+            "player",
+            logging.getLogger("Benchmark"),
+            gen=9,
+        )
+        battle.player_role = "p1"
+        for message in (
+            ["", "player", "p1", "player", ""],
+            ["", "player", "p2", "opponent", ""],
+            ["", "teamsize", "p1", "6"],
+            ["", "teamsize", "p2", "6"],
+        ):
+            battle.parse_message(message)
+        fainted = {"p1": set(), "p2": set()}
+        active = {"p1": OWN_TEAM[0], "p2": OPPONENT_TEAM[0]}
+        teams = {"p1": OWN_TEAM, "p2": OPPONENT_TEAM}
+        for side in ("p1", "p2"):
+            name = active[side]
+            battle.parse_message(["", "switch", f"{side}a: {name}", f"{name}, L50", "100/100"])
+
+        for turn in range(1, rng.randint(10, 40)):
+            side = rng.choice(["p1", "p2"])
+            event = rng.random()
+            if event < 0.3:
+                alive = [n for n in teams[side] if n not in fainted[side]]
+                active[side] = rng.choice(alive)
+                name = active[side]
+                battle.parse_message(
+                    ["", "switch", f"{side}a: {name}", f"{name}, L50", "100/100"]
+                )
+            elif event < 0.8:
+                name = active[side]
+                if name not in fainted[side]:
+                    battle.parse_message(["", "-damage", f"{side}a: {name}", "0 fnt"])
+                    battle.parse_message(["", "faint", f"{side}a: {name}"])
+                    fainted[side].add(name)
+                    if len(fainted[side]) == len(teams[side]):
+                        break
+            elif fainted[side]:
+                name = rng.choice(sorted(fainted[side]))
+                fainted[side].discard(name)
+                battle.parse_message(
+                    ["", "-heal", f"{side}: {name}", "50/100", "[from] move: Revival Blessing"]
+                )
+            battle.parse_message(["", "turn", str(turn)])
+            if active["p1"] in fainted["p1"]:
+                continue
+            battle.parse_request(make_request(rng, moves, fainted["p1"], active["p1"]))
+            yield battle
+
+
+def measure(embed, battles) -> dict:
+    """
+    Trace the memory allocated by an embedding while replaying battles.
+
+    Only the embedding calls are traced. The observations are kept alive, and
+    so are the battles, whose release would otherwise be counted as a negative
+    allocation of the step that drops them.
+    """
+    observations = []
+    replayed = []
+    kept = peak_total = steps = 0
+    tracemalloc.start()
+    for battle in battles:
+        replayed.append(battle)
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        observations.append(embed(battle))
+        after, peak = tracemalloc.get_traced_memory()
+        kept += after - before
+        peak_total += peak - before
+        steps += 1
+    tracemalloc.stop()
+    return {"kept": kept / steps, "peak": peak_total / steps}
+
+
+def time_per_step(embed, battles) -> float:
+    """Mean time of an embedding call in microseconds."""
+    elapsed = steps = 0
+    for battle in battles:
+        start = time.perf_counter()
+        embed(battle)
+        elapsed += time.perf_counter() - start
+        steps += 1
+    return elapsed / steps * 1e6
+
+
+def main(
+    battles: int = typer.Option(200, "--battles", help="Random battles to replay"),
+    seed: int = typer.Option(0, "--seed", help="Random seed"),
+):
+    builder = ObservationBuilder()
+    steps = 0
+    for battle in replay_battles(battles, seed):
+        expected = simple_embed_battle(battle)
+        if expected.tobytes() != builder.build(battle).tobytes():
+            raise AssertionError("Observations differ")
+        steps += 1
+    print(f"✅ Identical observations over {steps} steps")
+
+    for name, embed_factory in (
+        ("simple_embed_battle", lambda: simple_embed_battle),
+        ("ObservationBuilder", lambda: ObservationBuilder().build),
+    ):
+        result = measure(embed_factory(), replay_battles(battles, seed))
+        result["time"] = min(
+            time_per_step(embed_factory(), replay_battles(battles, seed))
+            for _ in range(3)
+        )
+        print(
+            f"{name:>20}: {result['kept']:.1f} bytes kept and "
+            f"{result['peak']:.1f} bytes peak allocated per step, "
+            f"{result['time']:.2f} µs per step"
+        )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,90 @@
+"""
+Memory and speed of SB3's ReplayBuffer against CompressedReplayBuffer.
+
+Usage:
+    python -m benchmarks.replay_buffer --battles 200
+
+The observations of random battles replayed through poke-env's parser are
+added to both buffers. The samples of both buffers are checked to be
+identical, then the bytes per transition and the add and sample times are
+compared.
+"""
+
+import time
+import numpy as np
+import torch
+import typer
+from gymnasium import spaces
+
+from benchmarks.observation_allocations import replay_battles
+from stable_baselines3.common.buffers import ReplayBuffer
+from utils.model import simple_embed_battle
+from utils.replay_buffer import CompressedReplayBuffer
+
+
+ARRAYS = ["observations", "next_observations", "actions", "rewards", "dones", "timeouts"]
+
+
+def fill(buffer: ReplayBuffer, observations: np.ndarray, seed: int) -> float:
+    """Add consecutive observations as transitions, returning µs per add."""
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    for obs, next_obs in zip(observations[:-1], observations[1:]):
+        buffer.add(
+            obs[None],
+            next_obs[None],
+            np.array([rng.integers(26)]),
+            np.array([rng.random()]),
+            np.array([rng.random() < 0.05]),
+            [{}],
+        )
+    return (time.perf_counter() - start) / (len(observations) - 1) * 1e6
+
+
+def time_sample(buffer: ReplayBuffer, batch_size: int, repeat: int) -> float:
+    """Mean time of a sample call in microseconds."""
+    np.random.seed(0)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        buffer.sample(batch_size)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(
+    battles: int = typer.Option(200, "--battles", help="Random battles to replay"),
+    batch_size: int = typer.Option(32, "--batch-size", help="Sampled batch size"),
+    seed: int = typer.Option(0, "--seed", help="Random seed"),
+):
+    observations = np.stack([simple_embed_battle(b) for b in replay_battles(battles, seed)])
+    size = len(observations) - 1
+    observation_space = spaces.Box(-1, 4, (observations.shape[1],), dtype=np.float32)
+    action_space = spaces.Discrete(26)
+
+    buffers = {
+        "ReplayBuffer": ReplayBuffer(size, observation_space, action_space, device="cpu"),
+        "CompressedReplayBuffer": CompressedReplayBuffer(
+            size, observation_space, action_space, device="cpu"
+        ),
+    }
+    add_times = {name: fill(buffer, observations, seed) for name, buffer in buffers.items()}
+
+    samples = []
+    for buffer in buffers.values():
+        np.random.seed(seed)
+        samples.append(buffer.sample(size))
+    for expected, actual in zip(*samples):
+        if expected is not None and not torch.equal(expected, actual):
+            raise AssertionError("Samples differ")
+    print(f"✅ Identical samples over {size} transitions")
+
+    for name, buffer in buffers.items():
+        nbytes = sum(getattr(buffer, array).nbytes for array in ARRAYS) / buffer.buffer_size
+        print(
+            f"{name:>22}: {nbytes:.0f} bytes per transition, "
+            f"{add_times[name]:.2f} µs per add, "
+            f"{time_sample(buffer, batch_size, 1000):.2f} µs per sample of {batch_size}"
+        )
+
+
+if __name__ == "__main__":
+    typer.run(main)
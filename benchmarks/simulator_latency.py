@@ -0,0 +1,103 @@
+"""
+Per-step latency of the websocket server backend against the local simulator.
+
+Usage:
+    python -m benchmarks.simulator_latency --steps 2000
+
+The server backend expects a Showdown server on localhost:8000 (for instance
+started with ``python main.py train`` or the Docker image). It is skipped if
+the server is not reachable.
+"""
+
+import time
+import numpy as np
+import typer
+from poke_env.player import RandomPlayer
+
+from environment.local_simulator import DEFAULT_SHOWDOWN_PATH, LocalShowdownSimulator
+from environment.server import test_port_connectivity
+from environment.wrapper import PokeEnvSinglesWrapper
+from utils.logging_config import configure_poke_env_logging
+from utils.types import Simulator
+
+
+def measure_step_latency(
+    local_simulator: LocalShowdownSimulator | None, steps: int, seed: int = 0
+) -> np.ndarray:
+    """
+    Play random actions against a random opponent and time every env step.
+
+    Returns:
+        np.ndarray: The latency of each step, in seconds
+    """
+    env = PokeEnvSinglesWrapper(
+        battle_format="gen9randombattle",
+        log_level=30,
+        start_challenging=True,
+        strict=False,
+        local_simulator=local_simulator,
+    )
+    opponent = RandomPlayer(
+        battle_format="gen9randombattle",
+        log_level=30,
+        start_listening=local_simulator is None,
+    )
+    train_env = env.get_wrapped_env(opponent=opponent)
+    train_env.action_space.seed(seed)
+
+    latencies = np.empty(steps)
+    try:
+        train_env.reset(seed=seed)
+        for i in range(steps):
+            action = train_env.action_space.sample()
+            start = time.perf_counter()
+            _, _, terminated, truncated, _ = train_env.step(action)
+            latencies[i] = time.perf_counter() - start
+            if terminated or truncated:
+                train_env.reset()
+    finally:
+        train_env.close()
+    return latencies
+
+
+def main(
+    steps: int = typer.Option(1000, "--steps", help="Env steps per backend"),
+    showdown_path: str = typer.Option(
+        DEFAULT_SHOWDOWN_PATH,
+        "--showdown-path",
+        help="Pokémon Showdown checkout used by the local simulator",
+    ),
+):
+    configure_poke_env_logging()
+
+    backends = {}
+    if test_port_connectivity(8000):
+        backends[Simulator.SERVER] = None
+    else:
+        print("⚠️ No server on localhost:8000, skipping the server backend")
+    local_simulator = LocalShowdownSimulator(showdown_path)
+    try:
+        local_simulator.check()
+        backends[Simulator.LOCAL] = local_simulator
+    except FileNotFoundError as e:
+        print(f"⚠️ {e} Skipping the local backend")
+
+    results = {}
+    for backend, simulator in backends.items():
+        print(f"⏳ Measuring {steps} steps with the {backend.value} backend...")
+        latencies = measure_step_latency(simulator, steps) * 1000
+        results[backend] = latencies
+        print(
+            f"{backend.value:>8}: mean {latencies.mean():.2f} ms, "
+            f"p50 {np.percentile(latencies, 50):.2f} ms, "
+            f"p95 {np.percentile(latencies, 95):.2f} ms, "
+            f"{1000 / latencies.mean():.1f} steps/sec"
+        )
+
+    if len(results) == 2:
+        speedup = results[Simulator.SERVER].mean() / results[Simulator.LOCAL].mean()
+        print(f"⚡ Local simulator speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,110 @@
+"""
+Microbenchmark of the precomputed type chart against poke-env's lookups.
+
+Usage:
+    python -m benchmarks.type_chart --battles 2000
+
+Random battle states are embedded with the previous per-move
+``damage_multiplier`` calls and with ``simple_embed_battle``. The observations
+are checked to be bit-identical before timing both versions.
+"""
+
+import random
+import timeit
+from types import SimpleNamespace
+import numpy as np
+import typer
+from poke_env.data import GenData
+from poke_env.environment import Move, Pokemon, PokemonType
+
+from utils.model import simple_embed_battle
+from utils.type_chart import damage_multipliers
+
+
+def reference_embed_battle(battle) -> np.ndarray:
+    """Observation as embedded before the type chart, one lookup per move."""
+    moves_base_power = -np.ones(4)
+    moves_dmg_multiplier = np.ones(4)
+    for i, move in enumerate(battle.available_moves):
+        moves_base_power[i] = move.base_power / 100
+        if move.type:
+            moves_dmg_multiplier[i] = battle.opponent_active_pokemon.damage_multiplier(
+                move
+            )
+    fainted_mon_team = len([mon for mon in battle.team.values() if mon.fainted]) / 6
+    fainted_mon_opponent = (
+        len([mon for mon in battle.opponent_team.values() if mon.fainted]) / 6
+    )
+    return np.float32(
+        np.concatenate(
+            [moves_base_power, moves_dmg_multiplier, [fainted_mon_team, fainted_mon_opponent]]
+        )
+    )
+
+
+def random_battle(rng: random.Random, gen: int, species: list[str], moves: list[str]):
+    """Build a battle-like state with the attributes used by the embedding."""
+    opponent = Pokemon(gen=gen, species=rng.choice(species))
+    if rng.random() < 0.2:
+        # Terastallized pokémon keep only their tera type
+        opponent._terastallized = True
+        opponent._terastallized_type = rng.choice(list(PokemonType)[:18])
+    team = {str(i): Pokemon(gen=gen, species=rng.choice(species)) for i in range(6)}
+    opponent_team = {str(i): Pokemon(gen=gen, species=rng.choice(species)) for i in range(6)}
+    return SimpleNamespace(
+        gen=gen,
+        available_moves=[Move(m, gen=gen) for m in rng.sample(moves, rng.randint(0, 4))],
+        opponent_active_pokemon=opponent,
+        team=team,
+        opponent_team=opponent_team,
+    )
+
+
+def main(
+    battles: int = typer.Option(2000, "--battles", help="Random battle states"),
+    gen: int = typer.Option(9, "--gen", help="Battle generation"),
+    seed: int = typer.Option(0, "--seed", help="Random seed"),
+):
+    rng = random.Random(seed)
+    data = GenData.from_gen(gen)
+    species = [s for s, entry in data.pokedex.items() if entry.get("num", 0) > 0]
+    moves = [
+        m for m, entry in data.moves.items() if entry.get("num", 0) > 0 and "isZ" not in entry
+    ]
+    states = [random_battle(rng, gen, species, moves) for _ in range(battles)]
+
+    for state in states:
+        expected = reference_embed_battle(state)
+        actual = simple_embed_battle(state)
+        if expected.tobytes() != actual.tobytes():
+            raise AssertionError(f"Observations differ: {expected} != {actual}")
+    print(f"✅ {battles} observations are bit-identical")
+
+    def lookup_multipliers(state):
+        return [state.opponent_active_pokemon.damage_multiplier(m) for m in state.available_moves]
+
+    def chart_multipliers(state):
+        return damage_multipliers(
+            state.gen, state.opponent_active_pokemon, state.available_moves
+        )
+
+    benchmarks = {
+        "multipliers": (lookup_multipliers, chart_multipliers),
+        "observation": (reference_embed_battle, simple_embed_battle),
+    }
+    for benchmark, functions in benchmarks.items():
+        timings = []
+        for name, function in zip(("lookup", "chart"), functions):
+            # Warm the move type cache, as in a running battle
+            for state in states:
+                function(state)
+            seconds = min(
+                timeit.repeat(lambda: [function(s) for s in states], number=1, repeat=5)
+            )
+            timings.append(seconds / battles * 1e6)
+            print(f"{benchmark:>12} {name:>6}: {timings[-1]:.2f} µs per battle state")
+        print(f"⚡ {benchmark} speedup: {timings[0] / timings[1]:.2f}x")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -4,5 +4,15 @@ Command implementations for the Pokémon RL project.
 
 from .train import train_command
 from .evaluate import evaluate_command
+from .pretrain import record_command, pretrain_command
+from .tournament import tournament_command
+from .report import report_command
 
-__all__ = ['train_command', 'evaluate_command']
+__all__ = [
+    'train_command',
+    'evaluate_command',
+    'record_command',
+    'pretrain_command',
+    'tournament_command',
+    'report_command',
+]
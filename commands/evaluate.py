@@ -3,16 +3,336 @@ Evaluation command implementation.
 """
 
 import logging
+import multiprocessing
+import random
+import threading
+import time
 import numpy as np
-from poke_env.player import RandomPlayer, MaxBasePowerPlayer
-from stable_baselines3 import PPO, DQN
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
 
-from environment.wrapper import PokeEnvSinglesWrapper, DQNPlayer
+from poke_env.ps_client.server_configuration import (
+    LocalhostServerConfiguration,
+    ServerConfiguration,
+)
+
+from environment.local_simulator import DEFAULT_SHOWDOWN_PATH
+from environment.opponents import OPPONENT_NAMES, create_opponent, get_opponent_model_path
+from environment.server import ShowdownServerPool
+from environment.teams import (
+    PAIRED_BATTLE_FORMAT,
+    PAIRED_FORMAT_WARNING,
+    SequenceTeambuilder,
+    generate_paired_teams,
+    mirrored_team_orders,
+)
+from environment.vec_env import make_account_prefix, make_accounts
+from environment.wrapper import DQNPlayer, PokeEnvSinglesWrapper
 from utils.types import RLModel, RLPlayer
-from utils.evaluation_utils import EvaluationResults
-from utils.logging_config import configure_poke_env_logging
+from utils.battle_log import BattleLogWriter, get_battle_log_dir, make_run_id
+from utils.evaluation_cache import EvaluationCache, file_hash
+from utils.evaluation_utils import (
+    EvaluationResults,
+    SequentialStopping,
+    paired_win_rate,
+    wilson_interval,
+)
+from utils.logging_config import configure_poke_env_logging, setup_logging
+from utils.model_utils import load_model
 from utils.output_utils import get_output_dir
-from tqdm.rich import trange
+from tqdm.rich import tqdm
+
+
+BATTLE_FORMAT = "gen9randombattle"
+
+
+class BattleTally:
+    """
+    Wins and battles against one opponent, counted across its shards.
+
+    With a multiprocessing manager, the counts live in the manager process,
+    so the shards of a process pool share them and all stop once the rule is
+    met.
+    """
+
+    def __init__(self, stopping: SequentialStopping, manager=None):
+        """
+        Args:
+            stopping: Rule deciding when the evaluation can stop
+            manager: Multiprocessing manager, needed when the shards run in
+                other processes
+        """
+        self.stopping = stopping
+        if manager is None:
+            self._lock = threading.Lock()
+            self._counts = [0, 0]
+            self._stopped = threading.Event()
+        else:
+            self._lock = manager.Lock()
+            self._counts = manager.list([0, 0])
+            self._stopped = manager.Event()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def record(self, won: bool) -> bool:
+        """
+        Count a battle.
+
+        Returns:
+            bool: Whether the evaluation should stop
+        """
+        with self._lock:
+            wins = self._counts[0] + int(won)
+            battles = self._counts[1] + 1
+            self._counts[0], self._counts[1] = wins, battles
+            if self.stopping.should_stop(wins, battles):
+                self._stopped.set()
+        return self._stopped.is_set()
+
+
+def play_battles(
+    trained_model,
+    eval_env,
+    battle_indices: range,
+    seed: int | None = None,
+    show_progress: bool = True,
+    use_action_masks: bool = False,
+    tally: BattleTally | None = None,
+    battle_log: BattleLogWriter | None = None,
+) -> dict[str, list]:
+    """
+    Play evaluation battles with a trained model.
+
+    Each battle is seeded with ``seed + battle_index``, so the client-side
+    randomness of a battle does not depend on how battles are split in shards.
+    With ``use_action_masks``, the legal actions of each step are passed to the
+    model, as MaskablePPO expects. With a ``tally``, every result is counted in
+    it and the battles stop as soon as it says so. With a ``battle_log``, a
+    record of every battle is added to it.
+
+    Returns:
+        dict: Per-battle ``rewards``, ``wins``, ``steps`` and ``turns`` lists
+    """
+    logger = logging.getLogger("Evaluation")
+    battle_rewards = []
+    battle_results = []  # True for win, False for loss
+    battle_steps = []  # Track number of steps per battle
+    battle_turns = []
+
+    for battle_num in tqdm(battle_indices, disable=not show_progress):
+        if tally is not None and tally.stopped:
+            break
+        start_time = time.perf_counter()
+        if seed is not None:
+            random.seed(seed + battle_num)
+            np.random.seed(seed + battle_num)
+            obs, info = eval_env.reset(seed=seed + battle_num)
+        else:
+            obs, info = eval_env.reset()
+        done = False
+        step_count = 0
+        total_reward = 0
+
+        while not done:
+            # Use the trained model to predict actions
+            if use_action_masks:
+                action, _states = trained_model.predict(
+                    obs, deterministic=True, action_masks=eval_env.action_masks()
+                )
+            else:
+                action, _states = trained_model.predict(obs, deterministic=True)
+            # Handle different action types (numpy array or scalar)
+            if hasattr(action, "item"):
+                action_value = np.int64(action.item())
+            else:
+                action_value = np.int64(action)
+            obs, reward, terminated, truncated, info = eval_env.step(action_value)
+            done = terminated or truncated
+            step_count += 1
+            total_reward += float(reward)
+
+            # Prevent infinite loops
+            if step_count > 1000:
+                logger.warning(
+                    f"⚠️ Battle {battle_num + 1} exceeded 1000 steps, ending battle"
+                )
+                break
+
+        # Store battle results
+        battle_rewards.append(total_reward)
+        battle_steps.append(step_count)
+        battle = eval_env.env.battle1
+        battle_turns.append(battle.turn if battle is not None else 0)
+        battle_won = total_reward > 0
+        battle_results.append(battle_won)
+        if battle_log is not None:
+            wall_time = time.perf_counter() - start_time
+            battle_log.add(
+                battle=battle_num,
+                won=battle_won,
+                reward=total_reward,
+                turns=battle_turns[-1],
+                steps=step_count,
+                wall_time=wall_time,
+                decisions_per_second=step_count / wall_time if wall_time > 0 else 0.0,
+            )
+        if tally is not None and tally.record(battle_won):
+            break
+
+    return {
+        "rewards": battle_rewards,
+        "wins": battle_results,
+        "steps": battle_steps,
+        "turns": battle_turns,
+    }
+
+
+def evaluate_shard(
+    model_type: RLModel,
+    model_path: Path,
+    opponent: RLPlayer,
+    battle_indices: range,
+    seed: int | None = None,
+    account_prefix: str | None = None,
+    rank: int = 0,
+    trained_model=None,
+    server_configuration: ServerConfiguration = LocalhostServerConfiguration,
+    tally: BattleTally | None = None,
+    teams: list[tuple[str, str]] | None = None,
+    battle_log_path: Path | None = None,
+    run_id: str | None = None,
+) -> dict[str, list]:
+    """
+    Play a slice of the evaluation battles against one opponent.
+
+    This runs either in the main process or inside a pool worker, where the
+    model is loaded again and the env gets its own accounts. Against a DQN
+    opponent, its decision and fallback counts are returned as well. With the
+    ``teams`` of a paired evaluation, the battles are played in the custom
+    format with the mirrored teams of their pair. With a ``battle_log_path``,
+    the record of every battle is streamed to the battle log, under
+    ``run_id``.
+    """
+    configure_poke_env_logging()
+    if trained_model is None:
+        trained_model = load_model(model_type, model_path)
+
+    account1, account2, opponent_account = make_accounts(account_prefix, rank)
+    player = create_opponent(opponent, account_configuration=opponent_account)
+    env = PokeEnvSinglesWrapper(
+        account_configuration1=account1,
+        account_configuration2=account2,
+        server_configuration=server_configuration,
+        battle_format=BATTLE_FORMAT if teams is None else PAIRED_BATTLE_FORMAT,
+        log_level=30,  # WARNING level to reduce verbosity
+        start_challenging=teams is None,
+        strict=False,
+    )
+    if teams is not None:
+        # Teams must be set before the first challenge is sent
+        player_teams, opponent_teams = mirrored_team_orders(teams, battle_indices)
+        env.agent1._team = SequenceTeambuilder(player_teams)
+        env.agent2._team = SequenceTeambuilder(opponent_teams)
+        env.start_challenging()
+    eval_env = env.get_wrapped_env(opponent=player)
+    battle_log = (
+        BattleLogWriter(
+            battle_log_path,
+            prefix=f"{run_id}_{opponent.value}_{rank}",
+            run=run_id,
+            opponent=opponent.value,
+            paired=teams is not None,
+        )
+        if battle_log_path is not None
+        else None
+    )
+    try:
+        shard = play_battles(
+            trained_model,
+            eval_env,
+            battle_indices,
+            seed=seed,
+            show_progress=account_prefix is None,
+            use_action_masks=model_type == RLModel.MASKABLE_PPO,
+            tally=tally,
+            battle_log=battle_log,
+        )
+        if isinstance(player, DQNPlayer):
+            shard["opponent_choices"] = player.times_made_a_choice
+            shard["opponent_fallbacks"] = player.times_fallback_choice
+        return shard
+    finally:
+        if battle_log is not None:
+            battle_log.flush()
+        eval_env.close()
+
+
+def split_battles(num_battles: int, workers: int, group: int = 1) -> list[range]:
+    """
+    Split the battle budget in contiguous, nearly equal shards.
+
+    Shards are made of whole groups of ``group`` battles, such as the two
+    battles of a pair.
+    """
+    num_groups = num_battles // group
+    bounds = group * np.linspace(0, num_groups, min(workers, num_groups) + 1, dtype=int)
+    return [range(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def submit_opponent_shards(
+    executor: ProcessPoolExecutor,
+    model_type: RLModel,
+    model_path: Path,
+    opponent: RLPlayer,
+    num_battles: int,
+    workers: int,
+    seed: int | None = None,
+    server_pool: ShowdownServerPool | None = None,
+    tally: BattleTally | None = None,
+    teams: list[tuple[str, str]] | None = None,
+    battle_log_path: Path | None = None,
+    run_id: str | None = None,
+) -> list[Future]:
+    """
+    Submit the shards of the battles against one opponent to the pool.
+
+    With a server pool, each shard plays on the least-loaded server, which is
+    released once the shard is done.
+
+    Returns:
+        list[Future]: One future per shard, in battle order
+    """
+    account_prefix = make_account_prefix("eval")
+    futures = []
+    group = 1 if teams is None else 2
+    for rank, battle_indices in enumerate(split_battles(num_battles, workers, group)):
+        server_configuration = (
+            server_pool.acquire() if server_pool else LocalhostServerConfiguration
+        )
+        future = executor.submit(
+            evaluate_shard,
+            model_type,
+            model_path,
+            opponent,
+            battle_indices,
+            seed=seed,
+            account_prefix=account_prefix,
+            rank=rank,
+            server_configuration=server_configuration,
+            tally=tally,
+            teams=teams,
+            battle_log_path=battle_log_path,
+            run_id=run_id,
+        )
+        if server_pool:
+            future.add_done_callback(
+                lambda _, config=server_configuration: server_pool.release(config)
+            )
+        futures.append(future)
+    return futures
+
 
 def evaluate_command(
     model_type: RLModel = RLModel.PPO,
@@ -22,155 +342,326 @@ def evaluate_command(
     opponents: list[RLPlayer] = [RLPlayer.RANDOM],
     num_battles: int = 1000,
     name: str | None = None,
+    workers: int = 1,
+    seed: int | None = None,
+    concurrent: bool = False,
+    servers: int = 1,
+    target_ci: float | None = None,
+    confidence: float = 0.95,
+    use_cache: bool = True,
+    paired: bool = False,
+    showdown_path: str = DEFAULT_SHOWDOWN_PATH,
 ):
     """
     Evaluate the model and generate training progress plots.
+
+    With ``workers`` greater than one, the battles against each opponent are
+    split across a process pool and the per-worker results are merged. With
+    ``concurrent``, every opponent is played at the same time on its own envs.
+    With ``servers`` greater than one, the envs are spread across a pool of
+    Showdown servers.
+
+    With ``target_ci``, the battles against an opponent stop early once the
+    ``confidence`` interval of the win rate is narrower than ``target_ci`` or
+    lies entirely above or below 50%, up to ``num_battles`` battles.
+
+    With ``use_cache``, the result of a matchup already evaluated with the same
+    model file, opponent, format, number of battles and options is read from
+    the evaluation cache instead of being played again.
+
+    The record of every battle played is appended to the battle log of the
+    model, read by ``report_command``.
+
+    With ``paired``, ``num_battles / 2`` pairs of random-battle teams are
+    generated from ``seed`` with the Showdown checkout at ``showdown_path``,
+    and each pair is played twice with the teams swapped, in a custom game.
+    The win rate is reported with its paired standard error.
     """
     logger = logging.getLogger("Evaluation")
 
-    try:
-        # Initialize environment
-        if initialize_func:
-            initialize_func(no_docker=no_docker)
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    if paired and target_ci:
+        raise ValueError("Paired evaluations play whole pairs, they cannot stop early")
+    if paired and num_battles < 2:
+        raise ValueError(f"A paired evaluation needs at least 2 battles, got {num_battles}")
+    if paired:
+        # Pairs are whole, an odd last battle is dropped
+        num_battles -= num_battles % 2
+    battle_format = PAIRED_BATTLE_FORMAT if paired else BATTLE_FORMAT
+    team_seed = seed if seed is not None else 0
 
-        # Load the latest trained model of the type specified
-        logger.info(f"🔄 Loading model: {name} (Type: {model_type})")
+    executor = None
+    manager = None
+    try:
         model_path = (
             get_output_dir(task_type="train", model_type=model_type)
             / f"{name if name else model_type.value}_model.zip"
         )
-        if model_type == RLModel.PPO:
-            trained_model = PPO.load(model_path, device="cpu")
-        elif model_type == RLModel.DQN:
-            trained_model = DQN.load(model_path)
-        else:
-            logger.error(
-                f"❌ Model type {model_type.value} evaluation not implemented yet"
-            )
+        supported_opponents = [opponent for opponent in opponents if opponent in OPPONENT_NAMES]
+
+        # Look up the matchups already evaluated
+        cache = EvaluationCache() if use_cache and model_path.exists() else None
+        cache_entries = {}
+        cached_results = {}
+        if cache is not None:
+            model_hash = file_hash(model_path)
+            for opponent in supported_opponents:
+                opponent_model_path = get_opponent_model_path(opponent)
+                opponent_hash = (
+                    file_hash(opponent_model_path)
+                    if opponent_model_path is not None and opponent_model_path.exists()
+                    else None
+                )
+                entry = dict(
+                    model_hash=model_hash,
+                    opponent=opponent.value,
+                    opponent_hash=opponent_hash,
+                    battle_format=battle_format,
+                    num_battles=num_battles,
+                )
+                options = dict(seed=seed, target_ci=target_ci, confidence=confidence)
+                if paired:
+                    options.update(team_format=BATTLE_FORMAT, team_seed=team_seed)
+                key = cache.make_key(**entry, **options)
+                cache_entries[opponent] = (key, entry)
+                cached = cache.get(key)
+                if cached is not None:
+                    cached_results[opponent] = cached
+        opponents_to_play = [o for o in supported_opponents if o not in cached_results]
+
+        # Initialize environment, only needed if some matchup must be played
+        server_pool = None
+        if initialize_func and opponents_to_play:
+            server = initialize_func(no_docker=no_docker, servers=servers)
+            if isinstance(server, ShowdownServerPool):
+                server_pool = server
+        elif initialize_func:
+            setup_logging()
+
+        # Load the latest trained model of the type specified
+        logger.info(f"🔄 Loading model: {name} (Type: {model_type})")
+        try:
+            trained_model = load_model(model_type, model_path)
+        except ValueError as e:
+            logger.error(f"❌ {e}")
             return
         logger.info("✅ Model loaded successfully")
 
         results = EvaluationResults(model_type=model_type, name=name)
 
+        if paired:
+            logger.warning(f"⚠️ {PAIRED_FORMAT_WARNING}")
+        teams = None
+        if paired and opponents_to_play:
+            logger.info(
+                f"🪞 Generating {num_battles // 2} pairs of {BATTLE_FORMAT} teams "
+                f"with seed {team_seed}, each played twice with the teams swapped"
+            )
+            teams = generate_paired_teams(
+                num_battles // 2, team_seed, BATTLE_FORMAT, showdown_path
+            )
+
+        # Every battle played is streamed to the battle log of the model
+        run_id = make_run_id()
+        battle_log_path = get_battle_log_dir(model_type, name)
+        if opponents_to_play:
+            logger.info(f"📝 Logging every battle of run {run_id} to: {battle_log_path}")
+
         # Configure PokeEnv logging to reduce noise
         configure_poke_env_logging()
         logger.info("🔇 Configured PokeEnv logging to reduce verbosity")
+
         for opponent in opponents:
-            if opponent == RLPlayer.RANDOM:
-                player = RandomPlayer(log_level=30)
-                opponent_name = "Random"
-            elif opponent == RLPlayer.MAX:
-                player = MaxBasePowerPlayer(log_level=30)
-                opponent_name = "MaxBasePower"
-            elif opponent == RLPlayer.DQN_RANDOM:
-                # Load all DQN models trained
-                opponent_model_path = (
-                    get_output_dir(task_type="train", model_type=RLModel.DQN)
-                    / "random_model.zip"
-                )
-                if not opponent_model_path.exists():
-                    logger.error(
-                        "❌ DQN model not found. Please train the DQN model first."
-                    )
-                    continue
-                player = DQNPlayer(
-                    model=DQN.load(opponent_model_path, device="cpu")
+            if opponent not in OPPONENT_NAMES:
+                logger.error(f"❌ Unsupported opponent: {opponent}")
+        if cached_results:
+            logger.info(
+                f"🗃️ {len(cached_results)}/{len(supported_opponents)} matchup(s) "
+                f"served from the evaluation cache: {cache.path}"
+            )
+
+        if opponents_to_play and (workers > 1 or concurrent):
+            max_workers = workers * len(opponents_to_play) if concurrent else workers
+            logger.info(f"🧵 Starting a pool of {max_workers} evaluation workers...")
+            executor = ProcessPoolExecutor(
+                max_workers=max(1, max_workers),
+                # poke-env runs its event loop in a background thread
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            if target_ci:
+                # Shared counts of the shards of each opponent
+                manager = multiprocessing.get_context("spawn").Manager()
+
+        stopping = (
+            SequentialStopping(target_ci, confidence=confidence) if target_ci else None
+        )
+        if stopping:
+            logger.info(
+                f"📏 Stopping each opponent early once the {confidence:.0%} interval "
+                f"of the win rate is narrower than {target_ci:.1%} or decided"
+            )
+        tallies = {
+            opponent: BattleTally(stopping, manager) if stopping else None
+            for opponent in opponents_to_play
+        }
+
+        # In concurrent mode every opponent is submitted before collecting results
+        pending = {}
+        if concurrent:
+            logger.info(
+                f"⚔️ Running {num_battles} evaluation battles against "
+                f"{len(opponents_to_play)} opponents concurrently..."
+            )
+            for opponent in opponents_to_play:
+                pending[opponent] = submit_opponent_shards(
+                    executor,
+                    model_type,
+                    model_path,
+                    opponent,
+                    num_battles,
+                    workers,
+                    seed=seed,
+                    server_pool=server_pool,
+                    tally=tallies[opponent],
+                    teams=teams,
+                    battle_log_path=battle_log_path,
+                    run_id=run_id,
                 )
-                opponent_name = "DQN (Random Train)"
-            elif opponent == RLPlayer.DQN_MAX:
-                # Load all DQN models trained
-                opponent_model_path = (
-                    get_output_dir(task_type="train", model_type=RLModel.DQN)
-                    / "max_model.zip"
+
+        for opponent in supported_opponents:
+            opponent_name = OPPONENT_NAMES[opponent]
+
+            if opponent in cached_results:
+                cached = cached_results[opponent]
+                logger.info(
+                    f"🗃️ Cached result against {opponent.value}: "
+                    f"{cached['battles_won']}/{cached['total_battles']} battles won"
                 )
-                if not opponent_model_path.exists():
-                    logger.error(
-                        "❌ DQN model not found. Please train the DQN model first."
-                    )
-                    continue
-                player = DQNPlayer(
-                    model=DQN.load(opponent_model_path, device="cpu")
+                results.add_result(
+                    opponent_name=opponent_name,
+                    battles_won=cached["battles_won"],
+                    total_battles=cached["total_battles"],
+                    mean_reward=cached["mean_reward"],
+                    std_reward=cached["std_reward"],
+                    win_rate_ci=tuple(cached["win_rate_ci"]),
+                    win_rate_se=cached.get("win_rate_se"),
                 )
-                opponent_name = "DQN (Max Train)"
-            else:
-                logger.error(f"❌ Unsupported opponent: {opponent}")
                 continue
 
-            # Create evaluation environment
-            logger.info("🎮 Setting up evaluation environment...")
-            env = PokeEnvSinglesWrapper(
-                battle_format="gen9randombattle",
-                log_level=30,  # WARNING level to reduce verbosity
-                start_challenging=True,
-                strict=False,
-            )
-            eval_env = env.get_wrapped_env(opponent=player)
-            
             # Run evaluation battles
-            logger.info(
-                f"⚔️ Running {num_battles} evaluation battles against {opponent.value}..."
-            )
-            battle_rewards = []
-            battle_results = []  # True for win, False for loss
-            battle_steps = []  # Track number of steps per battle
-
-            for battle_num in trange(1, num_battles + 1):
-                obs, info = eval_env.reset()
-                done = False
-                step_count = 0
-                total_reward = 0
-
-                while not done:
-                    # Use the trained model to predict actions
-                    action, _states = trained_model.predict(obs, deterministic=True)
-                    # Handle different action types (numpy array or scalar)
-                    if hasattr(action, "item"):
-                        action_value = np.int64(action.item())
-                    else:
-                        action_value = np.int64(action)
-                    obs, reward, terminated, truncated, info = eval_env.step(
-                        action_value
+            try:
+                if opponent in pending:
+                    # Shards are merged in battle order
+                    shards = [future.result() for future in pending[opponent]]
+                elif executor is not None:
+                    logger.info(
+                        f"⚔️ Running {num_battles} evaluation battles against {opponent.value}..."
+                    )
+                    futures = submit_opponent_shards(
+                        executor,
+                        model_type,
+                        model_path,
+                        opponent,
+                        num_battles,
+                        workers,
+                        seed=seed,
+                        server_pool=server_pool,
+                        tally=tallies[opponent],
+                        teams=teams,
+                        battle_log_path=battle_log_path,
+                        run_id=run_id,
                     )
-                    done = terminated or truncated
-                    step_count += 1
-                    total_reward += float(reward)
-
-                    # Prevent infinite loops
-                    if step_count > 1000:
-                        logger.warning(
-                            f"⚠️ Battle {battle_num} exceeded 1000 steps, ending battle"
-                        )
-                        break
-
-                # Store battle results
-                battle_rewards.append(total_reward)
-                battle_steps.append(step_count)
-                battle_won = total_reward > 0
-                battle_results.append(battle_won)
+                    shards = [future.result() for future in futures]
+                else:
+                    logger.info(
+                        f"⚔️ Running {num_battles} evaluation battles against {opponent.value}..."
+                    )
+                    logger.info("🎮 Setting up evaluation environment...")
+                    server_configuration = (
+                        server_pool.acquire()
+                        if server_pool
+                        else LocalhostServerConfiguration
+                    )
+                    try:
+                        shards = [
+                            evaluate_shard(
+                                model_type,
+                                model_path,
+                                opponent,
+                                range(num_battles),
+                                seed=seed,
+                                trained_model=trained_model,
+                                server_configuration=server_configuration,
+                                tally=tallies[opponent],
+                                teams=teams,
+                                battle_log_path=battle_log_path,
+                                run_id=run_id,
+                            )
+                        ]
+                    finally:
+                        if server_pool:
+                            server_pool.release(server_configuration)
+            except FileNotFoundError:
+                logger.error("❌ DQN model not found. Please train the DQN model first.")
+                continue
+
+            opponent_choices = sum(shard.get("opponent_choices", 0) for shard in shards)
+            if opponent_choices:
+                opponent_fallbacks = sum(shard["opponent_fallbacks"] for shard in shards)
+                logger.info(
+                    f"🎲 {opponent_name} fell back to a random move in "
+                    f"{opponent_fallbacks}/{opponent_choices} decisions "
+                    f"({opponent_fallbacks / opponent_choices:.2%})"
+                )
+
+            battle_rewards = [r for shard in shards for r in shard["rewards"]]
+            battle_results = [w for shard in shards for w in shard["wins"]]
 
             # Calculate overall statistics
-            results.add_result(
-                opponent_name=opponent_name,
-                battles_won=sum(battle_results),
-                total_battles=num_battles,
-                mean_reward=np.mean(battle_rewards, dtype=np.float64),
-                std_reward=np.std(battle_rewards, dtype=np.float64),
+            battles_played = len(battle_results)
+            win_rate_ci = wilson_interval(sum(battle_results), battles_played, confidence)
+            if 0 < battles_played < num_battles:
+                logger.info(
+                    f"⏹️ Stopped after {battles_played}/{num_battles} battles against "
+                    f"{opponent.value}: win rate {sum(battle_results) / battles_played:.1%}, "
+                    f"{confidence:.0%} interval [{win_rate_ci[0]:.1%}, {win_rate_ci[1]:.1%}]"
+                )
+            result = dict(
+                battles_won=int(sum(battle_results)),
+                total_battles=battles_played,
+                mean_reward=float(np.mean(battle_rewards, dtype=np.float64)),
+                std_reward=float(np.std(battle_rewards, dtype=np.float64)),
+                win_rate_ci=win_rate_ci,
             )
+            if paired:
+                win_rate, win_rate_se, win_rate_ci = paired_win_rate(battle_results, confidence)
+                # Standard error of as many independent battles
+                unpaired_se = np.sqrt(win_rate * (1 - win_rate) / max(battles_played, 1))
+                logger.info(
+                    f"🪞 Paired win rate against {opponent.value}: {win_rate:.1%} "
+                    f"± {win_rate_se:.2%} (SE), {unpaired_se:.2%} for unpaired battles"
+                )
+                result.update(win_rate_ci=win_rate_ci, win_rate_se=win_rate_se)
+            results.add_result(opponent_name=opponent_name, **result)
+            if opponent in cache_entries:
+                key, entry = cache_entries[opponent]
+                cache.put(key, result, **entry)
 
         # Print and save
         results.print()
         results.save()
 
-        # Close the environment
-        eval_env.close()
-        env.close()
-
     except KeyboardInterrupt:
         logger.warning("🛑 Evaluation interrupted by user")
     except Exception as e:
         logger.error(f"❌ Evaluation failed: {e}")
         raise
     finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if manager is not None:
+            manager.shutdown()
         # Clean up resources
         if cleanup_func and not no_docker:
             cleanup_func()
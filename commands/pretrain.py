@@ -0,0 +1,288 @@
+"""
+Demonstration recording and behavior-cloning pretraining commands.
+
+Heuristic players are recorded playing against each other, then the policy
+of a model is trained to pick their actions from the env observations before
+any online training.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import torch
+import torch.nn.functional as F
+from poke_env.concurrency import POKE_LOOP
+from poke_env.player import RandomPlayer
+from poke_env.ps_client.server_configuration import (
+    LocalhostServerConfiguration,
+    ServerConfiguration,
+)
+from stable_baselines3 import PPO, DQN
+from stable_baselines3.common.base_class import BaseAlgorithm
+
+from commands.evaluate import split_battles
+from environment.demonstrations import (
+    DemonstrationWriter,
+    RecordingPlayer,
+    get_demonstrations_dir,
+    load_demonstrations,
+)
+from environment.local_simulator import DEFAULT_SHOWDOWN_PATH, LocalShowdownSimulator
+from environment.opponents import create_opponent
+from environment.server import ShowdownServerPool
+from environment.vec_env import make_account_prefix, make_accounts
+from environment.wrapper import PokeEnvSinglesWrapper
+from utils.logging_config import configure_poke_env_logging
+from utils.output_utils import get_output_dir
+from utils.types import RLModel, RLPlayer, Simulator
+
+
+def record_shard(
+    teacher: RLPlayer,
+    n_battles: int,
+    dataset_path: Path,
+    account_prefix: str,
+    rank: int = 0,
+    server_configuration: ServerConfiguration = LocalhostServerConfiguration,
+    showdown_path: str | None = None,
+    battle_format: str = "gen9randombattle",
+) -> dict[str, int]:
+    """
+    Play battles between two recording copies of the teacher.
+
+    This runs inside a pool worker. The decisions of both sides are written
+    into the dataset, in the chunks of this worker.
+
+    Returns:
+        dict: Numbers of ``recorded`` and ``skipped`` decisions
+    """
+    configure_poke_env_logging()
+    local_simulator = LocalShowdownSimulator(showdown_path) if showdown_path else None
+    writer = DemonstrationWriter(dataset_path, prefix=f"{account_prefix}_{rank}")
+    account1, account2, _ = make_accounts(account_prefix, rank)
+    players = [
+        RecordingPlayer(
+            create_opponent(teacher, battle_format=battle_format, start_listening=False),
+            writer,
+            account_configuration=account,
+            battle_format=battle_format,
+            server_configuration=server_configuration,
+            start_listening=local_simulator is None,
+        )
+        for account in (account1, account2)
+    ]
+
+    async def play():
+        if local_simulator is None:
+            await players[0].battle_against(players[1], n_battles=n_battles)
+        else:
+            for _ in range(n_battles):
+                await local_simulator.battle(*players)
+
+    asyncio.run_coroutine_threadsafe(play(), POKE_LOOP).result()
+    writer.flush()
+    return {
+        "recorded": writer.transitions,
+        "skipped": sum(player.skipped for player in players),
+    }
+
+
+def record_command(
+    teacher: RLPlayer = RLPlayer.MAX,
+    dataset: str | None = None,
+    num_battles: int = 1000,
+    workers: int = 1,
+    initialize_func=None,
+    cleanup_func=None,
+    no_docker=False,
+    servers: int = 1,
+    simulator: Simulator = Simulator.SERVER,
+    showdown_path: str = DEFAULT_SHOWDOWN_PATH,
+):
+    """
+    Record the decisions of a heuristic player playing against itself.
+
+    The battles are split across ``workers`` processes. The pairs are added to
+    the dataset, so running the command again extends it.
+    """
+    logger = logging.getLogger("Training")
+
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+
+    try:
+        server_pool = None
+        if simulator == Simulator.LOCAL:
+            logger.info(f"🧪 Using the local simulator from: {showdown_path}")
+            LocalShowdownSimulator(showdown_path).check()
+        elif initialize_func:
+            server = initialize_func(no_docker=no_docker, servers=servers)
+            if isinstance(server, ShowdownServerPool):
+                server_pool = server
+
+        dataset_path = get_demonstrations_dir(dataset if dataset else teacher.value)
+        logger.info(
+            f"🎥 Recording {num_battles} battles of {teacher.value} against itself "
+            f"with {workers} worker(s) into: {dataset_path}"
+        )
+        account_prefix = make_account_prefix("demo")
+        shards = split_battles(num_battles, workers)
+        server_configurations = (
+            server_pool.acquire_many(len(shards))
+            if server_pool
+            else [LocalhostServerConfiguration] * len(shards)
+        )
+        with ProcessPoolExecutor(
+            max_workers=len(shards),
+            # poke-env runs its event loop in a background thread
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    record_shard,
+                    teacher,
+                    len(battle_indices),
+                    dataset_path,
+                    account_prefix,
+                    rank=rank,
+                    server_configuration=server_configurations[rank],
+                    showdown_path=showdown_path if simulator == Simulator.LOCAL else None,
+                )
+                for rank, battle_indices in enumerate(shards)
+            ]
+            results = [future.result() for future in futures]
+
+        recorded = sum(result["recorded"] for result in results)
+        skipped = sum(result["skipped"] for result in results)
+        logger.info(
+            f"💾 Recorded {recorded} decisions, {skipped} without an env action skipped"
+        )
+    finally:
+        if cleanup_func and not no_docker:
+            cleanup_func()
+
+
+def behavior_cloning_loss(
+    model: BaseAlgorithm, obs: torch.Tensor, actions: torch.Tensor, margin: float = 0.8
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """
+    Loss of the policy of a model on a batch of demonstrations.
+
+    Actor-critic policies minimize the cross-entropy of the demonstrated
+    actions. Q networks use the large-margin loss of DQfD, which ranks the
+    demonstrated action above the others by ``margin`` without pushing the Q
+    values to the scale of logits.
+
+    Returns:
+        tuple[torch.Tensor, torch.Tensor]: The loss and the greedy actions
+    """
+    if isinstance(model, DQN):
+        q_values = model.q_net(obs)
+        margins = torch.full_like(q_values, margin)
+        margins.scatter_(1, actions.unsqueeze(1), 0.0)
+        demonstrated = q_values.gather(1, actions.unsqueeze(1)).squeeze(1)
+        loss = ((q_values + margins).max(dim=1).values - demonstrated).mean()
+        return loss, q_values.argmax(dim=1)
+
+    logits = model.policy.get_distribution(obs).distribution.logits
+    return F.cross_entropy(logits, actions), logits.argmax(dim=1)
+
+
+def pretrain_command(
+    model_type: RLModel = RLModel.PPO,
+    dataset: str = RLPlayer.MAX.value,
+    name: str | None = None,
+    epochs: int = 10,
+    batch_size: int = 256,
+    learning_rate: float = 1e-3,
+    validation_split: float = 0.1,
+    seed: int = 0,
+    battle_format: str = "gen9randombattle",
+):
+    """
+    Initialize the policy of a model by behavior cloning on a dataset.
+
+    The model is saved next to the trained models, and is loaded by
+    ``train --pretrained`` with the same name.
+    """
+    logger = logging.getLogger("Training")
+
+    obs, actions = load_demonstrations(get_demonstrations_dir(dataset))
+    rng = np.random.default_rng(seed)
+    indices = rng.permutation(len(actions))
+    n_validation = int(len(indices) * validation_split)
+    validation, train = indices[:n_validation], indices[n_validation:]
+    logger.info(
+        f"📚 Loaded {len(actions)} decisions of {dataset}, "
+        f"{len(train)} for training and {len(validation)} for validation"
+    )
+
+    # The model only needs the spaces of the env, it never connects
+    spaces_env = PokeEnvSinglesWrapper(
+        battle_format=battle_format,
+        start_listening=False,
+        start_challenging=False,
+        strict=False,
+        log_level=30,
+    )
+    env = spaces_env.get_wrapped_env(RandomPlayer(start_listening=False))
+    torch.manual_seed(seed)
+    if model_type == RLModel.PPO:
+        model = PPO("MlpPolicy", env, verbose=0, device="cpu")
+    elif model_type == RLModel.DQN:
+        # Only the weights are used, the replay buffer is never filled
+        model = DQN("MlpPolicy", env, verbose=0, device="cpu", buffer_size=1)
+    elif model_type == RLModel.MASKABLE_PPO:
+        from sb3_contrib import MaskablePPO
+
+        model = MaskablePPO("MlpPolicy", env, verbose=0, device="cpu")
+    else:
+        raise ValueError(f"Unsupported model type: {model_type}")
+
+    obs_tensor = torch.as_tensor(obs)
+    actions_tensor = torch.as_tensor(actions)
+    parameters = model.q_net.parameters() if isinstance(model, DQN) else model.policy.parameters()
+    optimizer = torch.optim.Adam(parameters, lr=learning_rate)
+
+    for epoch in range(1, epochs + 1):
+        model.policy.set_training_mode(True)
+        rng.shuffle(train)
+        losses, correct = [], 0
+        for start in range(0, len(train), batch_size):
+            batch = torch.as_tensor(train[start : start + batch_size])
+            loss, predicted = behavior_cloning_loss(
+                model, obs_tensor[batch], actions_tensor[batch]
+            )
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            losses.append(loss.item())
+            correct += (predicted == actions_tensor[batch]).sum().item()
+
+        model.policy.set_training_mode(False)
+        message = (
+            f"📖 Epoch {epoch}/{epochs}: loss {np.mean(losses):.4f}, "
+            f"accuracy {correct / max(len(train), 1):.2%}"
+        )
+        if len(validation):
+            with torch.no_grad():
+                _, predicted = behavior_cloning_loss(
+                    model, obs_tensor[validation], actions_tensor[validation]
+                )
+            accuracy = (predicted == actions_tensor[validation]).float().mean().item()
+            message += f", validation accuracy {accuracy:.2%}"
+        logger.info(message)
+
+    if isinstance(model, DQN):
+        model.q_net_target.load_state_dict(model.q_net.state_dict())
+
+    model_path = (
+        get_output_dir(task_type="train", model_type=model_type)
+        / f"{name if name else model_type.value}_pretrained.zip"
+    )
+    model.save(model_path)
+    logger.info(f"💾 Pretrained model saved to: {model_path}")
+    spaces_env.close()
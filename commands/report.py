@@ -0,0 +1,101 @@
+"""
+Report command implementation.
+
+Rebuilds the evaluation tables of a model from its battle log, without
+playing any battle.
+"""
+
+import logging
+import numpy as np
+
+from environment.opponents import OPPONENT_NAMES
+from environment.teams import PAIRED_FORMAT_WARNING
+from utils.battle_log import get_battle_log_dir, load_battle_log
+from utils.evaluation_utils import EvaluationResults, paired_win_rate, wilson_interval
+from utils.types import RLModel, RLPlayer
+
+
+REPORT_COLUMNS = [
+    "run",
+    "opponent",
+    "battle",
+    "paired",
+    "won",
+    "reward",
+    "turns",
+    "wall_time",
+    "decisions_per_second",
+]
+
+
+def report_command(
+    model_type: RLModel = RLModel.PPO,
+    name: str | None = None,
+    run: str | None = None,
+    all_runs: bool = False,
+    confidence: float = 0.95,
+):
+    """
+    Compute the evaluation tables of a model from its battle log.
+
+    By default, only the latest evaluation run is reported. With ``run``, that
+    run is reported instead, and with ``all_runs`` the battles of every run are
+    pooled. Paired battles are reported apart from random battles, as they
+    are played in another format. The tables are printed and saved like those
+    of ``evaluate_command``.
+    """
+    logger = logging.getLogger("Evaluation")
+
+    battle_log_path = get_battle_log_dir(model_type, name)
+    try:
+        if run is None and not all_runs:
+            runs = load_battle_log(battle_log_path, columns=["run"])["run"]
+            run = runs.max()
+        battles = load_battle_log(battle_log_path, columns=REPORT_COLUMNS, run=run)
+    except FileNotFoundError as e:
+        logger.error(f"❌ {e}, evaluate the model first")
+        return
+    logger.info(
+        f"📊 Reporting {len(battles)} battles of "
+        f"{'every run' if run is None else f'run {run}'} from: {battle_log_path}"
+    )
+
+    results = EvaluationResults(model_type=model_type, name=name)
+    # Paired battles are played in another format, they are never pooled
+    # with random battles
+    mixed = battles["paired"].nunique() > 1
+    if battles["paired"].any():
+        logger.warning(f"⚠️ {PAIRED_FORMAT_WARNING}")
+    for (opponent, paired), group in battles.groupby(["opponent", "paired"], sort=False):
+        try:
+            opponent_name = OPPONENT_NAMES[RLPlayer(opponent)]
+        except (KeyError, ValueError):
+            opponent_name = opponent
+        if mixed and paired:
+            opponent_name = f"{opponent_name} (paired)"
+        wins = group["won"].to_numpy()
+        rewards = group["reward"].to_numpy(np.float64)
+        win_rate_ci = wilson_interval(int(wins.sum()), len(wins), confidence)
+        win_rate_se = None
+        # Pairs are only complete within a single paired run
+        if paired and group["run"].nunique() == 1 and len(wins) % 2 == 0:
+            _, win_rate_se, win_rate_ci = paired_win_rate(
+                group.sort_values("battle")["won"].tolist(), confidence
+            )
+        results.add_result(
+            opponent_name=opponent_name,
+            battles_won=int(wins.sum()),
+            total_battles=len(wins),
+            mean_reward=float(rewards.mean()),
+            std_reward=float(rewards.std()),
+            win_rate_ci=win_rate_ci,
+            win_rate_se=win_rate_se,
+        )
+        logger.info(
+            f"⏱️ {opponent_name}: {group['turns'].mean():.1f} turns and "
+            f"{group['wall_time'].mean():.2f}s per battle, "
+            f"{group['decisions_per_second'].mean():.1f} decisions/s"
+        )
+
+    results.print()
+    results.save()
@@ -0,0 +1,287 @@
+"""
+Round-robin tournament between every trained model, ranked by Elo.
+"""
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from poke_env import AccountConfiguration
+from poke_env.concurrency import POKE_LOOP
+from poke_env.player import Player
+from poke_env.ps_client.server_configuration import (
+    LocalhostServerConfiguration,
+    ServerConfiguration,
+)
+
+from environment.local_simulator import DEFAULT_SHOWDOWN_PATH, LocalShowdownSimulator
+from environment.opponents import ModelPlayer, create_opponent
+from environment.server import ShowdownServerPool
+from environment.vec_env import make_account_prefix
+from utils.evaluation_cache import PairingCache, file_hash
+from utils.evaluation_utils import bradley_terry_elo
+from utils.logging_config import configure_poke_env_logging, setup_logging
+from utils.model_utils import load_model
+from utils.output_utils import get_output_dir
+from utils.types import RLModel, RLPlayer, Simulator
+
+
+MODEL_SUFFIX = "_model.zip"
+
+
+def find_tournament_players(baselines: list[RLPlayer]) -> list[dict]:
+    """
+    List the heuristic players and every trained model under ``outputs/train``.
+
+    Returns:
+        list[dict]: Players with their display ``name`` and content
+            ``identity``, and either their ``baseline`` type or their
+            ``model_type`` and ``path``
+    """
+    players = [
+        {"name": baseline.value, "identity": f"baseline:{baseline.value}", "baseline": baseline.value}
+        for baseline in baselines
+    ]
+    for model_path in sorted(get_output_dir(task_type="train").glob(f"*/*{MODEL_SUFFIX}")):
+        try:
+            model_type = RLModel(model_path.parent.name)
+        except ValueError:
+            continue
+        players.append(
+            {
+                "name": f"{model_type.value}/{model_path.name[: -len(MODEL_SUFFIX)]}",
+                "identity": f"model:{file_hash(model_path)}",
+                "model_type": model_type.value,
+                "path": str(model_path),
+            }
+        )
+    return players
+
+
+def play_pairings(
+    pairings: list[tuple[int, dict, dict]],
+    num_battles: int,
+    account_prefix: str,
+    rank: int = 0,
+    server_configuration: ServerConfiguration = LocalhostServerConfiguration,
+    showdown_path: str | None = None,
+    concurrent_battles: int = 10,
+    concurrent_pairings: int = 4,
+    battle_format: str = "gen9randombattle",
+    batch_size: int = 1,
+    max_wait_ms: float = 5.0,
+) -> list[tuple[int, int, int, int]]:
+    """
+    Play a share of the tournament pairings.
+
+    This runs inside a pool worker. Up to ``concurrent_pairings`` pairings are
+    played at once, each with up to ``concurrent_battles`` battles at once.
+    Learned players group the decisions of up to ``batch_size`` of their
+    battles in one forward pass. Every model is loaded once per worker, and each finished pairing is
+    stored in the pairing cache, so an interrupted tournament resumes from
+    there.
+
+    Returns:
+        list[tuple[int, int, int, int]]: Index of each pairing, wins of both
+            players and battles played
+    """
+    configure_poke_env_logging()
+    local_simulator = LocalShowdownSimulator(showdown_path) if showdown_path else None
+    cache = PairingCache()
+    models = {}
+
+    def make_player(entry: dict, username: str) -> Player:
+        kwargs = dict(
+            account_configuration=AccountConfiguration(username, None),
+            battle_format=battle_format,
+            server_configuration=server_configuration,
+            max_concurrent_battles=concurrent_battles,
+            start_listening=local_simulator is None,
+        )
+        if "baseline" in entry:
+            return create_opponent(
+                RLPlayer(entry["baseline"]),
+                batch_size=batch_size,
+                max_wait_ms=max_wait_ms,
+                **kwargs,
+            )
+        if entry["path"] not in models:
+            models[entry["path"]] = load_model(RLModel(entry["model_type"]), entry["path"])
+        return ModelPlayer(
+            models[entry["path"]], batch_size=batch_size, max_wait_ms=max_wait_ms, **kwargs
+        )
+
+    semaphore = asyncio.Semaphore(concurrent_pairings)
+
+    async def play(index: int, entry_a: dict, entry_b: dict) -> tuple[int, int, int, int]:
+        async with semaphore:
+            player_a = make_player(entry_a, f"{account_prefix}{rank}x{index}a")
+            player_b = make_player(entry_b, f"{account_prefix}{rank}x{index}b")
+            if local_simulator is None:
+                await player_a.battle_against(player_b, n_battles=num_battles)
+                for player in (player_a, player_b):
+                    await player.ps_client.stop_listening()
+            else:
+                battles = asyncio.Semaphore(concurrent_battles)
+
+                async def battle():
+                    async with battles:
+                        await local_simulator.battle(player_a, player_b)
+
+                await asyncio.gather(*(battle() for _ in range(num_battles)))
+
+        result = (player_a.n_won_battles, player_b.n_won_battles, player_a.n_finished_battles)
+        cache.put(
+            entry_a["identity"], entry_b["identity"], battle_format, num_battles, *result
+        )
+        return (index, *result)
+
+    async def play_all():
+        return await asyncio.gather(*(play(*pairing) for pairing in pairings))
+
+    return asyncio.run_coroutine_threadsafe(play_all(), POKE_LOOP).result()
+
+
+def tournament_command(
+    initialize_func=None,
+    cleanup_func=None,
+    no_docker=False,
+    num_battles: int = 100,
+    workers: int = 1,
+    concurrent_battles: int = 10,
+    concurrent_pairings: int = 4,
+    baselines: list[RLPlayer] = [RLPlayer.RANDOM, RLPlayer.MAX],
+    servers: int = 1,
+    simulator: Simulator = Simulator.SERVER,
+    showdown_path: str = DEFAULT_SHOWDOWN_PATH,
+    use_cache: bool = True,
+    battle_format: str = "gen9randombattle",
+    batch_size: int = 1,
+    max_wait_ms: float = 5.0,
+):
+    """
+    Play every pair of trained models and baselines, and rank them by Elo.
+
+    The pairings are split across ``workers`` processes. With ``use_cache``,
+    pairings already played with the same model files, format and number of
+    battles are reused, so adding a model only plays its own pairings. The
+    ratings are the Bradley-Terry maximum likelihood fit of all the results.
+
+    With ``batch_size`` greater than one, each learned player evaluates the
+    decisions of its concurrent battles in batches, waiting at most
+    ``max_wait_ms`` for a batch to fill.
+    """
+    logger = logging.getLogger("Evaluation")
+
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+    try:
+        players = find_tournament_players(baselines)
+        cache = PairingCache()
+        pairings = list(itertools.combinations(range(len(players)), 2))
+        results = {}
+        to_play = []
+        for index, (i, j) in enumerate(pairings):
+            cached = (
+                cache.get(players[i]["identity"], players[j]["identity"], battle_format, num_battles)
+                if use_cache
+                else None
+            )
+            if cached is not None:
+                results[index] = cached
+            else:
+                to_play.append((index, players[i], players[j]))
+
+        # Initialize environment, only needed if some pairing must be played
+        server_pool = None
+        if to_play and simulator == Simulator.SERVER and initialize_func:
+            server = initialize_func(no_docker=no_docker, servers=servers)
+            if isinstance(server, ShowdownServerPool):
+                server_pool = server
+        else:
+            setup_logging()
+
+        if len(players) < 2:
+            logger.error("❌ A tournament needs at least two players, train some models first")
+            return
+        logger.info(
+            f"🏆 Tournament between {len(players)} players: {len(pairings)} pairings, "
+            f"{len(results)} reused from the cache, {len(to_play)} to play"
+        )
+
+        if to_play:
+            configure_poke_env_logging()
+            shares = [to_play[rank::workers] for rank in range(min(workers, len(to_play)))]
+            server_configurations = (
+                server_pool.acquire_many(len(shares))
+                if server_pool
+                else [LocalhostServerConfiguration] * len(shares)
+            )
+            account_prefix = make_account_prefix("tour")
+            logger.info(
+                f"⚔️ Playing {len(to_play)} pairings of {num_battles} battles with "
+                f"{len(shares)} worker(s)..."
+            )
+            with ProcessPoolExecutor(
+                max_workers=len(shares),
+                # poke-env runs its event loop in a background thread
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        play_pairings,
+                        share,
+                        num_battles,
+                        account_prefix,
+                        rank=rank,
+                        server_configuration=server_configurations[rank],
+                        showdown_path=showdown_path if simulator == Simulator.LOCAL else None,
+                        concurrent_battles=concurrent_battles,
+                        concurrent_pairings=concurrent_pairings,
+                        battle_format=battle_format,
+                        batch_size=batch_size,
+                        max_wait_ms=max_wait_ms,
+                    )
+                    for rank, share in enumerate(shares)
+                ]
+                for future in futures:
+                    for index, *result in future.result():
+                        results[index] = tuple(result)
+
+        # Scores count ties as half a win
+        n_players = len(players)
+        scores = np.zeros((n_players, n_players))
+        games = np.zeros((n_players, n_players))
+        for index, (wins_a, wins_b, battles) in results.items():
+            i, j = pairings[index]
+            ties = battles - wins_a - wins_b
+            scores[i, j] = wins_a + ties / 2
+            scores[j, i] = wins_b + ties / 2
+            games[i, j] = games[j, i] = battles
+        ratings = bradley_terry_elo(scores, games)
+
+        table = pd.DataFrame(
+            {
+                "Player": [player["name"] for player in players],
+                "Elo": ratings.round(1),
+                "Battles": games.sum(axis=1).astype(int),
+                "Score (%)": (100 * scores.sum(axis=1) / np.maximum(games.sum(axis=1), 1)).round(1),
+            }
+        ).sort_values("Elo", ascending=False)
+        table.insert(0, "Rank", range(1, n_players + 1))
+        print(table.to_string(index=False))
+        file_path = get_output_dir(task_type="evaluate") / "tournament.csv"
+        table.to_csv(file_path, index=False)
+        logger.info(f"✅ Tournament results saved to: {file_path}")
+
+    except KeyboardInterrupt:
+        logger.warning("🛑 Tournament interrupted by user, finished pairings are cached")
+    finally:
+        if cleanup_func and not no_docker:
+            cleanup_func()
@@ -4,15 +4,41 @@ Training command implementation.
 
 import logging
 import time
-from poke_env.player import RandomPlayer, MaxBasePowerPlayer
+from pathlib import Path
+from poke_env.ps_client.server_configuration import LocalhostServerConfiguration
 from stable_baselines3 import PPO, DQN
-from stable_baselines3.common.monitor import Monitor
 
-from environment.wrapper import PokeEnvSinglesWrapper, DQNPlayer
+from environment.league import LeagueSnapshotCallback, get_league_dir
+from environment.local_simulator import DEFAULT_SHOWDOWN_PATH, LocalShowdownSimulator
+from environment.self_play import make_self_play_env
+from environment.server import ShowdownServerPool
+from environment.vec_env import (
+    make_account_prefix,
+    make_training_env,
+    make_vec_training_env,
+)
 from utils.logging_config import configure_poke_env_logging
-from utils.types import RLModel, RLPlayer
+from utils.types import Backend, RLModel, RLPlayer, Simulator
 from utils.output_utils import get_output_dir
-from utils.plot_utils import plot_training_learning_curve
+from utils.checkpoint import (
+    AsyncCheckpointCallback,
+    clear_checkpoints,
+    load_latest_checkpoint,
+    set_rng_state,
+)
+from utils.episode_log import flush_episode_logs, prepare_episode_log, restore_episode_log
+from utils.model_utils import (
+    load_model,
+    load_pretrained_policy,
+    summarize_sample_efficiency,
+)
+from utils.plot_utils import LearningCurvePlotter, plot_training_learning_curve
+from utils.observation import get_observation_codec
+from utils.replay_buffer import (
+    CompressedReplayBuffer,
+    MemmapReplayBuffer,
+    resume_from_replay_buffer,
+)
 
 
 def train_command(
@@ -26,84 +52,144 @@ def train_command(
     opponent: RLPlayer = RLPlayer.RANDOM,
     total_timesteps: int = 100_000,
     name: str | None = None,
+    n_envs: int = 1,
+    servers: int = 1,
+    simulator: Simulator = Simulator.SERVER,
+    showdown_path: str = DEFAULT_SHOWDOWN_PATH,
+    self_play: bool = False,
+    league: bool = False,
+    league_freq: int = 10_000,
+    backend: Backend = Backend.SB3,
+    num_env_runners: int = 2,
+    envs_per_runner: int = 1,
+    num_learners: int = 0,
+    actors: int = 0,
+    disk_buffer: bool = False,
+    buffer_size: int = 1_000_000,
+    compress_buffer: bool = False,
+    checkpoint_freq: int = 10_000,
+    resume: bool = False,
+    pretrained: bool = False,
 ):
     """
     Train the model with the given name.
+
+    With ``n_envs`` greater than one, each wrapper/opponent pair runs in its own
+    subprocess. Every environment writes its episodes to the episode log of
+    the run, read by the summary and the learning curve.
+    With ``servers`` greater than one, the environments are spread across a
+    pool of Showdown servers. With the ``local`` simulator, battles are played
+    by ``simulate-battle`` processes of the Showdown checkout at
+    ``showdown_path`` and no server is started. With ``self_play``, both sides
+    of each of the ``n_envs`` battles are played by the learning policy and
+    both trajectories are used for training, instead of playing ``opponent``.
+    With ``league``, the policy is snapshotted every ``league_freq`` timesteps
+    into the league of the model type, and the opponents play those snapshots
+    alongside ``opponent``, sampled by their win rate against the learner.
+
+    With the ``rllib`` backend, rollouts are collected by ``num_env_runners``
+    processes of a local Ray cluster, each stepping ``envs_per_runner`` envs,
+    and ``num_learners`` processes update the policy. ``n_envs`` is then
+    ignored.
+
+    With ``actors`` greater than zero, DQN is trained asynchronously: that many
+    actor processes keep playing battles while this process learns from their
+    transitions, instead of the ``n_envs`` environments.
+
+    DQN keeps ``buffer_size`` transitions. With ``disk_buffer``, they are stored
+    in memmap files next to the model, which can be larger than the RAM and
+    are reused by the next run with the same name. With ``compress_buffer``,
+    observations are stored as uint8 codes, about 3 times less memory per
+    transition.
+
+    A checkpoint of the model, its optimizer, the random generators and the
+    episode log is written in the background every ``checkpoint_freq``
+    timesteps, 0 disabling them. With ``resume``, training continues from the
+    latest checkpoint of the run with the same name until ``total_timesteps``.
+
+    With ``pretrained``, the policy starts from the weights of the ``pretrain``
+    command for the run with the same name.
     """
     logger = logging.getLogger("Training")
 
+    if n_envs < 1:
+        raise ValueError(f"n_envs must be at least 1, got {n_envs}")
+    if league and self_play:
+        raise ValueError("League and self-play training cannot be combined")
+    if backend == Backend.RLLIB:
+        if league or self_play:
+            raise ValueError("League and self-play training require the sb3 backend")
+        n_envs = max(num_env_runners, 1) * envs_per_runner
+    if actors:
+        if model_type != RLModel.DQN:
+            raise ValueError(
+                f"Asynchronous actors only support DQN, got {model_type.value}: "
+                "on-policy algorithms cannot learn from stale rollouts"
+            )
+        if league or self_play or backend != Backend.SB3:
+            raise ValueError(
+                "Asynchronous actors cannot be combined with league, self-play "
+                "or the rllib backend"
+            )
+        n_envs = actors
+    if (disk_buffer or compress_buffer) and model_type != RLModel.DQN:
+        raise ValueError(f"Replay buffer options require DQN, got {model_type.value}")
+    if resume and (self_play or actors or backend != Backend.SB3):
+        raise ValueError(
+            "Resuming is not supported with self-play, asynchronous actors "
+            "or the rllib backend"
+        )
+    if pretrained and backend != Backend.SB3:
+        raise ValueError("Pretrained policies require the sb3 backend")
+
+    model = None
+    checkpoint_callback = None
+
     try:
         # Initialize environment
-        if initialize_func:
-            initialize_func(no_docker=no_docker)
+        local_simulator = None
+        if simulator == Simulator.LOCAL:
+            logger.info(f"🧪 Using the local simulator from: {showdown_path}")
+            local_simulator = LocalShowdownSimulator(showdown_path)
+            local_simulator.check()
+        elif initialize_func:
+            server = initialize_func(no_docker=no_docker, servers=servers) or server
 
         # Handle server restart if requested
         if restart_server and server is not None:
             logger.info("🔄 Restarting server as requested...")
             server.restart()
 
-        # Create training environment
-        logger.info("🎮 Setting up training environment...")
-        env = PokeEnvSinglesWrapper(
-            battle_format="gen9randombattle",
-            log_level=30,  # WARNING level to reduce verbosity
-            start_challenging=True,
-            strict=False,
-        )
-        if opponent == RLPlayer.RANDOM:
-            player = RandomPlayer(
-                battle_format="gen9randombattle",
-                log_level=30,  # WARNING level to reduce verbosity
-            )
-        elif opponent == RLPlayer.MAX:
-            player = MaxBasePowerPlayer(
-                battle_format="gen9randombattle",
-                log_level=30,  # WARNING level to reduce verbosity
-            )
-        elif opponent == RLPlayer.DQN_RANDOM:
-            # Check if DQN is trained
-            opponent_model_path = (
-                get_output_dir(task_type="train", model_type=RLModel.DQN)
-                / "random_model.zip"
-            )
-            if not opponent_model_path.exists():
-                raise FileNotFoundError(
-                    f"❌ DQN model not found at {opponent_model_path}. "
-                    "Please train the DQN model first."
-                )
-            player = DQNPlayer(model=DQN.load(opponent_model_path, device="cpu"))
-        elif opponent == RLPlayer.DQN_MAX:
-            # Check if DQN is trained
-            opponent_model_path = (
-                get_output_dir(task_type="train", model_type=RLModel.DQN)
-                / "max_model.zip"
-            )
-            if not opponent_model_path.exists():
-                raise FileNotFoundError(
-                    f"❌ DQN model not found at {opponent_model_path}. "
-                    "Please train the DQN model first."
-                )
-            player = DQNPlayer(model=DQN.load(opponent_model_path, device="cpu"))
-        else:
-            raise ValueError(f"Unsupported opponent type: {opponent}")
-        train_env = env.get_wrapped_env(opponent=player)
-
         # Set output dir
         output_dir = get_output_dir(task_type="train", model_type=model_type)
         model_path = output_dir / f"{name if name else model_type.value}_model.zip"
-        monitor_path = output_dir / f"{name if name else model_type.value}_monitor.csv"
-
-        # Monitor training
-        train_env = Monitor(
-            train_env,
-            filename=str(monitor_path),
-            allow_early_resets=True,
-            override_existing=True,
-        )
+        episode_log_dir = output_dir / f"{name if name else model_type.value}_episodes"
+        replay_path = output_dir / f"{name if name else model_type.value}_replay"
+        checkpoint_dir = output_dir / f"{name if name else model_type.value}_checkpoints"
+        pretrained_path = output_dir / f"{name if name else model_type.value}_pretrained.zip"
+        if pretrained:
+            logger.info(f"🎓 Starting from the pretrained policy: {pretrained_path}")
+        replay_kwargs = {}
+        if disk_buffer:
+            logger.info(f"💽 Storing the replay buffer in: {replay_path}")
+            replay_kwargs = dict(
+                replay_buffer_class=MemmapReplayBuffer,
+                replay_buffer_kwargs={"path": replay_path},
+            )
+            if compress_buffer:
+                replay_kwargs["replay_buffer_kwargs"]["codec"] = get_observation_codec()
+        elif compress_buffer:
+            replay_kwargs = dict(replay_buffer_class=CompressedReplayBuffer)
+        if compress_buffer:
+            logger.info("🗜️ Storing the replay buffer observations as uint8 codes")
 
-        # Configure PokeEnv logging to reduce noise
-        configure_poke_env_logging()
-        logger.info("🔇 Configured PokeEnv logging to reduce verbosity")
+        # Assign a server of the pool to each environment
+        server_configurations = [LocalhostServerConfiguration] * n_envs
+        if isinstance(server, ShowdownServerPool):
+            server_configurations = server.acquire_many(n_envs)
+            logger.info(
+                f"🖧 Spreading {n_envs} environment(s) across {len(server.ports)} servers"
+            )
 
         # Determine training duration based on mode
         if dev_mode:
@@ -112,10 +198,124 @@ def train_command(
         else:
             logger.info("🏭 Running in PRODUCTION mode (full training)")
 
+        if backend == Backend.RLLIB:
+            from commands.train_rllib import train_rllib
+
+            logger.info(f"🚀 Training model {model_type.value} with name {name} on RLlib")
+            train_rllib(
+                model_type=model_type,
+                opponent=opponent,
+                total_timesteps=total_timesteps,
+                checkpoint_dir=output_dir / f"{name if name else model_type.value}_rllib",
+                num_env_runners=num_env_runners,
+                envs_per_runner=envs_per_runner,
+                num_learners=num_learners,
+                server_configurations=server_configurations,
+                showdown_path=showdown_path if simulator == Simulator.LOCAL else None,
+            )
+            logger.info("✅ Training completed successfully")
+            return
+
+        if actors:
+            from commands.train_async import train_async_dqn
+
+            logger.info(
+                f"🚀 Training model {model_type.value} with name {name} "
+                f"asynchronously with {actors} actor(s)"
+            )
+            model = train_async_dqn(
+                total_timesteps=total_timesteps,
+                n_actors=actors,
+                episode_log_dir=episode_log_dir,
+                account_prefix=make_account_prefix(model_type.value),
+                opponent=opponent,
+                server_configurations=server_configurations,
+                showdown_path=showdown_path if simulator == Simulator.LOCAL else None,
+                buffer_size=buffer_size,
+                replay_kwargs=replay_kwargs,
+                pretrained_path=pretrained_path if pretrained else None,
+            )
+            model.save(model_path)
+            logger.info(f"💾 Model saved to: {model_path}")
+            report_training(
+                model_type,
+                episode_log_dir,
+                save_path=output_dir / f"{name if name else model_type.value}_learning_curve.png",
+            )
+            logger.info("✅ Training completed successfully")
+            return
+
+        checkpoint = None
+        if resume:
+            checkpoint = load_latest_checkpoint(
+                checkpoint_dir, prefix=name if name else model_type.value
+            )
+            if checkpoint is None:
+                logger.warning(f"⚠️ No checkpoint found in {checkpoint_dir}, starting from scratch")
+            else:
+                # Drop the episodes logged after the checkpoint
+                restore_episode_log(episode_log_dir, checkpoint[1]["episode_parts"])
+                logger.info(
+                    f"🔁 Resuming from checkpoint at "
+                    f"{checkpoint[1]['num_timesteps']} timesteps: {checkpoint[0]}"
+                )
+        if checkpoint is None:
+            # A new run must not resume from the checkpoints of a previous one
+            clear_checkpoints(checkpoint_dir, prefix=name if name else model_type.value)
+
+        # Episode times of a resumed run continue from its first start
+        t_start = prepare_episode_log(episode_log_dir, resume=checkpoint is not None)
+
+        # Create training environment
+        if self_play:
+            logger.info(
+                f"🪞 Setting up {n_envs} self-play battle(s), "
+                f"{2 * n_envs} environments for the learner..."
+            )
+            train_env = make_self_play_env(
+                n_envs=n_envs,
+                episode_log_dir=episode_log_dir,
+                account_prefix=make_account_prefix(model_type.value),
+                server_configurations=server_configurations,
+                local_simulator=local_simulator,
+                t_start=t_start,
+            )
+        elif n_envs > 1:
+            logger.info(f"🎮 Setting up {n_envs} parallel training environments...")
+            train_env = make_vec_training_env(
+                n_envs=n_envs,
+                opponent=opponent,
+                episode_log_dir=episode_log_dir,
+                account_prefix=make_account_prefix(model_type.value),
+                server_configurations=server_configurations,
+                local_simulator=local_simulator,
+                league_model=model_type if league else None,
+                t_start=t_start,
+            )
+        else:
+            logger.info("🎮 Setting up training environment...")
+            train_env = make_training_env(
+                rank=0,
+                opponent=opponent,
+                episode_log_dir=episode_log_dir,
+                server_configuration=server_configurations[0],
+                local_simulator=local_simulator,
+                league_model=model_type if league else None,
+                t_start=t_start,
+            )
+
+        # Configure PokeEnv logging to reduce noise
+        configure_poke_env_logging()
+        logger.info("🔇 Configured PokeEnv logging to reduce verbosity")
+
         logger.info(f"🚀 Training model {model_type.value} with name {name}")
 
-        model = None
-        if model_type == RLModel.PPO:
+        if checkpoint is not None:
+            model = load_model(model_type, checkpoint[0], env=train_env)
+            set_rng_state(checkpoint[1]["rng"])
+            if disk_buffer:
+                resume_from_replay_buffer(model)
+        elif model_type == RLModel.PPO:
             model = PPO(
                 "MlpPolicy",
                 train_env,
@@ -127,44 +327,115 @@ def train_command(
                 "MlpPolicy",
                 train_env,
                 verbose=0,
+                buffer_size=buffer_size,
+                **replay_kwargs,
+            )
+            if disk_buffer:
+                resume_from_replay_buffer(model)
+        elif model_type == RLModel.MASKABLE_PPO:
+            from sb3_contrib import MaskablePPO
+
+            # Illegal actions are masked out using the env action_masks()
+            model = MaskablePPO(
+                "MlpPolicy",
+                train_env,
+                verbose=0,
+                device="cpu",  # Force CPU usage
             )
         else:
             logger.error(f"❌ Unknown model type: {model_type}")
             raise ValueError(f"Unsupported model type: {model_type}")
 
+        if pretrained and checkpoint is None:
+            load_pretrained_policy(model, model_type, pretrained_path)
+
         if model:
+            callbacks = []
+            if league:
+                league_dir = get_league_dir(model_type)
+                logger.info(
+                    f"🏟️ League training against {opponent.value} and the snapshots "
+                    f"in {league_dir}, one every {league_freq} timesteps"
+                )
+                callbacks.append(
+                    LeagueSnapshotCallback(
+                        league_dir, league_freq, prefix=name if name else model_type.value
+                    )
+                )
+
+            if checkpoint_freq:
+                checkpoint_callback = AsyncCheckpointCallback(
+                    checkpoint_dir,
+                    checkpoint_freq,
+                    prefix=name if name else model_type.value,
+                    episode_log_dir=episode_log_dir,
+                    plotter=LearningCurvePlotter(model_type),
+                    learning_curve_path=output_dir
+                    / f"{name if name else model_type.value}_learning_curve.png",
+                )
+                logger.info(
+                    f"📸 Checkpointing every {checkpoint_freq} timesteps into: {checkpoint_dir}"
+                )
+                callbacks.append(checkpoint_callback)
+
             # Train the model
             time_start = time.time()
-            logger.info(f"⏳ Starting training for {total_timesteps} timesteps...")
-            model.learn(total_timesteps=total_timesteps, progress_bar=True)
+            start_timesteps = model.num_timesteps
+            remaining_timesteps = max(total_timesteps - start_timesteps, 0)
+            logger.info(f"⏳ Starting training for {remaining_timesteps} timesteps...")
+            model.learn(
+                total_timesteps=remaining_timesteps,
+                progress_bar=True,
+                callback=callbacks,
+                reset_num_timesteps=checkpoint is None,
+            )
             time_end = time.time()
             elapsed_time = time_end - time_start
             logger.info(f"⏱️ Training completed in {elapsed_time:.2f} seconds")
+            logger.info(
+                f"⚡ Throughput: {(model.num_timesteps - start_timesteps) / elapsed_time:.1f} steps/sec "
+                f"with {model.n_envs} environment(s)"
+            )
+
+            if disk_buffer:
+                model.replay_buffer.flush()
 
             # Save model
             model.save(model_path)
             logger.info(f"💾 Model saved to: {model_path}")
 
-            # Generate learning curve plot
-            try:
-                logger.info("📊 Generating learning curve plot...")
-                save_path = output_dir / f"{name if name else model_type.value}_learning_curve.png"
-                plot_training_learning_curve(
-                    model_type=model_type,
-                    monitor_path=monitor_path,
-                    save_path=save_path,
-                )
-                logger.info(f"📈 Learning curve plot saved to: {save_path}")
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to generate learning curve plot: {e}")
+            # Close the environment so every pending episode is written
+            train_env.close()
+
+            report_training(
+                model_type,
+                episode_log_dir,
+                save_path=output_dir / f"{name if name else model_type.value}_learning_curve.png",
+            )
 
-        # Close the environment
-        train_env.close()
-        env.close()
         logger.info("✅ Training completed successfully")
 
     except KeyboardInterrupt:
         logger.warning("🛑 Training interrupted by user")
+        if checkpoint_callback is not None:
+            # Let the queued checkpoint finish, so --resume can use it
+            checkpoint_callback.wait()
+        if isinstance(getattr(model, "replay_buffer", None), MemmapReplayBuffer):
+            model.replay_buffer.flush()
+            logger.info(f"💽 Replay buffer saved to: {model.replay_buffer.path}")
+        if model is not None and model.get_env() is not None:
+            # Write the buffered episodes, so the run so far can be reported
+            try:
+                flush_episode_logs(model.get_env())
+            except (EOFError, OSError):
+                # Workers interrupted too write their episodes as they exit
+                for process in getattr(model.get_env(), "processes", []):
+                    process.join(timeout=30)
+            report_training(
+                model_type,
+                episode_log_dir,
+                save_path=output_dir / f"{name if name else model_type.value}_learning_curve.png",
+            )
     except Exception as e:
         logger.error(f"❌ Training failed: {e}")
         raise
@@ -172,3 +443,42 @@ def train_command(
         # Clean up resources
         if cleanup_func and not no_docker:
             cleanup_func()
+
+
+def report_training(model_type: RLModel, episode_log_dir: Path, save_path: Path):
+    """
+    Log the sample efficiency of a finished training and plot its learning curve.
+
+    Args:
+        model_type: Type of the trained model
+        episode_log_dir: Episode log of the training
+        save_path: Path of the learning curve plot
+    """
+    logger = logging.getLogger("Training")
+
+    # Summarize how the environment steps were used
+    try:
+        summary = summarize_sample_efficiency(episode_log_dir)
+        invalid_rate = summary["invalid_action_rate"]
+        to_target = summary["timesteps_to_target"]
+        logger.info(
+            f"📐 Sample efficiency: {summary['episodes']} episodes in "
+            f"{summary['timesteps']} steps, invalid actions: "
+            f"{'n/a' if invalid_rate is None else f'{invalid_rate:.2%}'}, "
+            f"win rate (last 100 episodes): {summary['final_win_rate']:.2%}, "
+            f"steps to 50% win rate: {to_target if to_target is not None else 'not reached'}"
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to summarize sample efficiency: {e}")
+
+    # Generate learning curve plot
+    try:
+        logger.info("📊 Generating learning curve plot...")
+        plot_training_learning_curve(
+            model_type=model_type,
+            episode_log_dir=episode_log_dir,
+            save_path=save_path,
+        )
+        logger.info(f"📈 Learning curve plot saved to: {save_path}")
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to generate learning curve plot: {e}")
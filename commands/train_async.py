@@ -0,0 +1,259 @@
+"""
+Asynchronous actor-learner training of DQN.
+
+Actor processes keep playing battles with the latest published Q network and
+write their transitions into shared-memory rings. The learner, in the main
+process, moves them into the replay buffer, runs the gradient steps and
+publishes the new weights, so battles never wait for the updates.
+"""
+
+import logging
+import multiprocessing
+import random
+import time
+from pathlib import Path
+import numpy as np
+import torch
+from poke_env.player import RandomPlayer
+from poke_env.ps_client.server_configuration import ServerConfiguration
+from stable_baselines3 import DQN
+from stable_baselines3.common.logger import configure
+
+from environment.local_simulator import LocalShowdownSimulator
+from environment.vec_env import make_training_env
+from environment.wrapper import PokeEnvSinglesWrapper
+from utils.episode_log import prepare_episode_log
+from utils.model_utils import load_pretrained_policy
+from utils.replay_buffer import MemmapReplayBuffer, resume_from_replay_buffer
+from utils.shared_memory import SharedWeights, TransitionRing
+from utils.types import RLModel, RLPlayer
+
+
+def _make_dqn(env, **kwargs) -> DQN:
+    """DQN with the hyperparameters of the synchronous training."""
+    return DQN("MlpPolicy", env, verbose=0, device="cpu", **kwargs)
+
+
+def run_actor(
+    rank: int,
+    ring: TransitionRing,
+    weights: SharedWeights,
+    stop_event,
+    opponent: RLPlayer,
+    episode_log_dir: Path,
+    t_start: float,
+    account_prefix: str,
+    server_configuration: ServerConfiguration,
+    showdown_path: str | None,
+    seed: int,
+    battle_format: str,
+):
+    """
+    Play battles with epsilon-greedy actions until the stop event is set.
+
+    Runs in an actor process. The Q network is refreshed from the shared
+    weights before every action, which is a no-op until a new version is
+    published.
+    """
+    local_simulator = LocalShowdownSimulator(showdown_path) if showdown_path else None
+    env = make_training_env(
+        rank=rank,
+        opponent=opponent,
+        episode_log_dir=episode_log_dir,
+        battle_format=battle_format,
+        account_prefix=account_prefix,
+        server_configuration=server_configuration,
+        local_simulator=local_simulator,
+        t_start=t_start,
+    )
+    # Only used for its Q network, with the same architecture as the learner's
+    q_net = _make_dqn(env, buffer_size=1).q_net
+    q_net.set_training_mode(False)
+    version = 0
+    rng = random.Random(seed)
+    env.action_space.seed(seed)
+
+    try:
+        obs, _ = env.reset(seed=seed)
+        while not stop_event.is_set():
+            version = weights.pull(q_net, version)
+            if rng.random() < weights.exploration_rate:
+                action = env.action_space.sample()
+            else:
+                with torch.no_grad():
+                    q_values = q_net(torch.as_tensor(obs).reshape(1, -1))
+                action = int(q_values.argmax())
+
+            next_obs, reward, terminated, truncated, _ = env.step(np.int64(action))
+            done = terminated or truncated
+            ring.push(obs, action, reward, next_obs, done, truncated and not terminated)
+            if done:
+                next_obs, _ = env.reset()
+            obs = next_obs
+    finally:
+        # Write the pending episodes of this actor
+        env.close()
+
+
+def train_async_dqn(
+    total_timesteps: int,
+    n_actors: int,
+    episode_log_dir: Path,
+    account_prefix: str,
+    opponent: RLPlayer,
+    server_configurations: list[ServerConfiguration],
+    showdown_path: str | None = None,
+    ring_capacity: int = 10_000,
+    battle_format: str = "gen9randombattle",
+    buffer_size: int = 1_000_000,
+    replay_kwargs: dict | None = None,
+    pretrained_path: Path | None = None,
+) -> DQN:
+    """
+    Train DQN with ``n_actors`` actor processes and a learner.
+
+    The learner keeps the replay ratio of the synchronous training, one
+    gradient step every ``train_freq`` collected transitions, and publishes
+    the weights after each batch of updates.
+
+    Args:
+        total_timesteps: Transitions to collect before stopping
+        n_actors: Number of actor processes
+        episode_log_dir: Episode log shared by the actors
+        account_prefix: Run-unique prefix for the account names
+        opponent: Opponent player type
+        server_configurations: Server of each actor
+        showdown_path: If given, battles run in the local simulator of this
+            Showdown checkout
+        ring_capacity: Transitions held by the ring of each actor
+        battle_format: Battle format to play
+        buffer_size: Transitions kept by the replay buffer
+        replay_kwargs: Replay buffer class and arguments of the DQN model
+        pretrained_path: If given, pretrained DQN whose weights initialize
+            the Q network
+
+    Returns:
+        DQN: The trained model
+    """
+    logger = logging.getLogger("Training")
+    t_start = prepare_episode_log(episode_log_dir)
+
+    # The learner only needs the spaces of the env, it never connects
+    spaces_env = PokeEnvSinglesWrapper(
+        battle_format=battle_format,
+        start_listening=False,
+        start_challenging=False,
+        strict=False,
+        log_level=30,
+    )
+    model = _make_dqn(
+        spaces_env.get_wrapped_env(RandomPlayer(start_listening=False)),
+        buffer_size=buffer_size,
+        **(replay_kwargs or {}),
+    )
+    model.set_logger(configure(folder=None, format_strings=[]))
+    if pretrained_path is not None:
+        load_pretrained_policy(model, RLModel.DQN, pretrained_path)
+    if isinstance(model.replay_buffer, MemmapReplayBuffer):
+        resume_from_replay_buffer(model)
+    model._total_timesteps = total_timesteps
+
+    # poke-env runs its event loop in a background thread, so the actors must
+    # not be forked from this process
+    ctx = multiprocessing.get_context("spawn")
+    obs_dim = model.observation_space.shape[0]
+    rings = [TransitionRing(ctx, ring_capacity, obs_dim) for _ in range(n_actors)]
+    weights = SharedWeights(ctx, sum(p.numel() for p in model.q_net.parameters()))
+    weights.publish(model.q_net, model.exploration_rate)
+    stop_event = ctx.Event()
+    actors = [
+        ctx.Process(
+            target=run_actor,
+            kwargs=dict(
+                rank=rank,
+                ring=rings[rank],
+                weights=weights,
+                stop_event=stop_event,
+                opponent=opponent,
+                episode_log_dir=episode_log_dir,
+                t_start=t_start,
+                account_prefix=account_prefix,
+                server_configuration=server_configurations[rank],
+                showdown_path=showdown_path,
+                seed=rank,
+                battle_format=battle_format,
+            ),
+            daemon=True,
+        )
+        for rank in range(n_actors)
+    ]
+    for actor in actors:
+        actor.start()
+
+    train_freq = model.train_freq.frequency
+    untrained_steps = 0
+    gradient_steps = 0
+    time_start = time.time()
+    try:
+        while model.num_timesteps < total_timesteps:
+            collected = 0
+            for ring in rings:
+                batch = ring.pop_all()
+                if batch is None:
+                    continue
+                for obs, next_obs, action, reward, done, truncated in zip(*batch):
+                    model.replay_buffer.add(
+                        obs[None],
+                        next_obs[None],
+                        np.array([action]),
+                        np.array([reward]),
+                        np.array([done]),
+                        [{"TimeLimit.truncated": truncated}],
+                    )
+                    model.num_timesteps += 1
+                    model._update_current_progress_remaining(
+                        model.num_timesteps, total_timesteps
+                    )
+                    # Target network updates and exploration schedule
+                    model._on_step()
+                collected += len(batch[0])
+
+            if not collected:
+                if not any(actor.is_alive() for actor in actors):
+                    raise RuntimeError("All the actor processes have stopped")
+                time.sleep(0.001)
+                continue
+
+            untrained_steps += collected
+            if model.num_timesteps > model.learning_starts:
+                steps = untrained_steps // train_freq
+                if steps:
+                    model.train(gradient_steps=steps, batch_size=model.batch_size)
+                    gradient_steps += steps
+                    untrained_steps -= steps * train_freq
+            else:
+                untrained_steps = 0
+            weights.publish(model.q_net, model.exploration_rate)
+    finally:
+        stop_event.set()
+        for actor in actors:
+            actor.join(timeout=30)
+            if actor.is_alive():
+                actor.terminate()
+        spaces_env.close()
+        # Also saved when interrupted, so the next run resumes with it
+        if isinstance(model.replay_buffer, MemmapReplayBuffer):
+            model.replay_buffer.flush()
+            logger.info(f"💽 Replay buffer saved to: {model.replay_buffer.path}")
+
+    elapsed_time = time.time() - time_start
+    logger.info(f"⏱️ Training completed in {elapsed_time:.2f} seconds")
+    logger.info(
+        f"⚡ Throughput: {model.num_timesteps / elapsed_time:.1f} steps/sec "
+        f"with {n_actors} actor(s), {gradient_steps} gradient steps"
+    )
+    logger.info(
+        f"📮 Published {weights.version} weight versions, "
+        f"{sum(ring.dropped for ring in rings)} transitions dropped by full rings"
+    )
+    return model
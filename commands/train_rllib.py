@@ -0,0 +1,133 @@
+"""
+Training with the RLlib backend on a local Ray cluster.
+"""
+
+import logging
+import time
+from pathlib import Path
+from poke_env.ps_client.server_configuration import ServerConfiguration
+
+from environment.rllib_env import RLLIB_ENV_NAME, create_rllib_env
+from environment.vec_env import make_account_prefix
+from utils.types import RLModel, RLPlayer
+
+
+def train_rllib(
+    model_type: RLModel,
+    opponent: RLPlayer,
+    total_timesteps: int,
+    checkpoint_dir: Path,
+    num_env_runners: int = 2,
+    envs_per_runner: int = 1,
+    num_learners: int = 0,
+    server_configurations: list[ServerConfiguration] | None = None,
+    showdown_path: str | None = None,
+    battle_format: str = "gen9randombattle",
+) -> float:
+    """
+    Train a policy with RLlib, collecting rollouts in parallel env runners.
+
+    Ray is imported lazily so the SB3 backend does not require it. The policy
+    is RLlib's default MLP with the same two hidden layers of 64 units as the
+    SB3 ``MlpPolicy``.
+
+    Args:
+        model_type: Algorithm to train, PPO or DQN
+        opponent: Opponent player type
+        total_timesteps: Environment steps to sample before stopping
+        checkpoint_dir: Directory receiving the final RLlib checkpoint
+        num_env_runners: Env runner processes. 0 samples in the driver
+        envs_per_runner: Envs stepped by each env runner
+        num_learners: Learner processes. 0 learns in the driver
+        server_configurations: Servers the envs are spread across, defaults
+            to the local server
+        showdown_path: If given, battles run in the local simulator of this
+            Showdown checkout
+        battle_format: Battle format to play
+
+    Returns:
+        float: Sampled environment steps per second
+
+    Raises:
+        ImportError: If Ray is not installed
+        ValueError: If the model type is not supported by this backend
+    """
+    logger = logging.getLogger("Training")
+    try:
+        import ray
+        from ray.rllib.algorithms import DQNConfig, PPOConfig
+        from ray.rllib.utils.metrics import (
+            ENV_RUNNER_RESULTS,
+            EPISODE_RETURN_MEAN,
+            NUM_ENV_STEPS_SAMPLED_LIFETIME,
+        )
+        from ray.tune.registry import register_env
+    except ImportError as e:
+        raise ImportError(
+            "The rllib backend requires Ray, install it with: pip install 'ray[rllib]'"
+        ) from e
+
+    if model_type == RLModel.PPO:
+        config = PPOConfig()
+    elif model_type == RLModel.DQN:
+        config = DQNConfig()
+    else:
+        raise ValueError(f"Model type {model_type.value} is not supported by the rllib backend")
+
+    n_envs = max(num_env_runners, 1) * envs_per_runner
+    logger.info(
+        f"☀️ Starting a local Ray cluster with {num_env_runners} env runner(s), "
+        f"{envs_per_runner} env(s) per runner and {num_learners} learner(s)"
+    )
+    ray.init(address="local", include_dashboard=False, log_to_driver=False)
+    algo = None
+    try:
+        register_env(RLLIB_ENV_NAME, create_rllib_env)
+        config = (
+            config.environment(
+                RLLIB_ENV_NAME,
+                env_config={
+                    "account_prefix": make_account_prefix(model_type.value),
+                    "opponent": opponent.value,
+                    "battle_format": battle_format,
+                    "envs_per_runner": envs_per_runner,
+                    "server_configurations": server_configurations,
+                    "showdown_path": showdown_path,
+                },
+                disable_env_checking=True,
+            )
+            .framework("torch")
+            .env_runners(
+                num_env_runners=num_env_runners,
+                num_envs_per_env_runner=envs_per_runner,
+            )
+            .learners(num_learners=num_learners)
+            .rl_module(model_config={"fcnet_hiddens": [64, 64]})
+        )
+        algo = config.build_algo()
+
+        timesteps = 0
+        time_start = time.time()
+        logger.info(f"⏳ Starting training for {total_timesteps} timesteps...")
+        while timesteps < total_timesteps:
+            result = algo.train()
+            env_runner_results = result[ENV_RUNNER_RESULTS]
+            timesteps = env_runner_results[NUM_ENV_STEPS_SAMPLED_LIFETIME]
+            logger.info(
+                f"🔁 Iteration {result['training_iteration']}: {timesteps} timesteps, "
+                f"mean return {env_runner_results.get(EPISODE_RETURN_MEAN, float('nan')):.2f}"
+            )
+        elapsed_time = time.time() - time_start
+        throughput = timesteps / elapsed_time
+        logger.info(f"⏱️ Training completed in {elapsed_time:.2f} seconds")
+        logger.info(
+            f"⚡ Throughput: {throughput:.1f} steps/sec with {n_envs} environment(s)"
+        )
+
+        algo.save(str(checkpoint_dir.resolve()))
+        logger.info(f"💾 Checkpoint saved to: {checkpoint_dir}")
+        return throughput
+    finally:
+        if algo is not None:
+            algo.stop()
+        ray.shutdown()
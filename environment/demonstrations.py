@@ -0,0 +1,165 @@
+"""
+Datasets of (observation, action) pairs recorded from heuristic players.
+"""
+
+import json
+import os
+from pathlib import Path
+import numpy as np
+from poke_env.environment import AbstractBattle
+from poke_env.player import BattleOrder, Player
+
+from utils.model import simple_order_to_action
+from utils.observation import ObservationBuilder, ObservationCodec, get_observation_codec
+from utils.output_utils import get_output_dir
+
+
+def get_demonstrations_dir(dataset: str) -> Path:
+    """Get the directory of a demonstrations dataset, creating it if needed."""
+    path = get_output_dir(task_type="demonstrations") / dataset
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class DemonstrationWriter:
+    """
+    Write demonstrations into chunks of ``chunk_size`` pairs.
+
+    Each chunk is an ``.npz`` file with the observations, stored as uint8 codes
+    of the codec, and the actions. A ``metadata.json`` file records the codec
+    tables, so a dataset is only extended by writers using the same codec.
+    Chunks are written under a temporary name and renamed once complete, and
+    several writers can share a directory as long as their prefixes differ.
+    """
+
+    METADATA_FILE = "metadata.json"
+
+    def __init__(
+        self,
+        path: str | Path,
+        prefix: str,
+        chunk_size: int = 10_000,
+        codec: ObservationCodec | None = None,
+    ):
+        """
+        Args:
+            path: Directory of the dataset
+            prefix: Prefix of the chunk files of this writer
+            chunk_size: Pairs per chunk
+            codec: Codec of the observations, defaults to the one of the env
+                observations
+
+        Raises:
+            ValueError: If the dataset at ``path`` uses another codec
+        """
+        self.path = Path(path)
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.codec = codec if codec is not None else get_observation_codec()
+        self.transitions = 0
+        self._observations: list[np.ndarray] = []
+        self._actions: list[int] = []
+        self._chunks = 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        metadata_path = self.path / self.METADATA_FILE
+        metadata = {"codec": self.codec.to_json()}
+        if metadata_path.exists():
+            with open(metadata_path) as f:
+                if json.load(f) != metadata:
+                    raise ValueError(
+                        f"The dataset at {self.path} uses another codec, "
+                        "record it under another name"
+                    )
+        else:
+            tmp_path = self.path / f"{self.METADATA_FILE}.{prefix}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(metadata, f)
+            os.replace(tmp_path, metadata_path)
+
+    def add(self, obs: np.ndarray, action: int):
+        """Add a pair, writing a chunk once ``chunk_size`` pairs are pending."""
+        self._observations.append(self.codec.encode(obs))
+        self._actions.append(action)
+        self.transitions += 1
+        if len(self._actions) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write the pending pairs as a chunk."""
+        if not self._actions:
+            return
+        chunk_path = self.path / f"{self.prefix}_{self._chunks:05d}.npz"
+        tmp_path = chunk_path.with_name(f"tmp_{chunk_path.name}")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                observations=np.stack(self._observations),
+                actions=np.array(self._actions, dtype=np.uint8),
+            )
+        os.replace(tmp_path, chunk_path)
+        self._chunks += 1
+        self._observations, self._actions = [], []
+
+
+def load_demonstrations(path: str | Path) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Load every chunk of a dataset.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Decoded float32 observations and int64
+            actions
+
+    Raises:
+        FileNotFoundError: If the dataset has no chunk
+    """
+    path = Path(path)
+    chunks = sorted(p for p in path.glob("*.npz") if not p.name.startswith("tmp_"))
+    if not chunks:
+        raise FileNotFoundError(f"No demonstrations found in {path}")
+    with open(path / DemonstrationWriter.METADATA_FILE) as f:
+        codec = ObservationCodec(json.load(f)["codec"])
+
+    codes, actions = [], []
+    for chunk in chunks:
+        with np.load(chunk) as data:
+            codes.append(data["observations"])
+            actions.append(data["actions"])
+    return codec.decode(np.concatenate(codes)), np.concatenate(actions).astype(np.int64)
+
+
+class RecordingPlayer(Player):
+    """
+    Player making the decisions of a teacher player and recording them.
+
+    Each decision is written as the env observation of the battle and the env
+    action of the order, as given by ``simple_order_to_action``. Orders that
+    have no action, such as the default order, are played but not recorded.
+    """
+
+    def __init__(self, teacher: Player, writer: DemonstrationWriter, **kwargs):
+        """
+        Args:
+            teacher: Player whose ``choose_move`` picks the orders, it does not
+                need to be connected
+            writer: Writer of the recorded pairs
+        """
+        kwargs.setdefault("log_level", 30)
+        super().__init__(**kwargs)
+        self.teacher = teacher
+        self.writer = writer
+        self.observation_builder = ObservationBuilder()
+        self.skipped = 0
+
+    def choose_move(self, battle: AbstractBattle) -> BattleOrder:
+        order = self.teacher.choose_move(battle)
+        try:
+            action = int(simple_order_to_action(order, battle, strict=False))
+        except ValueError:
+            # Orders that do not match the known moves of the active pokémon
+            action = -1
+        if action >= 0:
+            self.writer.add(self.observation_builder.build(battle), action)
+        else:
+            self.skipped += 1
+        return order
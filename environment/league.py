@@ -0,0 +1,247 @@
+"""
+League training: snapshots of the learning policy played as opponents.
+"""
+
+import logging
+import os
+import random
+from collections import OrderedDict
+from pathlib import Path
+from poke_env import AccountConfiguration
+from poke_env.environment import AbstractBattle
+from poke_env.player import Player
+from stable_baselines3.common.base_class import BaseAlgorithm
+from stable_baselines3.common.callbacks import BaseCallback
+
+from environment.opponents import create_opponent, order_from_model
+from utils.model_utils import load_model
+from utils.output_utils import get_output_dir
+from utils.types import RLModel, RLPlayer
+
+
+# Pool member standing for the heuristic opponent given to the league
+BASE_OPPONENT = "base"
+
+
+def get_league_dir(model_type: RLModel) -> Path:
+    """
+    Get the directory holding the policy snapshots of a model type.
+
+    Returns:
+        Path: ``outputs/train/<model>/league``, created if needed
+    """
+    league_dir = get_output_dir(task_type="train", model_type=model_type) / "league"
+    league_dir.mkdir(parents=True, exist_ok=True)
+    return league_dir
+
+
+class LeagueSnapshotCallback(BaseCallback):
+    """
+    Save the learning policy into the league every ``snapshot_freq`` timesteps.
+
+    Snapshots are written under a temporary name and renamed once complete, so
+    opponents scanning the league never load a partial file.
+    """
+
+    def __init__(self, league_dir: str | Path, snapshot_freq: int, prefix: str):
+        super().__init__()
+        if snapshot_freq < 1:
+            raise ValueError(f"snapshot_freq must be at least 1, got {snapshot_freq}")
+        self.league_dir = Path(league_dir)
+        self.snapshot_freq = snapshot_freq
+        self.prefix = prefix
+        self._last_snapshot = 0
+
+    def _on_step(self) -> bool:
+        if self.num_timesteps - self._last_snapshot >= self.snapshot_freq:
+            self._last_snapshot = self.num_timesteps
+            self.save_snapshot()
+        return True
+
+    def save_snapshot(self) -> Path:
+        """Save the current policy and return the snapshot path."""
+        path = self.league_dir / f"{self.prefix}_{self.num_timesteps}_steps.zip"
+        tmp_path = self.league_dir / f"tmp_{self.prefix}.zip"
+        self.model.save(tmp_path)
+        os.replace(tmp_path, path)
+        logging.getLogger("Training").info(f"🏟️ League snapshot saved to: {path}")
+        return path
+
+
+class ModelCache:
+    """Least recently used cache of the loaded snapshot models."""
+
+    def __init__(self, model_type: RLModel, max_size: int = 4):
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1, got {max_size}")
+        self.model_type = model_type
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._models: OrderedDict[Path, BaseAlgorithm] = OrderedDict()
+
+    def get(self, path: Path) -> BaseAlgorithm:
+        """Get the model of a snapshot, loading it on a cache miss."""
+        model = self._models.get(path)
+        if model is not None:
+            self.hits += 1
+            self._models.move_to_end(path)
+            return model
+
+        self.misses += 1
+        model = load_model(self.model_type, path)
+        self._models[path] = model
+        if len(self._models) > self.max_size:
+            self._models.popitem(last=False)
+        return model
+
+
+class LeaguePool:
+    """
+    Members of the league and their results against the learner.
+
+    Members are sampled with a weight equal to their smoothed win rate against
+    the learner, ``(wins + 1) / (games + 2)``, so new snapshots start at 0.5 and
+    the opponents the learner still loses to are played more often.
+    """
+
+    def __init__(self, league_dir: str | Path, seed: int | None = None):
+        self.league_dir = Path(league_dir)
+        self.members: list[Path | str] = [BASE_OPPONENT]
+        self.wins: dict[Path | str, int] = {BASE_OPPONENT: 0}
+        self.games: dict[Path | str, int] = {BASE_OPPONENT: 0}
+        self._rng = random.Random(seed)
+
+    def refresh(self):
+        """Add the snapshots saved since the last refresh."""
+        for path in sorted(self.league_dir.glob("*_steps.zip")):
+            if path not in self.wins:
+                self.members.append(path)
+                self.wins[path] = 0
+                self.games[path] = 0
+
+    def remove(self, member: Path | str):
+        """Drop a member, e.g. a snapshot deleted from the league."""
+        if member != BASE_OPPONENT and member in self.wins:
+            self.members.remove(member)
+            del self.wins[member]
+            del self.games[member]
+
+    def win_rate(self, member: Path | str) -> float:
+        """Smoothed win rate of a member against the learner."""
+        return (self.wins[member] + 1) / (self.games[member] + 2)
+
+    def sample(self) -> Path | str:
+        """Pick the opponent of the next battle."""
+        weights = [self.win_rate(member) for member in self.members]
+        return self._rng.choices(self.members, weights=weights)[0]
+
+    def record(self, member: Path | str, won: bool):
+        """Record the result of a battle played by a member."""
+        if member not in self.wins:
+            return
+        self.games[member] += 1
+        self.wins[member] += int(won)
+
+
+class LeagueOpponent(Player):
+    """
+    Opponent playing each battle as a member of the league.
+
+    A member is sampled when a battle starts and plays the whole battle. The
+    snapshots act like the learner in the env: a masked argmax of their Q
+    values or action logits over the env action space. The base member plays
+    with the heuristic opponent. Results are recorded once battles finish,
+    from the opponent's own battle object, so this also works when the env
+    drives the opponent through ``choose_move`` only.
+    """
+
+    def __init__(
+        self,
+        league_dir: str | Path,
+        model_type: RLModel,
+        base: Player,
+        cache_size: int = 4,
+        seed: int | None = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            league_dir: Directory of the snapshots
+            model_type: Model type of the snapshots
+            base: Heuristic opponent kept in the league
+            cache_size: Maximum number of snapshot models kept loaded
+            seed: Seed of the member sampling
+        """
+        kwargs.setdefault("log_level", 30)
+        super().__init__(**kwargs)
+        self.pool = LeaguePool(league_dir, seed=seed)
+        self.cache = ModelCache(model_type, max_size=cache_size)
+        self.base = base
+        self._battles: dict[str, tuple[AbstractBattle, Path | str]] = {}
+
+    def choose_move(self, battle: AbstractBattle):
+        member = self._member_of(battle)
+        if member == BASE_OPPONENT:
+            return self.base.choose_move(battle)
+        try:
+            model = self.cache.get(member)
+        except FileNotFoundError:
+            self.pool.remove(member)
+            self._battles[battle.battle_tag] = (battle, BASE_OPPONENT)
+            return self.base.choose_move(battle)
+        return order_from_model(model, battle)
+
+    def _member_of(self, battle: AbstractBattle) -> Path | str:
+        """Get the member playing a battle, sampling one for new battles."""
+        assigned = self._battles.get(battle.battle_tag)
+        if assigned is not None and assigned[0] is battle:
+            return assigned[1]
+
+        self._record_finished()
+        self.pool.refresh()
+        member = self.pool.sample()
+        self._battles[battle.battle_tag] = (battle, member)
+        return member
+
+    def _record_finished(self):
+        """Record the results of the finished battles."""
+        for tag, (battle, member) in list(self._battles.items()):
+            if battle.finished:
+                self.pool.record(member, bool(battle.won))
+                del self._battles[tag]
+
+
+def create_league_opponent(
+    model_type: RLModel,
+    base: RLPlayer,
+    battle_format: str = "gen9randombattle",
+    account_configuration: AccountConfiguration | None = None,
+    start_listening: bool = True,
+    cache_size: int = 4,
+) -> LeagueOpponent:
+    """
+    Create a league opponent over the snapshots of a model type.
+
+    Args:
+        model_type: Model type being trained, whose league is played
+        base: Heuristic opponent kept in the league
+        battle_format: Battle format played by the opponent
+        account_configuration: Optional account of the opponent
+        start_listening: Whether to connect to the server
+        cache_size: Maximum number of snapshot models kept loaded
+
+    Returns:
+        LeagueOpponent: The league opponent
+    """
+    return LeagueOpponent(
+        league_dir=get_league_dir(model_type),
+        model_type=model_type,
+        base=create_opponent(
+            base, battle_format=battle_format, start_listening=False
+        ),
+        cache_size=cache_size,
+        battle_format=battle_format,
+        account_configuration=account_configuration,
+        start_listening=start_listening,
+    )
@@ -0,0 +1,217 @@
+"""
+Battle backend running Showdown's simulator in a local Node subprocess.
+
+Instead of logging in to a server and exchanging messages through a websocket,
+each battle is played by a ``pokemon-showdown simulate-battle`` process. Its
+stdout protocol is split per side, the same way the server does it, and fed to
+the poke-env players, while their choices are written back to its stdin.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import shutil
+from pathlib import Path
+from poke_env.player import Player
+
+
+# Default location of the Showdown checkout, the same as in the Docker image
+DEFAULT_SHOWDOWN_PATH = os.environ.get(
+    "POKEMON_SHOWDOWN_PATH", "/usr/src/app/pokemon-showdown"
+)
+
+
+def split_update(lines: list[str], side: str) -> list[str]:
+    """
+    Keep the lines of a simulator update that a side is allowed to see.
+
+    ``|split|<side>`` is followed by a secret line for that side and a public
+    line for everybody else.
+    """
+    visible = []
+    i = 0
+    while i < len(lines):
+        if lines[i].startswith("|split|"):
+            owner = lines[i].split("|")[2]
+            secret, public = lines[i + 1], lines[i + 2]
+            line = secret if owner == side else public
+            if line:
+                visible.append(line)
+            i += 3
+        else:
+            visible.append(lines[i])
+            i += 1
+    return visible
+
+
+def to_simulator_command(side: str, message: str) -> str | None:
+    """
+    Translate a message sent by a poke-env player to a simulator command.
+
+    Returns:
+        str | None: The stdin line, or None for messages without effect on
+            the battle (timer, chat...)
+    """
+    if message.startswith("/choose "):
+        return f">{side} {message[len('/choose '):]}"
+    elif message.startswith("/team "):
+        return f">{side} team {message[len('/team '):]}"
+    elif message == "/forfeit":
+        return f">forcelose {side}"
+    return None
+
+
+class _LocalBattle:
+    """A battle running in one simulator process."""
+
+    def __init__(self, process: asyncio.subprocess.Process, battle_tag: str):
+        self.process = process
+        self.battle_tag = battle_tag
+        self._write_lock = asyncio.Lock()
+
+    async def write(self, line: str):
+        if self.process.stdin is None or self.process.stdin.is_closing():
+            return
+        async with self._write_lock:
+            self.process.stdin.write(f"{line}\n".encode())
+            await self.process.stdin.drain()
+
+
+class LocalShowdownSimulator:
+    """
+    Play battles between two poke-env players without a Showdown server.
+
+    The simulator only keeps the path of the Showdown checkout, so it can be
+    handed to subprocess envs. Battles must run in poke-env's event loop.
+    """
+
+    _battle_ids = itertools.count(1)
+
+    def __init__(
+        self, showdown_path: str | Path = DEFAULT_SHOWDOWN_PATH, node: str = "node"
+    ):
+        self.showdown_path = Path(showdown_path)
+        self.node = node
+
+    def check(self):
+        """
+        Check that Node and the Showdown checkout are available.
+
+        Raises:
+            FileNotFoundError: If Node or the ``pokemon-showdown`` script is missing
+        """
+        if shutil.which(self.node) is None:
+            raise FileNotFoundError(f"Node executable not found: {self.node}")
+        if not (self.showdown_path / "pokemon-showdown").exists():
+            raise FileNotFoundError(
+                f"Pokemon Showdown not found in {self.showdown_path}. "
+                "Clone it and set POKEMON_SHOWDOWN_PATH or --showdown-path."
+            )
+
+    def _attach(self, player: Player, rooms: dict):
+        """Route the messages sent by a player to its local battles."""
+        client = player.ps_client
+        client._local_rooms = rooms
+
+        async def send_message(message: str, room: str = "", message_2=None):
+            if room not in client._local_rooms:
+                return
+            battle, side = client._local_rooms[room]
+            command = to_simulator_command(side, message)
+            if command is not None:
+                await battle.write(command)
+
+        client.send_message = send_message
+
+    @staticmethod
+    def _deliver(player: Player, battle_tag: str, lines: list[str]):
+        """Hand simulator lines to a player, like a websocket message."""
+        if not lines:
+            return
+        message = "\n".join([f">{battle_tag}"] + lines)
+        client = player.ps_client
+        task = asyncio.create_task(client._handle_message(message))
+        client._active_tasks.add(task)
+        task.add_done_callback(client._active_tasks.discard)
+
+    async def battle(
+        self,
+        player1: Player,
+        player2: Player,
+        seed: list[int] | str | None = None,
+    ):
+        """
+        Play one battle between two players and wait until it is over.
+
+        Args:
+            player1: Player on the p1 side, its format is used for the battle
+            player2: Player on the p2 side
+            seed: Optional simulator seed, making team generation and battle
+                randomness reproducible
+        """
+        battle_format = player1.format
+        battle_tag = f"battle-{battle_format}-{next(self._battle_ids)}"
+        process = await asyncio.create_subprocess_exec(
+            self.node,
+            str(self.showdown_path / "pokemon-showdown"),
+            "simulate-battle",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=2**22,  # Requests are single JSON lines
+        )
+        battle = _LocalBattle(process, battle_tag)
+        sides = {"p1": player1, "p2": player2}
+
+        try:
+            for side, player in sides.items():
+                rooms = getattr(player.ps_client, "_local_rooms", None)
+                if rooms is None:
+                    rooms = {}
+                    self._attach(player, rooms)
+                rooms[battle_tag] = (battle, side)
+                self._deliver(player, battle_tag, ["|init|battle"])
+
+            start = {"formatid": battle_format}
+            if seed is not None:
+                start["seed"] = seed
+            await battle.write(f">start {json.dumps(start)}")
+            for side, player in sides.items():
+                options = {"name": player.username}
+                team = player.next_team
+                if team:
+                    options["team"] = team
+                await battle.write(f">player {side} {json.dumps(options)}")
+
+            # Chunks are separated by a blank line
+            ended = False
+            while not ended:
+                try:
+                    chunk = await process.stdout.readuntil(b"\n\n")
+                except asyncio.IncompleteReadError:
+                    break
+                lines = chunk.decode().strip("\n").split("\n")
+                if lines[0] == "update":
+                    for side, player in sides.items():
+                        self._deliver(player, battle_tag, split_update(lines[1:], side))
+                elif lines[0] == "sideupdate":
+                    self._deliver(sides[lines[1]], battle_tag, lines[2:])
+                elif lines[0] == "end":
+                    ended = True
+
+            if not ended:
+                raise RuntimeError(
+                    f"Simulator process exited before the end of {battle_tag}"
+                )
+
+            # Mirror the bookkeeping of the challenge flow
+            for player in sides.values():
+                await player._battle_semaphore.acquire()
+                await player._battle_count_queue.join()
+        finally:
+            for player in sides.values():
+                player.ps_client._local_rooms.pop(battle_tag, None)
+            if process.returncode is None:
+                process.stdin.close()
+                process.kill()
+                await process.wait()
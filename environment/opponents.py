@@ -0,0 +1,174 @@
+"""
+Opponent construction helpers shared by the training and evaluation commands.
+"""
+
+from pathlib import Path
+import numpy as np
+import torch
+from poke_env import AccountConfiguration
+from poke_env.environment import AbstractBattle
+from poke_env.player import BattleOrder, Player, RandomPlayer, MaxBasePowerPlayer, SinglesEnv
+from stable_baselines3 import DQN
+from stable_baselines3.common.base_class import BaseAlgorithm
+
+from environment.wrapper import BatchedPlayer, DQNPlayer
+from utils.model import get_env_action_mask, simple_embed_battle
+from utils.model_utils import DQN_INFERENCE_OBJECTS
+from utils.types import RLModel, RLPlayer
+from utils.output_utils import get_output_dir
+
+
+# Display names used in evaluation tables
+OPPONENT_NAMES = {
+    RLPlayer.RANDOM: "Random",
+    RLPlayer.MAX: "MaxBasePower",
+    RLPlayer.DQN_RANDOM: "DQN (Random Train)",
+    RLPlayer.DQN_MAX: "DQN (Max Train)",
+}
+
+# Model files backing the learned opponents
+OPPONENT_MODEL_FILES = {
+    RLPlayer.DQN_RANDOM: "random_model.zip",
+    RLPlayer.DQN_MAX: "max_model.zip",
+}
+
+
+def get_opponent_model_path(opponent: RLPlayer) -> Path | None:
+    """
+    Get the path of the trained model used by a learned opponent.
+
+    Returns:
+        Path | None: The model path, or None for heuristic opponents
+    """
+    if opponent not in OPPONENT_MODEL_FILES:
+        return None
+    return (
+        get_output_dir(task_type="train", model_type=RLModel.DQN)
+        / OPPONENT_MODEL_FILES[opponent]
+    )
+
+
+def create_opponent(
+    opponent: RLPlayer,
+    battle_format: str = "gen9randombattle",
+    account_configuration: AccountConfiguration | None = None,
+    start_listening: bool = True,
+    batch_size: int = 1,
+    max_wait_ms: float = 5.0,
+    **kwargs,
+) -> Player:
+    """
+    Create the player controlling the opposing side of a battle.
+
+    Args:
+        opponent: The opponent type to create
+        battle_format: Battle format played by the opponent
+        account_configuration: Optional account, needed when several opponents
+            share a server from different processes
+        start_listening: Whether to connect to the server. Opponents played by
+            an env with a local simulator do not need to
+        batch_size: Concurrent battles whose decisions a learned opponent
+            groups in one forward pass, see ``DQNPlayer``
+        max_wait_ms: Maximum time a decision of a learned opponent waits for
+            its batch to fill
+        kwargs: Other arguments of the player, such as its server
+
+    Returns:
+        Player: The opponent player
+
+    Raises:
+        FileNotFoundError: If a learned opponent has not been trained yet
+        ValueError: If the opponent type is not supported
+    """
+    kwargs.update(
+        battle_format=battle_format,
+        account_configuration=account_configuration,
+        log_level=30,  # WARNING level to reduce verbosity
+        start_listening=start_listening,
+    )
+    if opponent == RLPlayer.RANDOM:
+        return RandomPlayer(**kwargs)
+    elif opponent == RLPlayer.MAX:
+        return MaxBasePowerPlayer(**kwargs)
+    elif opponent in OPPONENT_MODEL_FILES:
+        # Check if DQN is trained
+        opponent_model_path = get_opponent_model_path(opponent)
+        if not opponent_model_path.exists():
+            raise FileNotFoundError(
+                f"❌ DQN model not found at {opponent_model_path}. "
+                "Please train the DQN model first."
+            )
+        return DQNPlayer(
+            model=DQN.load(
+                opponent_model_path, device="cpu", custom_objects=DQN_INFERENCE_OBJECTS
+            ),
+            batch_size=batch_size,
+            max_wait_ms=max_wait_ms,
+            **kwargs,
+        )
+    else:
+        raise ValueError(f"Unsupported opponent type: {opponent}")
+
+
+def predict_model_scores(model: BaseAlgorithm, obs: np.ndarray) -> np.ndarray:
+    """
+    Score the env actions of a batch of observations with a model.
+
+    The scores are the Q values of a DQN, or the action logits of a policy.
+    """
+    obs = torch.as_tensor(obs, dtype=torch.float32, device=model.device)
+    with torch.no_grad():
+        if isinstance(model, DQN):
+            scores = model.q_net(obs)
+        else:
+            scores = model.policy.get_distribution(obs).distribution.logits
+    return scores.cpu().numpy()
+
+
+def order_from_scores(battle: AbstractBattle, scores: np.ndarray) -> BattleOrder:
+    """Pick the legal env action with the highest score."""
+    mask = get_env_action_mask(battle, len(scores))
+    action = np.int64(np.argmax(np.where(mask, scores, -np.inf)))
+    return SinglesEnv.action_to_order(action, battle, strict=False)
+
+
+def order_from_model(model: BaseAlgorithm, battle: AbstractBattle) -> BattleOrder:
+    """
+    Pick the legal env action with the highest score of a model.
+
+    The model acts like the learner in the env: a masked argmax of its Q
+    values or action logits over the env action space.
+    """
+    obs = simple_embed_battle(battle).reshape(1, -1)
+    return order_from_scores(battle, predict_model_scores(model, obs)[0])
+
+
+class ModelPlayer(BatchedPlayer):
+    """
+    Player whose moves are picked by a trained model of any type.
+
+    Like ``DQNPlayer``, it can group the decisions of its concurrent battles
+    in one forward pass.
+    """
+
+    def __init__(
+        self, model: BaseAlgorithm, batch_size: int = 1, max_wait_ms: float = 5.0, **kwargs
+    ):
+        """
+        Args:
+            model: Trained model, PPO, MaskablePPO or DQN
+            batch_size: Maximum number of concurrent battles whose decisions
+                are grouped in a single forward pass. 1 disables batching
+            max_wait_ms: Maximum time a decision waits for the batch to fill
+        """
+        super().__init__(batch_size=batch_size, max_wait_ms=max_wait_ms, **kwargs)
+        self.model = model
+
+    def choose_move(self, battle: AbstractBattle):
+        return self._choose_from_observation(simple_embed_battle(battle), battle)
+
+    def _predict_scores(self, obs: np.ndarray) -> np.ndarray:
+        return predict_model_scores(self.model, obs)
+
+    def _order_from_scores(self, battle: AbstractBattle, scores: np.ndarray) -> BattleOrder:
+        return order_from_scores(battle, scores)
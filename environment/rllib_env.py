@@ -0,0 +1,70 @@
+"""
+Environment creator of the RLlib training backend.
+"""
+
+import itertools
+from poke_env.ps_client.server_configuration import LocalhostServerConfiguration
+
+from environment.local_simulator import LocalShowdownSimulator
+from environment.opponents import create_opponent
+from environment.vec_env import make_accounts
+from environment.wrapper import MaskedSingleAgentWrapper, PokeEnvSinglesWrapper
+from utils.types import RLPlayer
+
+
+# Name under which the env creator is registered in Ray
+RLLIB_ENV_NAME = "pokemon_showdown"
+
+# Envs created by this process, RLlib may create several per env runner
+_env_counter = itertools.count()
+
+
+def create_rllib_env(env_config) -> MaskedSingleAgentWrapper:
+    """
+    Create the single agent env of one RLlib env runner slot.
+
+    Every env gets its own accounts, ranked by the index of its env runner and
+    by its slot in that runner, the number of envs already created in the
+    runner process modulo ``envs_per_runner``. The
+    ``vector_index`` of the config is not used, as the new RLlib API stack
+    passes the same config to all the envs of a runner.
+
+    Args:
+        env_config: RLlib ``EnvContext`` holding ``account_prefix``,
+            ``opponent``, ``battle_format``, ``envs_per_runner``,
+            ``server_configurations`` and optionally ``showdown_path`` to use
+            the local simulator
+
+    Returns:
+        MaskedSingleAgentWrapper: The env playing against the opponent
+    """
+    envs_per_runner = env_config["envs_per_runner"]
+    # Envs recreated by a runner reuse its slots, never those of the next runner
+    rank = env_config.worker_index * envs_per_runner + next(_env_counter) % envs_per_runner
+    account1, account2, opponent_account = make_accounts(
+        env_config["account_prefix"], rank
+    )
+    server_configurations = env_config.get("server_configurations") or [
+        LocalhostServerConfiguration
+    ]
+    local_simulator = None
+    if env_config.get("showdown_path"):
+        local_simulator = LocalShowdownSimulator(env_config["showdown_path"])
+
+    env = PokeEnvSinglesWrapper(
+        account_configuration1=account1,
+        account_configuration2=account2,
+        server_configuration=server_configurations[rank % len(server_configurations)],
+        battle_format=env_config["battle_format"],
+        log_level=30,  # WARNING level to reduce verbosity
+        start_challenging=True,
+        strict=False,
+        local_simulator=local_simulator,
+    )
+    opponent = create_opponent(
+        RLPlayer(env_config["opponent"]),
+        battle_format=env_config["battle_format"],
+        account_configuration=opponent_account,
+        start_listening=local_simulator is None,
+    )
+    return env.get_wrapped_env(opponent=opponent)
@@ -0,0 +1,197 @@
+"""
+Self-play vectorized environment where the learning policy plays both sides.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+from poke_env.ps_client.server_configuration import (
+    LocalhostServerConfiguration,
+    ServerConfiguration,
+)
+from stable_baselines3.common.vec_env import VecEnv
+
+from environment.local_simulator import LocalShowdownSimulator
+from environment.wrapper import PokeEnvSinglesWrapper
+from environment.vec_env import make_accounts
+from utils.episode_log import VecEpisodeLogger
+from utils.model import get_env_action_mask
+
+
+class _SelfPlaySlot:
+    """One side of a self-play battle, seen as a single environment."""
+
+    def __init__(self, env: PokeEnvSinglesWrapper, side: int):
+        self.env = env
+        self.side = side
+        self.invalid_actions = 0
+
+    @property
+    def battle(self):
+        return self.env.battle1 if self.side == 0 else self.env.battle2
+
+    def action_masks(self) -> np.ndarray:
+        """Legal actions of this side in the current battle."""
+        return get_env_action_mask(self.battle, self.env.action_spaces[self.agent].n)
+
+    @property
+    def agent(self) -> str:
+        return self.env.possible_agents[self.side]
+
+    def __getattr__(self, name):
+        return getattr(self.env, name)
+
+
+class SelfPlayVecEnv(VecEnv):
+    """
+    Expose both agents of each battle as two environments of a VecEnv.
+
+    Env ``i`` is the first agent of battle ``i // 2`` and env ``i + 1`` its
+    opponent, so every battle yields a trajectory for each side. The battles
+    are stepped concurrently in threads, as they mostly wait for the server.
+    """
+
+    def __init__(self, envs: list[PokeEnvSinglesWrapper]):
+        self.envs = envs
+        self.slots = [_SelfPlaySlot(env, side) for env in envs for side in (0, 1)]
+        env = envs[0]
+        agent = env.possible_agents[0]
+        super().__init__(
+            num_envs=len(self.slots),
+            observation_space=env.observation_spaces[agent],
+            action_space=env.action_spaces[agent],
+        )
+        self._actions = None
+        self._executor = ThreadPoolExecutor(max_workers=len(envs))
+
+    def reset(self):
+        results = list(self._executor.map(self._reset_env, range(len(self.envs))))
+        obs = np.stack([side_obs for env_obs in results for side_obs in env_obs])
+        self.reset_infos = [{} for _ in self.slots]
+        return obs
+
+    def _reset_env(self, env_idx: int) -> tuple[np.ndarray, np.ndarray]:
+        env = self.envs[env_idx]
+        observations, _ = env.reset()
+        for slot in self.slots[2 * env_idx : 2 * env_idx + 2]:
+            slot.invalid_actions = 0
+        # The builder reuses its buffers, so the observations are copied
+        return tuple(np.array(observations[agent]) for agent in env.possible_agents)
+
+    def step_async(self, actions: np.ndarray):
+        self._actions = actions
+
+    def step_wait(self):
+        results = list(self._executor.map(self._step_env, range(len(self.envs))))
+        obs, rewards, dones, infos = [], [], [], []
+        for env_results in results:
+            for slot_obs, reward, done, info in env_results:
+                obs.append(slot_obs)
+                rewards.append(reward)
+                dones.append(done)
+                infos.append(info)
+        return (
+            np.stack(obs),
+            np.array(rewards, dtype=np.float32),
+            np.array(dones),
+            infos,
+        )
+
+    def _step_env(self, env_idx: int) -> list[tuple]:
+        env = self.envs[env_idx]
+        slots = self.slots[2 * env_idx : 2 * env_idx + 2]
+        actions = {}
+        for offset, slot in enumerate(slots):
+            action = self._actions[2 * env_idx + offset]
+            if not slot.action_masks()[action]:
+                slot.invalid_actions += 1
+            actions[slot.agent] = np.int64(action)
+
+        observations, rewards, terminated, truncated, _ = env.step(actions)
+        done = any(terminated.values()) or any(truncated.values())
+
+        results = []
+        for slot in slots:
+            agent = slot.agent
+            info = {"invalid_actions": slot.invalid_actions}
+            slot_obs = np.array(observations[agent])
+            if done:
+                info["terminal_observation"] = slot_obs
+                info["TimeLimit.truncated"] = truncated[agent] and not terminated[agent]
+            results.append([slot_obs, rewards[agent], done, info])
+
+        if done:
+            reset_obs = self._reset_env(env_idx)
+            for result, slot_obs in zip(results, reset_obs):
+                result[0] = slot_obs
+        return results
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+        self._executor.shutdown()
+
+    def get_attr(self, attr_name: str, indices=None) -> list:
+        return [getattr(self.slots[i], attr_name) for i in self._get_indices(indices)]
+
+    def set_attr(self, attr_name: str, value, indices=None):
+        for i in self._get_indices(indices):
+            setattr(self.slots[i].env, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs):
+        return [
+            getattr(self.slots[i], method_name)(*method_args, **method_kwargs)
+            for i in self._get_indices(indices)
+        ]
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> list[bool]:
+        return [False for _ in self._get_indices(indices)]
+
+
+def make_self_play_env(
+    n_envs: int,
+    episode_log_dir: str | Path,
+    account_prefix: str,
+    battle_format: str = "gen9randombattle",
+    server_configurations: list[ServerConfiguration] | None = None,
+    local_simulator: LocalShowdownSimulator | None = None,
+    t_start: float | None = None,
+) -> VecEpisodeLogger:
+    """
+    Build ``n_envs`` self-play battles, giving ``2 * n_envs`` environments.
+
+    Args:
+        n_envs: Number of concurrent battles
+        episode_log_dir: Episode log of all the environments
+        account_prefix: Run-unique prefix for the account names
+        battle_format: Battle format to play
+        server_configurations: Optional server of each battle, defaults to
+            the local server for all of them
+        local_simulator: If given, battles run in a local simulator process
+        t_start: Origin of the episode times of the run, see
+            ``prepare_episode_log``
+
+    Returns:
+        VecEpisodeLogger: The monitored self-play environment
+    """
+    if server_configurations is None:
+        server_configurations = [LocalhostServerConfiguration] * n_envs
+
+    envs = []
+    for rank in range(n_envs):
+        account1, account2, _ = make_accounts(account_prefix, rank)
+        envs.append(
+            PokeEnvSinglesWrapper(
+                account_configuration1=account1,
+                account_configuration2=account2,
+                server_configuration=server_configurations[rank],
+                battle_format=battle_format,
+                log_level=30,  # WARNING level to reduce verbosity
+                start_challenging=True,
+                strict=False,
+                local_simulator=local_simulator,
+            )
+        )
+    return VecEpisodeLogger(
+        SelfPlayVecEnv(envs), episode_log_dir, opponent="self", t_start=t_start
+    )
@@ -1,33 +1,73 @@
 import os
 import time
 import socket
+import threading
 import docker
 import logging
 from docker.errors import ContainerError, APIError, BuildError
 from docker.models.containers import Container
+from poke_env.ps_client.server_configuration import ServerConfiguration
+
+
+def test_port_connectivity(port: int, timeout: float = 5) -> bool:
+    """Test if a server is accessible on the given localhost port."""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            return sock.connect_ex(("localhost", port)) == 0
+    except Exception as e:
+        logging.getLogger("PokemonShowdownServer").error(
+            f"Error testing connectivity: {e}"
+        )
+        return False
+
+
+def get_server_configuration(port: int) -> ServerConfiguration:
+    """Get the poke-env configuration of a local server on the given port."""
+    return ServerConfiguration(
+        f"ws://localhost:{port}/showdown/websocket",
+        "https://play.pokemonshowdown.com/action.php?",
+    )
 
 
 class PokemonShowdownServer:
-    def __init__(self, port: int = 8000):
+    def __init__(self, port: int = 8000, exclusive: bool = True):
+        """
+        Args:
+            port: Host port the container is published on
+            exclusive: If True, any Pokemon Showdown container counts as this
+                server and is stopped with it. Servers of a pool only manage
+                the container of their own port.
+        """
         self.port = port
+        self.exclusive = exclusive
         self.client = docker.from_env()
         self.logger = logging.getLogger("PokemonShowdownServer")
 
     def test_connectivity(self) -> bool:
         """Test if the server is accessible on the configured port."""
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(5)
-                result = sock.connect_ex(("localhost", self.port))
-                if result == 0:
-                    return True
-                else:
-                    return False
-        except Exception as e:
-            self.logger.error(f"Error testing connectivity: {e}")
-            return False
+        return test_port_connectivity(self.port)
 
-    def start(self) -> bool:
+    def _find_containers(self, all: bool = False) -> list[Container]:
+        """Find the containers managed by this server."""
+        # Find containers by name pattern
+        named_containers: list[Container] = self.client.containers.list(
+            filters={"name": f"pokemon-showdown-{self.port}"}, all=all
+        )
+        if not self.exclusive:
+            return named_containers
+
+        # Also find containers by image name
+        containers: list[Container] = self.client.containers.list(
+            filters={"ancestor": "pokemon-showdown"}, all=all
+        )
+
+        # Combine both lists
+        all_containers = containers + named_containers
+        # Remove duplicates
+        return list({c.id: c for c in all_containers}.values())
+
+    def start(self, build: bool = True) -> bool:
         self.logger.info(f"🚀 Starting Pokémon Showdown server on port {self.port}...")
 
         # First, check if there are any existing containers and clean them up
@@ -43,25 +83,8 @@ class PokemonShowdownServer:
             start_time = time.time()
 
             # Build the image
-            self.logger.info(
-                "Building Docker image (If you are running this for the first time, it may take ~2 minutes)"
-            )
-            build_result = self.client.images.build(
-                path=os.path.join(os.path.dirname(__file__), "docker"),
-                dockerfile="Dockerfile",
-                tag="pokemon-showdown",
-                rm=True,
-            )
-            # build_result is a tuple (image, build_logs)
-            if isinstance(build_result, tuple):
-                image, build_logs = build_result
-                if image and hasattr(image, "id") and image.id:
-                    image_id = image.id[:12] if len(image.id) >= 12 else image.id
-                    self.logger.info(f"Docker image built successfully: {image_id}")
-                else:
-                    self.logger.info("Docker image built successfully")
-            else:
-                self.logger.info("Docker image built successfully")
+            if build:
+                self.build_image()
 
             # Start the container
             self.logger.info("Starting container...")
@@ -122,25 +145,34 @@ class PokemonShowdownServer:
             self.logger.error(f"An unexpected error occurred: {e}")
         return False
 
+    def build_image(self):
+        """Build the Pokemon Showdown Docker image."""
+        self.logger.info(
+            "Building Docker image (If you are running this for the first time, it may take ~2 minutes)"
+        )
+        build_result = self.client.images.build(
+            path=os.path.join(os.path.dirname(__file__), "docker"),
+            dockerfile="Dockerfile",
+            tag="pokemon-showdown",
+            rm=True,
+        )
+        # build_result is a tuple (image, build_logs)
+        if isinstance(build_result, tuple):
+            image, build_logs = build_result
+            if image and hasattr(image, "id") and image.id:
+                image_id = image.id[:12] if len(image.id) >= 12 else image.id
+                self.logger.info(f"Docker image built successfully: {image_id}")
+            else:
+                self.logger.info("Docker image built successfully")
+        else:
+            self.logger.info("Docker image built successfully")
+
     def stop(self) -> bool:
         self.logger.info("Stopping Pokemon Showdown server...")
         try:
             stop_time = time.time()
 
-            # Find containers by image name
-            containers: list[Container] = self.client.containers.list(
-                filters={"ancestor": "pokemon-showdown"}, all=True
-            )
-
-            # Also try to find by name pattern
-            named_containers: list[Container] = self.client.containers.list(
-                filters={"name": f"pokemon-showdown-{self.port}"}, all=True
-            )
-
-            # Combine both lists
-            all_containers = containers + named_containers
-            # Remove duplicates
-            unique_containers = list({c.id: c for c in all_containers}.values())
+            unique_containers = self._find_containers(all=True)
 
             if not unique_containers:
                 self.logger.info("No Pokemon Showdown containers found to stop.")
@@ -186,18 +218,8 @@ class PokemonShowdownServer:
 
     def is_running(self) -> bool:
         try:
-            # Check for containers by image
-            containers: list[Container] = self.client.containers.list(
-                filters={"ancestor": "pokemon-showdown"}
-            )
-
-            # Check for containers by name pattern
-            named_containers = self.client.containers.list(
-                filters={"name": f"pokemon-showdown-{self.port}"}
-            )
-
-            # Combine and check if any are running
-            all_containers = containers + named_containers
+            # Check if any container is running
+            all_containers = self._find_containers()
             running_containers = [c for c in all_containers if c.status == "running"]
 
             if running_containers:
@@ -214,6 +236,115 @@ class PokemonShowdownServer:
         return False
 
 
+class ShowdownServerPool:
+    """
+    Pool of Pokemon Showdown servers on consecutive ports.
+
+    Envs and workers get the configuration of the least-loaded healthy shard
+    through ``acquire`` and hand it back with ``release``.
+    """
+
+    def __init__(
+        self, size: int, base_port: int = 8000, manage_containers: bool = True
+    ):
+        """
+        Args:
+            size: Number of servers in the pool
+            base_port: Port of the first server, the others use the next ports
+            manage_containers: If False, the servers are started manually and
+                the pool only tracks their health and load
+        """
+        if size < 1:
+            raise ValueError(f"A server pool needs at least one server, got {size}")
+        self.ports = [base_port + i for i in range(size)]
+        self.manage_containers = manage_containers
+        self.servers = (
+            [PokemonShowdownServer(port=port, exclusive=False) for port in self.ports]
+            if manage_containers
+            else []
+        )
+        self.load = {port: 0 for port in self.ports}
+        self.healthy = {port: True for port in self.ports}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger("ShowdownServerPool")
+
+    def start(self) -> bool:
+        if not self.manage_containers:
+            return all(self.check_health().values())
+
+        self.logger.info(
+            f"🚀 Starting {len(self.ports)} Pokémon Showdown servers on ports "
+            f"{self.ports[0]}-{self.ports[-1]}..."
+        )
+        # Clean up any container left over, then build the image only once
+        PokemonShowdownServer(port=self.ports[0]).stop()
+        started = [
+            server.start(build=index == 0) for index, server in enumerate(self.servers)
+        ]
+        self.check_health()
+        return all(started)
+
+    def stop(self) -> bool:
+        if not self.manage_containers:
+            return True
+        return all([server.stop() for server in self.servers])
+
+    def restart(self) -> bool:
+        self.logger.info("Restarting Pokemon Showdown server pool...")
+        if not self.stop():
+            self.logger.error("Failed to stop the server pool. Cannot restart.")
+            return False
+        return self.start()
+
+    def is_running(self) -> bool:
+        if not self.manage_containers:
+            return all(self.check_health().values())
+        return all(server.is_running() for server in self.servers)
+
+    def check_health(self) -> dict[int, bool]:
+        """
+        Test the connectivity of every server of the pool.
+
+        Returns:
+            dict: Health of each server, keyed by port
+        """
+        health = {port: test_port_connectivity(port, timeout=1) for port in self.ports}
+        with self._lock:
+            for port, is_healthy in health.items():
+                if self.healthy[port] and not is_healthy:
+                    self.logger.warning(f"⚠️ Server on port {port} is not reachable")
+                self.healthy[port] = is_healthy
+        return health
+
+    def acquire(self) -> ServerConfiguration:
+        """
+        Assign the least-loaded healthy server.
+
+        Raises:
+            RuntimeError: If no server of the pool is reachable
+        """
+        self.check_health()
+        with self._lock:
+            candidates = [port for port in self.ports if self.healthy[port]]
+            if not candidates:
+                raise RuntimeError("No Pokemon Showdown server of the pool is reachable")
+            port = min(candidates, key=lambda p: self.load[p])
+            self.load[port] += 1
+        return get_server_configuration(port)
+
+    def acquire_many(self, count: int) -> list[ServerConfiguration]:
+        """Assign servers to ``count`` envs, spreading them across the pool."""
+        return [self.acquire() for _ in range(count)]
+
+    def release(self, server_configuration: ServerConfiguration):
+        """Hand back a server assigned by ``acquire``."""
+        for port in self.ports:
+            if server_configuration == get_server_configuration(port):
+                with self._lock:
+                    self.load[port] = max(0, self.load[port] - 1)
+                return
+
+
 if __name__ == "__main__":
     # Test the server functionality
     logging.basicConfig(
@@ -0,0 +1,160 @@
+"""
+Seeded random-battle teams, played in a custom game format.
+
+Random battles draw new teams every battle, so most of the variance of an
+evaluation comes from the teams rather than from the players. Generating the
+teams from seeds with Showdown's team generator, and playing them in a format
+that accepts any team, lets each draw be played twice with the teams swapped.
+"""
+
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+from poke_env.teambuilder import Teambuilder
+
+from environment.local_simulator import DEFAULT_SHOWDOWN_PATH, LocalShowdownSimulator
+from utils.output_utils import get_output_dir
+
+
+# Format accepting the generated teams. Unlike random battles, it has Team
+# Preview and neither Sleep Clause Mod nor HP Percentage Mod. Showdown names
+# the rooms of a format with custom rules after its base format, while
+# poke-env matches rooms against the format it challenges in, so those rules
+# cannot be restored with "@@@" custom rules.
+PAIRED_BATTLE_FORMAT = "gen9customgame"
+
+# Caveat shown with paired results
+PAIRED_FORMAT_WARNING = (
+    f"Paired battles are played in {PAIRED_BATTLE_FORMAT}, with Team Preview and without "
+    "Sleep Clause Mod or HP Percentage Mod, so their win rates are not comparable "
+    "to those of random battles"
+)
+
+
+def team_seed(seed: int, pair: int, side: int) -> str:
+    """
+    Showdown PRNG seed of a team, four 16-bit numbers.
+
+    The seed only depends on the base seed, the pair and the side, so a pair
+    gets the same teams however the battles are split in shards.
+    """
+    state = np.random.SeedSequence([seed, pair, side]).generate_state(4)
+    return ",".join(str(int(value) & 0xFFFF) for value in state)
+
+
+def generate_team(
+    team_format: str,
+    seed: str,
+    showdown_path: str | Path = DEFAULT_SHOWDOWN_PATH,
+    node: str = "node",
+) -> str:
+    """
+    Generate a random-battle team with Showdown's ``generate-team`` command.
+
+    Args:
+        team_format: Random format whose team generator is used
+        seed: Showdown PRNG seed, see ``team_seed``
+        showdown_path: Built Showdown checkout
+        node: Node executable
+
+    Returns:
+        str: The team, in packed format
+
+    Raises:
+        RuntimeError: If Showdown fails to generate the team
+    """
+    process = subprocess.run(
+        [node, str(Path(showdown_path) / "pokemon-showdown"), "generate-team", team_format, seed],
+        capture_output=True,
+        text=True,
+    )
+    team = process.stdout.strip()
+    if process.returncode != 0 or not team:
+        raise RuntimeError(
+            f"Showdown could not generate a {team_format} team: {process.stderr.strip()}"
+        )
+    return team
+
+
+def generate_paired_teams(
+    n_pairs: int,
+    seed: int = 0,
+    team_format: str = "gen9randombattle",
+    showdown_path: str | Path = DEFAULT_SHOWDOWN_PATH,
+    workers: int = 8,
+) -> list[tuple[str, str]]:
+    """
+    Generate the two teams of each pair of a paired evaluation.
+
+    Teams are stored in ``outputs/evaluate/teams/``, one file per format and
+    seed, so the same seed always plays the same teams and only new pairs are
+    generated. Each team takes a Node process, ``workers`` run at once.
+
+    Returns:
+        list[tuple[str, str]]: Packed teams of both sides of each pair
+    """
+    teams_path = get_output_dir(task_type="evaluate") / "teams" / f"{team_format}_{seed}.json"
+    teams_path.parent.mkdir(parents=True, exist_ok=True)
+    teams = []
+    if teams_path.exists():
+        with open(teams_path) as f:
+            teams = [tuple(pair) for pair in json.load(f)]
+
+    if len(teams) < n_pairs:
+        LocalShowdownSimulator(showdown_path).check()
+        seeds = [
+            team_seed(seed, pair, side) for pair in range(len(teams), n_pairs) for side in (0, 1)
+        ]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            generated = list(
+                executor.map(
+                    lambda team: generate_team(team_format, team, showdown_path), seeds
+                )
+            )
+        teams.extend(zip(generated[::2], generated[1::2]))
+        tmp_path = teams_path.with_name(f"{teams_path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(teams, f)
+        os.replace(tmp_path, teams_path)
+
+    return teams[:n_pairs]
+
+
+def mirrored_team_orders(
+    teams: list[tuple[str, str]], battle_indices: range
+) -> tuple[list[str], list[str]]:
+    """
+    Teams of both players in a range of battles of a paired evaluation.
+
+    Battle ``2k`` plays the teams of pair ``k`` and battle ``2k + 1`` plays them
+    with the sides swapped.
+
+    Returns:
+        tuple[list[str], list[str]]: Teams of the player and of the opponent,
+            in battle order
+    """
+    player_teams, opponent_teams = [], []
+    for battle in battle_indices:
+        first, second = teams[battle // 2]
+        swapped = battle % 2 == 1
+        player_teams.append(second if swapped else first)
+        opponent_teams.append(first if swapped else second)
+    return player_teams, opponent_teams
+
+
+class SequenceTeambuilder(Teambuilder):
+    """Teambuilder yielding a fixed list of packed teams in order, then again."""
+
+    def __init__(self, teams: list[str]):
+        if not teams:
+            raise ValueError("SequenceTeambuilder needs at least one team")
+        self.teams = teams
+        self._next = 0
+
+    def yield_team(self) -> str:
+        team = self.teams[self._next % len(self.teams)]
+        self._next += 1
+        return team
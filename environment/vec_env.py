@@ -0,0 +1,170 @@
+"""
+Vectorized training environments running one battle per subprocess.
+"""
+
+import uuid
+from functools import partial
+from pathlib import Path
+from poke_env import AccountConfiguration
+from poke_env.ps_client.server_configuration import (
+    LocalhostServerConfiguration,
+    ServerConfiguration,
+)
+from stable_baselines3.common.vec_env import SubprocVecEnv
+
+from environment.league import create_league_opponent
+from environment.local_simulator import LocalShowdownSimulator
+from environment.opponents import create_opponent
+from environment.wrapper import PokeEnvSinglesWrapper
+from utils.episode_log import EpisodeLogger
+from utils.types import RLModel, RLPlayer
+
+
+def make_account_prefix(tag: str) -> str:
+    """
+    Create a short, run-unique prefix for the accounts of a vectorized run.
+
+    Showdown usernames are limited to 18 characters, so the prefix is kept short
+    enough to leave room for the env rank and the side suffix.
+    """
+    return f"{tag[:4]}{uuid.uuid4().hex[:6]}"
+
+
+def make_accounts(
+    account_prefix: str | None, rank: int
+) -> tuple[AccountConfiguration | None, ...]:
+    """
+    Create the accounts of both env agents and of the opponent for one env.
+
+    Returns:
+        tuple: Accounts for agent 1, agent 2 and the opponent. All None if no
+            prefix is given, letting poke-env generate the usernames.
+    """
+    if account_prefix is None:
+        return None, None, None
+    return tuple(
+        AccountConfiguration(f"{account_prefix}{rank}{side}", None)
+        for side in ("a", "b", "o")
+    )
+
+
+def make_training_env(
+    rank: int,
+    opponent: RLPlayer,
+    episode_log_dir: str | Path,
+    battle_format: str = "gen9randombattle",
+    account_prefix: str | None = None,
+    server_configuration: ServerConfiguration = LocalhostServerConfiguration,
+    local_simulator: LocalShowdownSimulator | None = None,
+    league_model: RLModel | None = None,
+    t_start: float | None = None,
+) -> EpisodeLogger:
+    """
+    Build one monitored wrapper/opponent pair.
+
+    Args:
+        rank: Index of the environment inside the vectorized env
+        opponent: Opponent player type
+        episode_log_dir: Episode log of the run
+        battle_format: Battle format to play
+        account_prefix: Prefix for unique account names. If None, poke-env
+            generates the usernames (only safe with a single process)
+        server_configuration: Showdown server the pair connects to
+        local_simulator: If given, battles run in a local simulator process
+            and no server is used
+        league_model: If given, the opponent plays the league snapshots of
+            this model type, with ``opponent`` as the base member
+        t_start: Origin of the episode times of the run, see
+            ``prepare_episode_log``
+
+    Returns:
+        EpisodeLogger: The monitored single agent environment
+    """
+    account1, account2, opponent_account = make_accounts(account_prefix, rank)
+    env = PokeEnvSinglesWrapper(
+        account_configuration1=account1,
+        account_configuration2=account2,
+        server_configuration=server_configuration,
+        battle_format=battle_format,
+        log_level=30,  # WARNING level to reduce verbosity
+        start_challenging=True,
+        strict=False,
+        local_simulator=local_simulator,
+    )
+    if league_model is not None:
+        player = create_league_opponent(
+            league_model,
+            base=opponent,
+            battle_format=battle_format,
+            account_configuration=opponent_account,
+            start_listening=local_simulator is None,
+        )
+    else:
+        player = create_opponent(
+            opponent,
+            battle_format=battle_format,
+            account_configuration=opponent_account,
+            start_listening=local_simulator is None,
+        )
+    return EpisodeLogger(
+        env.get_wrapped_env(opponent=player),
+        episode_log_dir,
+        env_id=rank,
+        opponent=f"league/{opponent.value}" if league_model is not None else opponent.value,
+        t_start=t_start,
+    )
+
+
+def make_vec_training_env(
+    n_envs: int,
+    opponent: RLPlayer,
+    episode_log_dir: Path,
+    account_prefix: str,
+    battle_format: str = "gen9randombattle",
+    server_configurations: list[ServerConfiguration] | None = None,
+    local_simulator: LocalShowdownSimulator | None = None,
+    league_model: RLModel | None = None,
+    t_start: float | None = None,
+) -> SubprocVecEnv:
+    """
+    Build ``n_envs`` wrapper/opponent pairs, each one in its own subprocess.
+
+    Args:
+        n_envs: Number of parallel environments
+        opponent: Opponent player type
+        episode_log_dir: Episode log shared by the environments
+        account_prefix: Run-unique prefix for the account names
+        battle_format: Battle format to play
+        server_configurations: Optional server of each environment, defaults
+            to the local server for all of them
+        local_simulator: If given, every environment runs its battles in its
+            own local simulator processes
+        league_model: If given, the opponents play the league snapshots of
+            this model type
+        t_start: Origin of the episode times of the run, see
+            ``prepare_episode_log``
+
+    Returns:
+        SubprocVecEnv: The vectorized environment
+    """
+    if server_configurations is None:
+        server_configurations = [LocalhostServerConfiguration] * n_envs
+
+    env_fns = [
+        partial(
+            make_training_env,
+            rank=rank,
+            opponent=opponent,
+            episode_log_dir=episode_log_dir,
+            battle_format=battle_format,
+            account_prefix=account_prefix,
+            server_configuration=server_configurations[rank],
+            local_simulator=local_simulator,
+            league_model=league_model,
+            t_start=t_start,
+        )
+        for rank in range(n_envs)
+    ]
+    # poke-env runs its event loop in a background thread, so the workers must
+    # not be forked from this process
+    return SubprocVecEnv(env_fns, start_method="spawn")
@@ -1,3 +1,5 @@
+import abc
+import asyncio
 import numpy as np
 from gymnasium.spaces import Box
 from poke_env.environment import Battle
@@ -8,7 +10,14 @@ from poke_env.player import (
     DefaultBattleOrder,
     BattleOrder,
 )
-from utils.model import simple_embed_battle, simple_action_to_order
+from environment.local_simulator import LocalShowdownSimulator
+from utils.model import (
+    get_action_order_mask,
+    get_env_action_mask,
+    simple_action_to_order,
+    simple_embed_battle,
+)
+from utils.observation import ObservationBuilder
 import torch
 import random
 
@@ -18,7 +27,17 @@ class PokeEnvSinglesWrapper(SinglesEnv):
     A wrapper for the PokeEnv Singles environment that provides a custom observation space
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, local_simulator: LocalShowdownSimulator | None = None, **kwargs):
+        """
+        Args:
+            local_simulator: If given, battles are played by a local simulator
+                process instead of a Showdown server
+        """
+        # Set before the parent starts the challenge loop
+        self.local_simulator = local_simulator
+        if local_simulator is not None:
+            kwargs["start_listening"] = False
+        self.observation_builder = ObservationBuilder()
         super().__init__(**kwargs)
         low = [-1, -1, -1, -1, 0, 0, 0, 0, 0, 0]
         high = [3, 3, 3, 3, 4, 4, 4, 4, 1, 1]
@@ -42,36 +61,27 @@ class PokeEnvSinglesWrapper(SinglesEnv):
     def embed_battle(self, battle):
         """
         Embed the battle state into a vector representation.
+
+        The observation is written in a reused buffer of the battle's player,
+        see ObservationBuilder.
         """
-        # -1 indicates that the move does not have a base power or is not available
-        moves_base_power = -np.ones(4)
-        moves_dmg_multiplier = np.ones(4)
-        # print(battle.available_moves)
-        for i, move in enumerate(battle.available_moves):
-            # print(move)
-            moves_base_power[i] = (
-                move.base_power / 100
-            )  # Simple rescaling to facilitate learning
-            if move.type:
-                moves_dmg_multiplier[i] = (
-                    battle.opponent_active_pokemon.damage_multiplier(move)
-                )
-
-        # We count how many pokemons have fainted in each team
-        fainted_mon_team = len([mon for mon in battle.team.values() if mon.fainted]) / 6
-        fainted_mon_opponent = (
-            len([mon for mon in battle.opponent_team.values() if mon.fainted]) / 6
-        )
+        return self.observation_builder.build(battle)
 
-        # Final vector with 10 components
-        final_vector = np.concatenate(
-            [
-                moves_base_power,
-                moves_dmg_multiplier,
-                [fainted_mon_team, fainted_mon_opponent],
-            ]
-        )
-        return np.float32(final_vector)
+    async def _challenge_loop(self, n_challenges: int | None = None):
+        """
+        Play the env battles in the local simulator, if any, instead of
+        challenging through the server.
+        """
+        if self.local_simulator is None:
+            return await super()._challenge_loop(n_challenges)
+        if not n_challenges:
+            while self._keep_challenging:
+                await self.local_simulator.battle(self.agent1, self.agent2)
+        elif n_challenges > 0:
+            for _ in range(n_challenges):
+                await self.local_simulator.battle(self.agent1, self.agent2)
+        else:
+            raise ValueError(f"Number of challenges must be > 0. Got {n_challenges}")
 
     def get_wrapped_env(self, opponent):
         """
@@ -81,21 +91,145 @@ class PokeEnvSinglesWrapper(SinglesEnv):
             opponent: The opponent to battle against
 
         Returns:
-            SingleAgentWrapper environment
+            MaskedSingleAgentWrapper environment
         """
 
-        return SingleAgentWrapper(self, opponent)
+        return MaskedSingleAgentWrapper(self, opponent)
+
+
+class MaskedSingleAgentWrapper(SingleAgentWrapper):
+    """
+    Single agent env exposing the legal actions of each step.
+
+    ``action_masks`` is the method MaskablePPO looks for. The number of
+    illegal actions taken in the current episode is reported in the step info
+    as ``invalid_actions``.
+    """
+
+    def __init__(self, env: PokeEnvSinglesWrapper, opponent: Player):
+        super().__init__(env, opponent)
+        self.invalid_actions = 0
+
+    def action_masks(self) -> np.ndarray:
+        """Legal actions of agent 1 in the current battle."""
+        return get_env_action_mask(self.env.battle1, self.action_space.n)
 
+    def reset(self, *, seed=None, options=None):
+        self.invalid_actions = 0
+        return super().reset(seed=seed, options=options)
 
-class DQNPlayer(Player):
-    def __init__(self, model):
-        super().__init__(log_level=30)
+    def step(self, action):
+        if not self.action_masks()[action]:
+            self.invalid_actions += 1
+        obs, reward, terminated, truncated, info = super().step(action)
+        info["invalid_actions"] = self.invalid_actions
+        return obs, reward, terminated, truncated, info
+
+
+class BatchedPlayer(Player):
+    """
+    Player whose moves are picked from the scores of a model, batching the
+    decisions of its concurrent battles.
+
+    Subclasses score a batch of observations in ``_predict_scores`` and turn
+    the scores of a battle into an order in ``_order_from_scores``.
+    """
+
+    def __init__(self, batch_size: int = 1, max_wait_ms: float = 5.0, **kwargs):
+        """
+        Args:
+            batch_size: Maximum number of concurrent battles whose decisions
+                are grouped in a single forward pass. 1 disables batching
+            max_wait_ms: Maximum time a decision waits for the batch to fill
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        kwargs.setdefault("log_level", 30)
+        super().__init__(**kwargs)
+        self.batch_size = batch_size
+        self.max_wait_ms = max_wait_ms
+
+        # Decisions waiting for the next batched forward pass
+        self._pending: list[tuple[np.ndarray, Battle, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    @abc.abstractmethod
+    def _predict_scores(self, obs: np.ndarray) -> np.ndarray:
+        """Score the actions of a batch of observations."""
+
+    @abc.abstractmethod
+    def _order_from_scores(self, battle: Battle, scores: np.ndarray) -> BattleOrder:
+        """Pick the order of a battle from the scores of its actions."""
+
+    def _choose_from_observation(self, obs: np.ndarray, battle: Battle):
+        """Pick the order of an observation, in a batch if batching is enabled."""
+        if self.batch_size > 1:
+            return self._choose_move_batched(obs, battle)
+        return self._order_from_scores(battle, self._predict_scores(obs.reshape(1, -1))[0])
+
+    async def _choose_move_batched(self, obs: np.ndarray, battle: Battle) -> BattleOrder:
+        """
+        Queue a decision and wait until its batch has been evaluated.
+
+        The batch runs as soon as ``batch_size`` decisions are queued, or
+        ``max_wait_ms`` after the first one otherwise.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((obs, battle, future))
+
+        if len(self._pending) >= self.batch_size:
+            self._flush_pending()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.max_wait_ms / 1000, self._flush_pending
+            )
+        return await future
+
+    def _flush_pending(self):
+        """Evaluate every queued decision with one forward pass."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        try:
+            scores = self._predict_scores(np.stack([obs for obs, _, _ in pending]))
+        except Exception as e:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, battle, future), battle_scores in zip(pending, scores):
+            if future.done():
+                continue
+            try:
+                future.set_result(self._order_from_scores(battle, battle_scores))
+            except Exception as e:
+                future.set_exception(e)
+
+
+class DQNPlayer(BatchedPlayer):
+    def __init__(self, model, batch_size: int = 1, max_wait_ms: float = 5.0, **kwargs):
+        """
+        Args:
+            model: Trained DQN model whose ``q_net`` picks the moves
+            batch_size: Maximum number of concurrent battles whose decisions
+                are grouped in a single forward pass. 1 disables batching
+            max_wait_ms: Maximum time a decision waits for the batch to fill
+        """
+        super().__init__(batch_size=batch_size, max_wait_ms=max_wait_ms, **kwargs)
         self.model = model
 
         self.observations_dim = 10
         self.actions_dim = 4 + 6  # 4 Moves and 6 Switches
         self.times_random_choice = 0
         self.times_made_a_choice = 0
+        # Decisions without any legal action, answered by choose_random_move
+        self.times_fallback_choice = 0
 
     # Mismo método que la clase
     def embed_battle(self, battle):
@@ -111,32 +245,36 @@ class DQNPlayer(Player):
             and len(battle.available_switches) == 0
         ):
             self.times_random_choice += 1
+            self.times_fallback_choice += 1
             # print(">>>> Estado inicial incompleto, acción aleatoria")
             return self.choose_random_move(battle)
-        obs = self.embed_battle(battle).reshape(1, -1)
-        obs_tensor = torch.tensor(obs, dtype=torch.float32)
-
-        q_values = self.model.q_net(obs_tensor).detach().numpy()[0]
+        obs = self.embed_battle(battle)
+        return self._choose_from_observation(obs, battle)
 
-        sorted_actions = np.argsort(q_values)[::-1]
-
-        # Buscar la mejor acción válida
-        for action in sorted_actions:
-            try:
-                order = self.action_to_order(action, battle)
-                if not isinstance(order, DefaultBattleOrder):
-                    # print(f">>>> Acción válida seleccionada: {action}")
-                    return order
-            except AssertionError as e:
-                # print(f">>> Acción no me sirve: {e}")
-                continue  # Acción inválida, probar la siguiente
+    def _predict_scores(self, obs: np.ndarray) -> np.ndarray:
+        """Run the Q network on a batch of observations."""
+        obs_tensor = torch.tensor(obs, dtype=torch.float32)
+        with torch.no_grad():
+            return self.model.q_net(obs_tensor).numpy()
 
-        # action, _ = self.model.predict(obs, deterministic=True)
+    @property
+    def fallback_rate(self) -> float:
+        """Share of the decisions that fell back to choose_random_move."""
+        if self.times_made_a_choice == 0:
+            return 0.0
+        return self.times_fallback_choice / self.times_made_a_choice
 
-        # order = simple_action_to_order(action, battle)
+    def _order_from_scores(self, battle: Battle, q_values: np.ndarray) -> BattleOrder:
+        """Pick the order of the legal action with the highest Q value."""
+        mask = get_action_order_mask(battle, len(q_values))
+        if mask.any():
+            action = np.argmax(np.where(mask, q_values, -np.inf))
+            order = self.action_to_order(action, battle, strict=False)
+            if not isinstance(order, DefaultBattleOrder):
+                return order
 
         self.times_random_choice += 1
-        # print(">>>> Elige acción por defecto")
+        self.times_fallback_choice += 1
         return self.choose_random_move(battle)
 
     def choose_random_move(self, battle: Battle) -> BattleOrder:
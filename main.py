@@ -1,8 +1,16 @@
 import typer
 import logging
-from environment.server import PokemonShowdownServer
-from commands import train_command, evaluate_command
-from utils.types import RLModel, RLPlayer
+from environment.server import PokemonShowdownServer, ShowdownServerPool
+from commands import (
+    train_command,
+    evaluate_command,
+    record_command,
+    pretrain_command,
+    tournament_command,
+    report_command,
+)
+from environment.local_simulator import DEFAULT_SHOWDOWN_PATH
+from utils.types import Backend, RLModel, RLPlayer, Simulator
 from utils.logging_config import setup_logging, configure_poke_env_logging
 from utils.docker_utils import check_docker_availability
 
@@ -32,18 +40,29 @@ def main(
     NO_DOCKER = no_docker
 
 
-def initialize(no_docker: bool = False):
+def initialize(no_docker: bool = False, servers: int = 1):
     """
     Initialize the environment and server.
 
     Args:
         no_docker: If True, run in manual mode without Docker
+        servers: Number of servers to run on consecutive ports
+
+    Returns:
+        The started server, a ShowdownServerPool when more than one server is
+        requested, or None in manual mode with a single server
     """
     logger = setup_logging()
     logger.info("Initializing the Pokémon RL environment...")
 
     global server
 
+    def manual_pool():
+        if servers == 1:
+            return None
+        logger.info(f"Expecting {servers} servers on ports 8000-{8000 + servers - 1}")
+        return ShowdownServerPool(size=servers, manage_containers=False)
+
     if no_docker:
         logger.info("🔧 MANUAL MODE: Docker integration disabled")
         logger.warning(
@@ -51,7 +70,7 @@ def initialize(no_docker: bool = False):
         )
         logger.info("Please ensure the server is running on the expected port")
         input("Press Enter to continue when the server is ready...")
-        return
+        return manual_pool()
 
     # Check Docker availability
     logger.debug("🐳 Checking Docker availability...")
@@ -69,7 +88,7 @@ def initialize(no_docker: bool = False):
             logger.info("🔧 Switching to manual mode...")
             logger.warning("You need to start the Pokémon Showdown server manually")
             input("Press Enter to continue when the server is ready...")
-            return
+            return manual_pool()
         else:
             logger.error("Exiting. Please install Docker or use --no-docker flag")
             raise typer.Exit(code=1)
@@ -78,7 +97,10 @@ def initialize(no_docker: bool = False):
 
     # Initialize and start server
     try:
-        server = PokemonShowdownServer()
+        if servers > 1:
+            server = ShowdownServerPool(size=servers)
+        else:
+            server = PokemonShowdownServer()
         if not server.is_running():
             if not server.start():
                 logger.error("❌ Failed to start the server")
@@ -88,6 +110,7 @@ def initialize(no_docker: bool = False):
     except Exception as e:
         logger.error(f"❌ An error occurred during server initialization: {e}")
         raise typer.Exit(code=1)
+    return server
 
 
 def cleanup():
@@ -135,6 +158,96 @@ def train(
         "--name",
         help="Custom name for the saved model (default: None, uses model type)",
     ),
+    n_envs: int = typer.Option(
+        1,
+        "--n-envs",
+        help="Number of parallel training environments, each in its own process (default: 1)",
+    ),
+    servers: int = typer.Option(
+        1,
+        "--servers",
+        help="Number of Showdown servers, environments are spread across them (default: 1)",
+    ),
+    simulator: Simulator = typer.Option(
+        Simulator.SERVER,
+        "--simulator",
+        help="Battle backend: a Showdown server, or local simulate-battle processes without server (default: server)",
+    ),
+    showdown_path: str = typer.Option(
+        DEFAULT_SHOWDOWN_PATH,
+        "--showdown-path",
+        help="Pokémon Showdown checkout used by the local simulator",
+    ),
+    self_play: bool = typer.Option(
+        False,
+        "--self-play",
+        help="Drive both sides of every battle with the learning policy, ignoring --opponent",
+    ),
+    league: bool = typer.Option(
+        False,
+        "--league",
+        help="Play against snapshots of the policy, sampled by win rate, alongside --opponent",
+    ),
+    league_freq: int = typer.Option(
+        10_000,
+        "--league-freq",
+        help="Timesteps between two league snapshots (default: 10000)",
+    ),
+    backend: Backend = typer.Option(
+        Backend.SB3,
+        "--backend",
+        help="Training library: stable-baselines3, or RLlib on a local Ray cluster (default: sb3)",
+    ),
+    num_env_runners: int = typer.Option(
+        2,
+        "--num-env-runners",
+        help="RLlib env runner processes collecting rollouts (default: 2)",
+    ),
+    envs_per_runner: int = typer.Option(
+        1,
+        "--envs-per-runner",
+        help="Environments stepped by each RLlib env runner (default: 1)",
+    ),
+    num_learners: int = typer.Option(
+        0,
+        "--num-learners",
+        help="RLlib learner processes, 0 learns in the main process (default: 0)",
+    ),
+    actors: int = typer.Option(
+        0,
+        "--actors",
+        help="Train DQN asynchronously with this many actor processes playing battles while the main process learns, 0 disables it (default: 0)",
+    ),
+    disk_buffer: bool = typer.Option(
+        False,
+        "--disk-buffer",
+        help="Keep the DQN replay buffer in memmap files, reused by the next run with the same name",
+    ),
+    buffer_size: int = typer.Option(
+        1_000_000,
+        "--buffer-size",
+        help="Transitions kept in the DQN replay buffer (default: 1000000)",
+    ),
+    compress_buffer: bool = typer.Option(
+        False,
+        "--compress-buffer",
+        help="Store the DQN replay buffer observations as uint8 codes, decoded exactly",
+    ),
+    checkpoint_freq: int = typer.Option(
+        10_000,
+        "--checkpoint-freq",
+        help="Timesteps between two background checkpoints, 0 disables them (default: 10000)",
+    ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Continue from the latest checkpoint of the run with the same name",
+    ),
+    pretrained: bool = typer.Option(
+        False,
+        "--pretrained",
+        help="Start from the policy of the pretrain command with the same name",
+    ),
 ):
     """
     Train the model with the given name.
@@ -151,6 +264,110 @@ def train(
         opponent=opponent,
         total_timesteps=timesteps,
         name=name,
+        n_envs=n_envs,
+        servers=servers,
+        simulator=simulator,
+        showdown_path=showdown_path,
+        self_play=self_play,
+        league=league,
+        league_freq=league_freq,
+        backend=backend,
+        num_env_runners=num_env_runners,
+        envs_per_runner=envs_per_runner,
+        num_learners=num_learners,
+        actors=actors,
+        disk_buffer=disk_buffer,
+        buffer_size=buffer_size,
+        compress_buffer=compress_buffer,
+        checkpoint_freq=checkpoint_freq,
+        resume=resume,
+        pretrained=pretrained,
+    )
+
+
+@app.command()
+def record(
+    teacher: RLPlayer = typer.Option(
+        RLPlayer.MAX,
+        "--teacher",
+        help="Player recorded playing against itself (default: max)",
+    ),
+    dataset: str = typer.Option(
+        None,
+        "--dataset",
+        help="Name of the dataset, extended if it exists (default: None, uses the teacher)",
+    ),
+    battles: int = typer.Option(
+        1000, "--battles", help="Number of battles to record (default: 1000)"
+    ),
+    workers: int = typer.Option(
+        1,
+        "--workers",
+        help="Number of worker processes playing the battles (default: 1)",
+    ),
+    servers: int = typer.Option(
+        1,
+        "--servers",
+        help="Number of Showdown servers, workers are spread across them (default: 1)",
+    ),
+    simulator: Simulator = typer.Option(
+        Simulator.SERVER,
+        "--simulator",
+        help="Battle backend: a Showdown server, or local simulate-battle processes without server (default: server)",
+    ),
+    showdown_path: str = typer.Option(
+        DEFAULT_SHOWDOWN_PATH,
+        "--showdown-path",
+        help="Pokémon Showdown checkout used by the local simulator",
+    ),
+):
+    """
+    Record the decisions of a heuristic player for behavior cloning.
+    """
+    record_command(
+        teacher=teacher,
+        dataset=dataset,
+        num_battles=battles,
+        workers=workers,
+        initialize_func=initialize,
+        cleanup_func=cleanup,
+        no_docker=NO_DOCKER,
+        servers=servers,
+        simulator=simulator,
+        showdown_path=showdown_path,
+    )
+
+
+@app.command()
+def pretrain(
+    model: RLModel = RLModel.PPO,
+    dataset: str = typer.Option(
+        RLPlayer.MAX.value,
+        "--dataset",
+        help="Name of the recorded dataset (default: max)",
+    ),
+    name: str = typer.Option(
+        None,
+        "--name",
+        help="Name of the run that will use the policy (default: None, uses model type)",
+    ),
+    epochs: int = typer.Option(10, "--epochs", help="Passes over the dataset (default: 10)"),
+    batch_size: int = typer.Option(256, "--batch-size", help="Batch size (default: 256)"),
+    learning_rate: float = typer.Option(
+        1e-3, "--learning-rate", help="Learning rate (default: 0.001)"
+    ),
+):
+    """
+    Initialize the policy of a model by behavior cloning on a recorded dataset.
+    """
+    setup_logging()
+    pretrain_command(
+        model_type=model,
+        dataset=dataset,
+        name=name,
+        epochs=epochs,
+        batch_size=batch_size,
+        learning_rate=learning_rate,
     )
 
 
@@ -172,6 +389,51 @@ def evaluate(
         "--battles",
         help="Number of battles to run for evaluation (default: 1000)",
     ),
+    workers: int = typer.Option(
+        1,
+        "--workers",
+        help="Number of worker processes sharing the battles of each opponent (default: 1)",
+    ),
+    seed: int = typer.Option(
+        None,
+        "--seed",
+        help="Base seed for the battles, battle i uses seed + i (default: None)",
+    ),
+    concurrent: bool = typer.Option(
+        False,
+        "--concurrent",
+        help="Evaluate all opponents at the same time, each on its own environments",
+    ),
+    servers: int = typer.Option(
+        1,
+        "--servers",
+        help="Number of Showdown servers, workers are spread across them (default: 1)",
+    ),
+    target_ci: float = typer.Option(
+        None,
+        "--target-ci",
+        help="Stop each opponent once the win rate interval is narrower than this fraction, or excludes 50%, with --battles as the maximum (default: None, plays every battle)",
+    ),
+    confidence: float = typer.Option(
+        0.95,
+        "--confidence",
+        help="Confidence level of the win rate interval (default: 0.95)",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Play every matchup again instead of reusing the cached results of unchanged models",
+    ),
+    paired: bool = typer.Option(
+        False,
+        "--paired",
+        help="Play --battles / 2 seeded pairs of random-battle teams twice with the teams swapped, and report the paired standard error",
+    ),
+    showdown_path: str = typer.Option(
+        DEFAULT_SHOWDOWN_PATH,
+        "--showdown-path",
+        help="Pokémon Showdown checkout generating the teams of --paired",
+    ),
 ):
     """
     Evaluate the model and generate training progress plots.
@@ -185,6 +447,129 @@ def evaluate(
         opponents=opponents,
         num_battles=battles,
         name=name,
+        workers=workers,
+        seed=seed,
+        concurrent=concurrent,
+        servers=servers,
+        target_ci=target_ci,
+        confidence=confidence,
+        use_cache=not no_cache,
+        paired=paired,
+        showdown_path=showdown_path,
+    )
+
+
+@app.command()
+def tournament(
+    battles: int = typer.Option(
+        100, "--battles", help="Number of battles of each pairing (default: 100)"
+    ),
+    workers: int = typer.Option(
+        1,
+        "--workers",
+        help="Number of worker processes sharing the pairings (default: 1)",
+    ),
+    concurrent_battles: int = typer.Option(
+        10,
+        "--concurrent-battles",
+        help="Battles played at once by each pairing (default: 10)",
+    ),
+    concurrent_pairings: int = typer.Option(
+        4,
+        "--concurrent-pairings",
+        help="Pairings played at once by each worker (default: 4)",
+    ),
+    baselines: list[RLPlayer] = typer.Option(
+        [RLPlayer.RANDOM, RLPlayer.MAX],
+        "--baseline",
+        help="Heuristic players entered alongside the trained models",
+    ),
+    servers: int = typer.Option(
+        1,
+        "--servers",
+        help="Number of Showdown servers, workers are spread across them (default: 1)",
+    ),
+    simulator: Simulator = typer.Option(
+        Simulator.SERVER,
+        "--simulator",
+        help="Battle backend: a Showdown server, or local simulate-battle processes without server (default: server)",
+    ),
+    showdown_path: str = typer.Option(
+        DEFAULT_SHOWDOWN_PATH,
+        "--showdown-path",
+        help="Pokémon Showdown checkout used by the local simulator",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Play every pairing again instead of reusing the stored results",
+    ),
+    batch_size: int = typer.Option(
+        1,
+        "--batch-size",
+        help="Concurrent battles whose decisions a learned player evaluates in one forward pass (default: 1, no batching)",
+    ),
+    max_wait_ms: float = typer.Option(
+        5.0,
+        "--max-wait-ms",
+        help="Maximum time a decision waits for its batch to fill (default: 5 ms)",
+    ),
+):
+    """
+    Play a round-robin tournament between every trained model and rank them by Elo.
+    """
+    tournament_command(
+        initialize_func=initialize,
+        cleanup_func=cleanup,
+        no_docker=NO_DOCKER,
+        num_battles=battles,
+        workers=workers,
+        concurrent_battles=concurrent_battles,
+        concurrent_pairings=concurrent_pairings,
+        baselines=baselines,
+        servers=servers,
+        simulator=simulator,
+        showdown_path=showdown_path,
+        use_cache=not no_cache,
+        batch_size=batch_size,
+        max_wait_ms=max_wait_ms,
+    )
+
+
+@app.command()
+def report(
+    model: RLModel = RLModel.PPO,
+    name: str = typer.Option(
+        None,
+        "--name",
+        help="Name of the model to report (default: None, uses model type)",
+    ),
+    run: str = typer.Option(
+        None,
+        "--run",
+        help="Evaluation run to report (default: None, the latest run)",
+    ),
+    all_runs: bool = typer.Option(
+        False,
+        "--all-runs",
+        help="Pool the battles of every evaluation run",
+    ),
+    confidence: float = typer.Option(
+        0.95,
+        "--confidence",
+        help="Confidence level of the win rate interval (default: 0.95)",
+    ),
+):
+    """
+    Compute the evaluation tables of a model from its battle log, without playing.
+    """
+    setup_logging()
+    report_command(
+        model_type=model,
+        name=name,
+        run=run,
+        all_runs=all_runs,
+        confidence=confidence,
     )
 
 
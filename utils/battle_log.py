@@ -0,0 +1,118 @@
+"""
+Append-only log of every evaluation battle, stored as Parquet part files.
+"""
+
+import os
+import secrets
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.output_utils import get_output_dir
+from utils.types import RLModel
+
+
+BATTLE_LOG_SCHEMA = pa.schema(
+    [
+        ("run", pa.string()),
+        ("opponent", pa.string()),
+        ("battle", pa.int32()),
+        ("paired", pa.bool_()),
+        ("won", pa.bool_()),
+        ("reward", pa.float32()),
+        ("turns", pa.int32()),
+        ("steps", pa.int32()),
+        ("wall_time", pa.float32()),
+        ("decisions_per_second", pa.float32()),
+        ("finished_at", pa.timestamp("s")),
+    ]
+)
+
+
+def get_battle_log_dir(model_type: RLModel, name: str | None = None) -> Path:
+    """Get the battle log directory of a model, creating it if needed."""
+    path = (
+        get_output_dir(task_type="evaluate", model_type=model_type)
+        / f"{name if name else model_type.value}_battles"
+    )
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def make_run_id() -> str:
+    """Identifier of an evaluation run, sorting in chronological order."""
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(2)}"
+
+
+class BattleLogWriter:
+    """
+    Write battle records into Parquet part files of ``batch_size`` records.
+
+    Parts are written under a temporary name starting with ``_``, which
+    Parquet readers skip, and renamed once complete. Several writers can share
+    a directory as long as their prefixes differ, and nothing is ever
+    rewritten, so a long evaluation only costs one small write per batch.
+    """
+
+    def __init__(self, path: str | Path, prefix: str, batch_size: int = 1000, **fields):
+        """
+        Args:
+            path: Directory of the battle log
+            prefix: Prefix of the part files of this writer, unique per run
+            batch_size: Records per part file
+            fields: Fields shared by every record of this writer, such as the
+                run and the opponent
+        """
+        self.path = Path(path)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.fields = fields
+        self.records = 0
+        self._pending: list[dict] = []
+        self._parts = 0
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def add(self, **record):
+        """Add a record with the fields of ``BATTLE_LOG_SCHEMA``, writing a part if needed."""
+        record.setdefault("finished_at", datetime.now())
+        self._pending.append({**self.fields, **record})
+        self.records += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the pending records as a part."""
+        if not self._pending:
+            return
+        part_path = self.path / f"{self.prefix}_{self._parts:05d}.parquet"
+        tmp_path = part_path.with_name(f"_tmp_{part_path.name}")
+        table = pa.Table.from_pylist(self._pending, schema=BATTLE_LOG_SCHEMA)
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, part_path)
+        self._parts += 1
+        self._pending = []
+
+
+def load_battle_log(
+    path: str | Path, columns: list[str] | None = None, run: str | None = None
+) -> pd.DataFrame:
+    """
+    Load the records of a battle log.
+
+    Args:
+        path: Directory of the battle log
+        columns: Columns to read, all of them by default
+        run: Only read the records of this run
+
+    Raises:
+        FileNotFoundError: If the log has no part
+    """
+    path = Path(path)
+    if not any(path.glob("[!_]*.parquet")):
+        raise FileNotFoundError(f"No battle records found in {path}")
+    filters = [("run", "==", run)] if run is not None else None
+    return pd.read_parquet(
+        path, columns=columns, filters=filters, schema=BATTLE_LOG_SCHEMA
+    )
@@ -0,0 +1,201 @@
+"""
+Periodic training checkpoints written in a background thread.
+"""
+
+import io
+import logging
+import os
+import pickle
+import random
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+import torch
+from stable_baselines3.common.callbacks import BaseCallback
+
+from utils.episode_log import count_episode_parts, flush_episode_logs
+from utils.plot_utils import LearningCurvePlotter
+
+
+def get_rng_state() -> dict:
+    """Get the state of the Python, NumPy and PyTorch random generators."""
+    return {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+
+
+def set_rng_state(state: dict):
+    """Restore the random generators from ``get_rng_state``."""
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+
+
+class AsyncCheckpointCallback(BaseCallback):
+    """
+    Save a checkpoint every ``save_freq`` timesteps without stalling training.
+
+    The model, with its optimizer state, is serialized in memory on the
+    training thread, which only takes a copy of the weights. Writing the files
+    is left to a background thread. Each checkpoint is a model zip and a
+    sidecar pickle holding the timesteps, the random generators state and the
+    number of episodes of each part of the episode log at that point. Both are
+    written under a temporary name and renamed once complete, and only the
+    ``keep_last`` latest checkpoints are kept. With a ``plotter``, the
+    learning curve is then updated with the episodes of the checkpoint.
+    """
+
+    def __init__(
+        self,
+        checkpoint_dir: str | Path,
+        save_freq: int,
+        prefix: str,
+        episode_log_dir: str | Path,
+        keep_last: int = 2,
+        plotter: LearningCurvePlotter | None = None,
+        learning_curve_path: str | Path | None = None,
+    ):
+        """
+        Args:
+            checkpoint_dir: Directory of the checkpoints
+            save_freq: Timesteps between two checkpoints
+            prefix: Prefix of the checkpoint files
+            episode_log_dir: Episode log whose parts are recorded
+            keep_last: Number of checkpoints kept on disk
+            plotter: Learning curve updated at every checkpoint
+            learning_curve_path: Path of the learning curve plot
+        """
+        super().__init__()
+        if save_freq < 1:
+            raise ValueError(f"save_freq must be at least 1, got {save_freq}")
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.save_freq = save_freq
+        self.prefix = prefix
+        self.episode_log_dir = Path(episode_log_dir)
+        self.keep_last = keep_last
+        self.plotter = plotter
+        self.learning_curve_path = learning_curve_path
+        self._last_checkpoint = 0
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending: list[Future] = []
+
+    def _on_training_start(self):
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        # Resumed runs count from the checkpoint they started from
+        self._last_checkpoint = self.num_timesteps
+
+    def _on_step(self) -> bool:
+        if self.num_timesteps - self._last_checkpoint >= self.save_freq:
+            self._last_checkpoint = self.num_timesteps
+            self.save()
+        return True
+
+    def _on_training_end(self):
+        self.wait()
+
+    def save(self):
+        """Take a checkpoint now and queue its writing."""
+        buffer = io.BytesIO()
+        self.model.save(buffer)
+        # Every episode until now is written, so the parts hold exactly them
+        flush_episode_logs(self.training_env)
+        state = {
+            "num_timesteps": self.num_timesteps,
+            "rng": get_rng_state(),
+            "episode_parts": count_episode_parts(self.episode_log_dir),
+        }
+        self._pending = [future for future in self._pending if not future.done()]
+        self._pending.append(
+            self._executor.submit(self._write, buffer.getvalue(), state)
+        )
+
+    def wait(self):
+        """Wait until every queued checkpoint is written."""
+        for future in self._pending:
+            future.result()
+        self._pending = []
+
+    def _write(self, model_bytes: bytes, state: dict):
+        steps = state["num_timesteps"]
+        model_path = self.checkpoint_dir / f"{self.prefix}_{steps}_steps.zip"
+        state_path = model_path.with_suffix(".pkl")
+        for path, data in ((model_path, model_bytes), (state_path, pickle.dumps(state))):
+            tmp_path = path.with_name(f"tmp_{path.name}")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        logging.getLogger("Training").info(f"💾 Checkpoint saved at {steps} timesteps")
+
+        for old_path, _ in list_checkpoints(self.checkpoint_dir, self.prefix)[: -self.keep_last]:
+            old_path.unlink(missing_ok=True)
+            old_path.with_suffix(".pkl").unlink(missing_ok=True)
+
+        if self.plotter is not None:
+            # Every episode ending before the checkpoint is in its parts
+            try:
+                self.plotter.update_from_log(self.episode_log_dir, state["episode_parts"])
+                if self.plotter.episodes:
+                    self.plotter.render(self.learning_curve_path)
+            except Exception as e:
+                logging.getLogger("Training").warning(
+                    f"⚠️ Failed to update the learning curve: {e}"
+                )
+
+
+def list_checkpoints(checkpoint_dir: str | Path, prefix: str) -> list[tuple[Path, int]]:
+    """
+    List the complete checkpoints of a run, in the order they were written.
+
+    The sidecar is written last, so its modification time orders the
+    checkpoints. A resumed run can write fewer timesteps than a checkpoint it
+    did not resume from, so the timesteps only break ties.
+
+    Returns:
+        list[tuple[Path, int]]: Model zip path and timesteps of each checkpoint
+    """
+    pattern = re.compile(rf"{re.escape(prefix)}_(\d+)_steps\.zip")
+    checkpoints = []
+    for path in Path(checkpoint_dir).glob(f"{prefix}_*_steps.zip"):
+        match = pattern.fullmatch(path.name)
+        if match and path.with_suffix(".pkl").exists():
+            checkpoints.append((path, int(match.group(1))))
+    return sorted(
+        checkpoints,
+        key=lambda checkpoint: (
+            checkpoint[0].with_suffix(".pkl").stat().st_mtime_ns,
+            checkpoint[1],
+        ),
+    )
+
+
+def clear_checkpoints(checkpoint_dir: str | Path, prefix: str):
+    """
+    Delete the checkpoints of a previous run with the same prefix.
+
+    Unnamed runs share the checkpoint directory of their model type, so a new
+    run must not keep, and later resume from, the checkpoints of the last one.
+    """
+    for path in Path(checkpoint_dir).glob(f"{prefix}_*_steps.*"):
+        path.unlink(missing_ok=True)
+    for path in Path(checkpoint_dir).glob(f"tmp_{prefix}_*_steps.*"):
+        path.unlink(missing_ok=True)
+
+
+def load_latest_checkpoint(checkpoint_dir: str | Path, prefix: str) -> tuple[Path, dict] | None:
+    """
+    Get the latest checkpoint of a run.
+
+    Returns:
+        tuple[Path, dict] | None: Model zip path and sidecar state, or None if
+            the run has no checkpoint
+    """
+    checkpoints = list_checkpoints(checkpoint_dir, prefix)
+    if not checkpoints:
+        return None
+    model_path, _ = checkpoints[-1]
+    with open(model_path.with_suffix(".pkl"), "rb") as f:
+        return model_path, pickle.load(f)
+
@@ -0,0 +1,330 @@
+"""
+Training episode logs, buffered in memory and stored as Parquet part files.
+
+They replace the Monitor CSV files, which write and flush a line per episode
+and must be parsed whole to be read.
+"""
+
+import atexit
+import json
+import os
+import secrets
+import time
+from pathlib import Path
+import gymnasium as gym
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import VecEnv, VecMonitor
+
+
+EPISODE_LOG_SCHEMA = pa.schema(
+    [
+        ("r", pa.float32()),
+        ("l", pa.int32()),
+        ("t", pa.float64()),
+        ("won", pa.bool_()),
+        ("invalid_actions", pa.int32()),
+        ("opponent", pa.dictionary(pa.int16(), pa.string())),
+        ("env_id", pa.int16()),
+    ]
+)
+
+METADATA_FILE = "metadata.json"
+
+
+def prepare_episode_log(path: str | Path, resume: bool = False) -> float:
+    """
+    Create the episode log directory of a run.
+
+    A new run deletes the parts of the previous one. A resumed run keeps
+    them, and its episode times continue from the start of the first run.
+
+    Returns:
+        float: Start time of the run, the origin of the episode times
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    metadata_path = path / METADATA_FILE
+    if resume and metadata_path.exists():
+        with open(metadata_path) as f:
+            return json.load(f)["t_start"]
+
+    for old_part in path.glob("*.parquet"):
+        old_part.unlink()
+    t_start = time.time()
+    with open(metadata_path, "w") as f:
+        json.dump({"t_start": t_start}, f)
+    return t_start
+
+
+def list_episode_parts(path: str | Path) -> list[str]:
+    """Names of the complete parts of an episode log."""
+    return sorted(part.name for part in Path(path).glob("[!_]*.parquet"))
+
+
+def count_episode_parts(path: str | Path) -> dict[str, int]:
+    """Number of episodes of each complete part of an episode log."""
+    return {
+        part: pq.read_metadata(Path(path) / part).num_rows for part in list_episode_parts(path)
+    }
+
+
+def restore_episode_log(path: str | Path, parts: dict[str, int]):
+    """
+    Bring an episode log back to the state of a checkpoint.
+
+    Parts written after the checkpoint are deleted, and parts that grew since
+    are cut back to the episodes they held then. Episodes logged after the
+    checkpoint are dropped, as the resumed model has not learned from them.
+
+    Args:
+        path: Directory of the episode log
+        parts: Episodes of each part at the checkpoint, see
+            ``count_episode_parts``
+    """
+    path = Path(path)
+    for part, rows in count_episode_parts(path).items():
+        if part not in parts:
+            (path / part).unlink()
+        elif rows > parts[part]:
+            table = pq.read_table(path / part, schema=EPISODE_LOG_SCHEMA)
+            tmp_path = path / f"_tmp_{part}"
+            pq.write_table(table.slice(0, parts[part]), tmp_path)
+            os.replace(tmp_path, path / part)
+
+
+def load_episode_log(path: str | Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Load the episodes of a run, in the order they ended.
+
+    Only the requested ``columns`` are read from the files, the episode time
+    ``t`` being added for the ordering.
+
+    Args:
+        path: Directory of the episode log
+        columns: Columns to return, all of them by default
+
+    Raises:
+        FileNotFoundError: If the log has no part
+    """
+    path = Path(path)
+    parts = [path / part for part in list_episode_parts(path)]
+    if not parts:
+        raise FileNotFoundError(f"No episodes found in {path}")
+    read_columns = None if columns is None else list(dict.fromkeys([*columns, "t"]))
+    df = pq.read_table(parts, columns=read_columns, schema=EPISODE_LOG_SCHEMA).to_pandas()
+    df = df.sort_values("t", kind="stable", ignore_index=True)
+    return df if columns is None else df[columns]
+
+
+def load_new_episodes(
+    path: str | Path, rows: dict[str, tuple[int, int]], columns: list[str]
+) -> pd.DataFrame:
+    """
+    Load a range of episodes of each part, in the order they ended.
+
+    Args:
+        path: Directory of the episode log
+        rows: Start and stop of the episodes read from each part
+        columns: Columns to return, the episode time ``t`` being added
+    """
+    read_columns = list(dict.fromkeys([*columns, "t"]))
+    tables = [
+        pq.read_table(Path(path) / part, columns=read_columns, schema=EPISODE_LOG_SCHEMA).slice(
+            start, stop - start
+        )
+        for part, (start, stop) in rows.items()
+    ]
+    if not tables:
+        return pd.DataFrame(columns=read_columns)
+    df = pa.concat_tables(tables).to_pandas()
+    return df.sort_values("t", kind="stable", ignore_index=True)
+
+
+class EpisodeLogWriter:
+    """
+    Buffer episode records column by column, and write them by chunks.
+
+    Each chunk is a part file of the log directory, written under a temporary
+    name starting with ``_``, which Parquet readers skip, and renamed once
+    complete. Flushing a chunk that is not full yet, as checkpoints do,
+    rewrites its part with the episodes so far instead of starting a new one,
+    so parts keep ``chunk_size`` episodes however often the log is flushed.
+    Every writer gets a random prefix, so the writers of all the environments,
+    and of resumed runs, share the directory. Pending episodes are also
+    written when the process exits, which saves those of the environment
+    workers stopped by a Ctrl+C.
+    """
+
+    def __init__(self, path: str | Path, env_id: int = 0, chunk_size: int = 10_000):
+        """
+        Args:
+            path: Directory of the episode log
+            env_id: Index of the environment of the records
+            chunk_size: Episodes per part file
+        """
+        self.path = Path(path)
+        self.env_id = env_id
+        self.chunk_size = chunk_size
+        self.prefix = f"{env_id:03d}_{secrets.token_hex(4)}"
+        self._columns: dict[str, list] = {name: [] for name in EPISODE_LOG_SCHEMA.names}
+        self._parts = 0
+        self._written = 0
+        self.path.mkdir(parents=True, exist_ok=True)
+        atexit.register(self.flush)
+
+    def add(
+        self,
+        reward: float,
+        length: int,
+        t: float,
+        won: bool,
+        invalid_actions: int,
+        opponent: str,
+    ):
+        """Add an episode, writing a part once ``chunk_size`` episodes are pending."""
+        for name, value in (
+            ("r", reward),
+            ("l", length),
+            ("t", t),
+            ("won", won),
+            ("invalid_actions", invalid_actions),
+            ("opponent", opponent),
+            ("env_id", self.env_id),
+        ):
+            self._columns[name].append(value)
+        if len(self._columns["r"]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write the episodes of the current chunk, starting a new one if it is full."""
+        episodes = len(self._columns["r"])
+        if episodes > self._written:
+            part_path = self.path / f"{self.prefix}_{self._parts:05d}.parquet"
+            tmp_path = part_path.with_name(f"_tmp_{part_path.name}")
+            pq.write_table(pa.table(self._columns, schema=EPISODE_LOG_SCHEMA), tmp_path)
+            os.replace(tmp_path, part_path)
+            self._written = episodes
+        if episodes >= self.chunk_size:
+            self._parts += 1
+            self._written = 0
+            self._columns = {name: [] for name in EPISODE_LOG_SCHEMA.names}
+
+
+class EpisodeLogger(Monitor):
+    """
+    Monitor writing its episodes to an episode log instead of a CSV file.
+
+    The ``episode`` info read by Stable Baselines is unchanged. The result of
+    the battle is taken from the env when it exposes it, and from the sign
+    of the episode reward otherwise.
+    """
+
+    def __init__(
+        self,
+        env: gym.Env,
+        path: str | Path,
+        env_id: int = 0,
+        opponent: str = "",
+        t_start: float | None = None,
+        chunk_size: int = 10_000,
+    ):
+        """
+        Args:
+            env: Environment to monitor
+            path: Directory of the episode log
+            env_id: Index of the environment inside the vectorized env
+            opponent: Name of the opponent, recorded with every episode
+            t_start: Origin of the episode times, shared by every environment
+                of the run, see ``prepare_episode_log``
+            chunk_size: Episodes per part file
+        """
+        super().__init__(env, allow_early_resets=True, info_keywords=("invalid_actions",))
+        if t_start is not None:
+            self.t_start = t_start
+        self.opponent = opponent
+        self.writer = EpisodeLogWriter(path, env_id=env_id, chunk_size=chunk_size)
+
+    def step(self, action):
+        observation, reward, terminated, truncated, info = super().step(action)
+        if terminated or truncated:
+            episode = info["episode"]
+            battle = getattr(getattr(self.env, "env", None), "battle1", None)
+            won = bool(battle.won) if battle is not None and battle.finished else episode["r"] > 0
+            self.writer.add(
+                episode["r"],
+                episode["l"],
+                episode["t"],
+                won,
+                episode["invalid_actions"],
+                self.opponent,
+            )
+        return observation, reward, terminated, truncated, info
+
+    def flush(self):
+        """Write the pending episodes, see ``flush_episode_logs``."""
+        self.writer.flush()
+
+    def close(self):
+        self.writer.flush()
+        super().close()
+
+
+class VecEpisodeLogger(VecMonitor):
+    """
+    VecMonitor writing the episodes of all its environments to an episode log.
+
+    Environments are reset as soon as their episode ends, so the result of
+    the battle is the sign of the episode reward.
+    """
+
+    def __init__(
+        self,
+        venv: VecEnv,
+        path: str | Path,
+        opponent: str = "",
+        t_start: float | None = None,
+        chunk_size: int = 10_000,
+    ):
+        super().__init__(venv, info_keywords=("invalid_actions",))
+        if t_start is not None:
+            self.t_start = t_start
+        self.opponent = opponent
+        self.writers = [
+            EpisodeLogWriter(path, env_id=env_id, chunk_size=chunk_size)
+            for env_id in range(venv.num_envs)
+        ]
+
+    def step_wait(self):
+        obs, rewards, dones, infos = super().step_wait()
+        for env_id in np.flatnonzero(dones):
+            episode = infos[env_id]["episode"]
+            self.writers[env_id].add(
+                float(episode["r"]),
+                int(episode["l"]),
+                episode["t"],
+                episode["r"] > 0,
+                episode["invalid_actions"],
+                self.opponent,
+            )
+        return obs, rewards, dones, infos
+
+    def flush(self):
+        """Write the pending episodes, see ``flush_episode_logs``."""
+        for writer in self.writers:
+            writer.flush()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+def flush_episode_logs(env: VecEnv):
+    """Write the pending episodes of every environment of a training env."""
+    if isinstance(env, VecEpisodeLogger):
+        env.flush()
+    elif any(env.env_is_wrapped(EpisodeLogger)):
+        env.env_method("flush")
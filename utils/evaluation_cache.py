@@ -0,0 +1,217 @@
+"""
+Cache of evaluation results, keyed by the content of the matchup.
+"""
+
+import hashlib
+import json
+import sqlite3
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from utils.output_utils import get_output_dir
+
+
+def file_hash(path: str | Path) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class EvaluationCache:
+    """
+    SQLite table of the results of past evaluations.
+
+    A matchup is identified by the hash of the model file, the opponent and
+    the hash of its model if it has one, the battle format, the number of
+    battles and the options changing which battles are played. Retraining
+    either model changes its hash, so stale results are never served.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        """
+        Args:
+            path: SQLite file, defaults to ``outputs/evaluate/cache.sqlite``
+        """
+        self.path = Path(path) if path else get_output_dir(task_type="evaluate") / "cache.sqlite"
+        with self._connect() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS evaluations (
+                    key TEXT PRIMARY KEY,
+                    model_hash TEXT NOT NULL,
+                    opponent TEXT NOT NULL,
+                    opponent_hash TEXT,
+                    battle_format TEXT NOT NULL,
+                    num_battles INTEGER NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection in a transaction, closed once it is committed."""
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            yield connection
+
+    @staticmethod
+    def make_key(
+        model_hash: str,
+        opponent: str,
+        opponent_hash: str | None,
+        battle_format: str,
+        num_battles: int,
+        **options,
+    ) -> str:
+        """
+        Key of a matchup.
+
+        Args:
+            model_hash: Hash of the evaluated model file
+            opponent: Identity of the opponent
+            opponent_hash: Hash of the opponent model file, if any
+            battle_format: Battle format played
+            num_battles: Number of battles requested
+            options: Other settings changing the result, such as the seed
+        """
+        identity = {
+            "model_hash": model_hash,
+            "opponent": opponent,
+            "opponent_hash": opponent_hash,
+            "battle_format": battle_format,
+            "num_battles": num_battles,
+            "options": options,
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        """Get the cached result of a matchup, or None if it never ran."""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT result FROM evaluations WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(
+        self,
+        key: str,
+        result: dict,
+        model_hash: str,
+        opponent: str,
+        opponent_hash: str | None,
+        battle_format: str,
+        num_battles: int,
+    ):
+        """Store the result of a matchup, replacing any previous one."""
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    model_hash,
+                    opponent,
+                    opponent_hash,
+                    battle_format,
+                    num_battles,
+                    json.dumps(result),
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+
+
+class PairingCache:
+    """
+    SQLite table of the results of the tournament pairings.
+
+    Players are identified by content, the hash of their model file or the
+    name of a heuristic player, and each pairing is stored once, with its
+    players in sorted order.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        """
+        Args:
+            path: SQLite file, defaults to ``outputs/evaluate/cache.sqlite``
+        """
+        self.path = Path(path) if path else get_output_dir(task_type="evaluate") / "cache.sqlite"
+        with self._connect() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pairings (
+                    player_a TEXT NOT NULL,
+                    player_b TEXT NOT NULL,
+                    battle_format TEXT NOT NULL,
+                    num_battles INTEGER NOT NULL,
+                    wins_a INTEGER NOT NULL,
+                    wins_b INTEGER NOT NULL,
+                    battles INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (player_a, player_b, battle_format, num_battles)
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection in a transaction, closed once it is committed."""
+        # Tournament workers write their pairings concurrently
+        with closing(sqlite3.connect(self.path, timeout=60)) as connection, connection:
+            yield connection
+
+    def get(
+        self, player_a: str, player_b: str, battle_format: str, num_battles: int
+    ) -> tuple[int, int, int] | None:
+        """
+        Get the result of a pairing.
+
+        Returns:
+            tuple[int, int, int] | None: Wins of each player and battles
+                played, or None if the pairing never ran
+        """
+        swapped = player_b < player_a
+        if swapped:
+            player_a, player_b = player_b, player_a
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT wins_a, wins_b, battles FROM pairings WHERE player_a = ? "
+                "AND player_b = ? AND battle_format = ? AND num_battles = ?",
+                (player_a, player_b, battle_format, num_battles),
+            ).fetchone()
+        if row is None:
+            return None
+        wins_a, wins_b, battles = row
+        return (wins_b, wins_a, battles) if swapped else (wins_a, wins_b, battles)
+
+    def put(
+        self,
+        player_a: str,
+        player_b: str,
+        battle_format: str,
+        num_battles: int,
+        wins_a: int,
+        wins_b: int,
+        battles: int,
+    ):
+        """Store the result of a pairing, replacing any previous one."""
+        if player_b < player_a:
+            player_a, player_b, wins_a, wins_b = player_b, player_a, wins_b, wins_a
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO pairings VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    player_a,
+                    player_b,
+                    battle_format,
+                    num_battles,
+                    wins_a,
+                    wins_b,
+                    battles,
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
@@ -2,11 +2,160 @@
 Table utilities for evaluation results.
 """
 
+import math
+from statistics import NormalDist
+import numpy as np
 import pandas as pd
 from utils.types import RLModel
 from utils.output_utils import get_output_dir
 
 
+def wilson_interval(wins: int, battles: int, confidence: float = 0.95) -> tuple[float, float]:
+    """
+    Wilson score interval of a win rate.
+
+    Unlike the normal approximation, it stays inside [0, 1] and keeps a
+    sensible width for win rates close to 0 or 1 and few battles.
+
+    Returns:
+        tuple[float, float]: Lower and upper bounds, (0, 1) without battles
+    """
+    if battles == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = wins / battles
+    denominator = 1 + z**2 / battles
+    center = (p + z**2 / (2 * battles)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / battles + z**2 / (4 * battles**2)) / denominator
+    return max(center - margin, 0.0), min(center + margin, 1.0)
+
+
+def paired_win_rate(
+    wins: list[bool], confidence: float = 0.95
+) -> tuple[float, float, tuple[float, float]]:
+    """
+    Win rate of a paired evaluation and its paired standard error.
+
+    Battles ``2k`` and ``2k + 1`` play the same teams with the sides swapped,
+    so the win rate is the mean of the score of each pair, and its standard
+    error only comes from the variance between pairs. The luck of the team
+    draw, shared by both battles of a pair, cancels out.
+
+    Args:
+        wins: Result of each battle, in pair order
+        confidence: Confidence level of the interval
+
+    Returns:
+        tuple[float, float, tuple[float, float]]: Win rate, its standard error
+            and its normal confidence interval, as fractions
+
+    Raises:
+        ValueError: If a pair is incomplete
+    """
+    if len(wins) % 2:
+        raise ValueError(f"A paired evaluation needs an even number of battles, got {len(wins)}")
+    pair_scores = np.asarray(wins, dtype=np.float64).reshape(-1, 2).mean(axis=1)
+    if len(pair_scores) == 0:
+        return 0.0, math.nan, (0.0, 1.0)
+    win_rate = float(pair_scores.mean())
+    if len(pair_scores) < 2:
+        return win_rate, math.nan, (0.0, 1.0)
+    standard_error = float(pair_scores.std(ddof=1) / math.sqrt(len(pair_scores)))
+    margin = NormalDist().inv_cdf(0.5 + confidence / 2) * standard_error
+    return win_rate, standard_error, (max(win_rate - margin, 0.0), min(win_rate + margin, 1.0))
+
+
+def bradley_terry_elo(
+    scores: np.ndarray,
+    games: np.ndarray,
+    prior_games: float = 1.0,
+    mean_rating: float = 1500.0,
+    max_iterations: int = 10_000,
+    tolerance: float = 1e-10,
+) -> np.ndarray:
+    """
+    Elo ratings fitted by maximum likelihood of the Bradley-Terry model.
+
+    Unlike incremental Elo updates, the fit does not depend on the order of
+    the battles. The strengths are found with the MM algorithm of Hunter
+    (2004). Every played pairing gets ``prior_games`` virtual drawn games, so
+    players that won or lost all their battles keep finite ratings.
+
+    Args:
+        scores: Matrix of the score of player i against player j, wins plus
+            half the ties
+        games: Symmetric matrix of the battles between players i and j
+        prior_games: Virtual drawn games added to every played pairing
+        mean_rating: Mean of the returned ratings
+        max_iterations: Maximum number of MM iterations
+        tolerance: Largest change of the log-strengths to stop at
+
+    Returns:
+        np.ndarray: Elo rating of each player, 400 points standing for 10:1 odds
+    """
+    played = games > 0
+    scores = scores + played * prior_games / 2
+    games = games + played * prior_games
+    total_scores = scores.sum(axis=1)
+    strengths = np.ones(len(scores))
+    for _ in range(max_iterations):
+        denominators = (games / (strengths[:, None] + strengths[None, :])).sum(axis=1)
+        updated = np.where(denominators > 0, total_scores / np.maximum(denominators, 1e-300), 1.0)
+        updated /= np.exp(np.mean(np.log(updated)))
+        converged = np.max(np.abs(np.log(updated) - np.log(strengths))) < tolerance
+        strengths = updated
+        if converged:
+            break
+    ratings = 400 * np.log10(strengths)
+    return ratings - ratings.mean() + mean_rating
+
+
+class SequentialStopping:
+    """
+    Rule stopping an evaluation once its win rate is known well enough.
+
+    After at least ``min_battles`` battles, the evaluation stops when the
+    Wilson interval is narrower than ``target_ci``, or when the outcome is
+    decided: a wider interval lies entirely above or below ``threshold``.
+    As the decision is checked after every battle, its interval at battle n
+    uses the error rate ``alpha * min_battles / (n * (n + 1))``, which sum to
+    ``alpha`` over all the checks. A fixed interval would decide a 50% win
+    rate wrongly about a third of the time.
+    """
+
+    def __init__(
+        self,
+        target_ci: float,
+        threshold: float = 0.5,
+        confidence: float = 0.95,
+        min_battles: int = 30,
+    ):
+        """
+        Args:
+            target_ci: Width of the interval to reach, as a fraction
+            threshold: Win rate whose crossing decides the outcome
+            confidence: Confidence level of the interval
+            min_battles: Battles played before the first check
+        """
+        if not 0 < target_ci <= 1:
+            raise ValueError(f"target_ci must be in (0, 1], got {target_ci}")
+        self.target_ci = target_ci
+        self.threshold = threshold
+        self.confidence = confidence
+        self.min_battles = min_battles
+
+    def should_stop(self, wins: int, battles: int) -> bool:
+        """Whether the evaluation can stop after ``battles`` battles."""
+        if battles < self.min_battles:
+            return False
+        low, high = wilson_interval(wins, battles, self.confidence)
+        if high - low <= self.target_ci:
+            return True
+        alpha = (1 - self.confidence) * self.min_battles / (battles * (battles + 1))
+        low, high = wilson_interval(wins, battles, 1 - alpha)
+        return low > self.threshold or high < self.threshold
+
+
 class EvaluationResults:
     """
     Class to handle evaluation results.
@@ -25,9 +174,20 @@ class EvaluationResults:
         total_battles: int,
         mean_reward: float,
         std_reward: float,
+        win_rate_ci: tuple[float, float] | None = None,
+        win_rate_se: float | None = None,
     ):
         """
         Add a new evaluation result.
+
+        Args:
+            opponent_name: Display name of the opponent
+            battles_won: Battles won by the model
+            total_battles: Battles actually played
+            mean_reward: Mean reward per battle
+            std_reward: Standard deviation of the reward per battle
+            win_rate_ci: Confidence interval of the win rate, as fractions
+            win_rate_se: Paired standard error of the win rate, as a fraction
         """
         win_rate = (battles_won / total_battles) * 100 if total_battles > 0 else 0
         loss_rate = (
@@ -44,6 +204,9 @@ class EvaluationResults:
             "loss_rate": loss_rate,
             "mean_reward": mean_reward,
             "std_reward": std_reward,
+            "win_rate_ci_low": win_rate_ci[0] * 100 if win_rate_ci else None,
+            "win_rate_ci_high": win_rate_ci[1] * 100 if win_rate_ci else None,
+            "win_rate_se": win_rate_se * 100 if win_rate_se is not None else None,
         }
         self.results.append(result)
 
@@ -77,6 +240,8 @@ class EvaluationResults:
                 "Total Battles",
                 "Battles Won",
                 "Win Rate (%)",
+                "Win Rate CI (%)",
+                "Paired SE (%)",
                 "Loss Rate (%)",
                 "Mean Reward",
                 "Std Reward",
@@ -87,6 +252,16 @@ class EvaluationResults:
                 result.get("total_battles", 0),
                 result.get("battles_won", 0),
                 f"{result.get('win_rate', 0):.1f}%",
+                (
+                    f"{result['win_rate_ci_low']:.1f}-{result['win_rate_ci_high']:.1f}%"
+                    if result.get("win_rate_ci_low") is not None
+                    else "n/a"
+                ),
+                (
+                    f"{result['win_rate_se']:.2f}%"
+                    if result.get("win_rate_se") is not None
+                    else "n/a"
+                ),
                 f"{result.get('loss_rate', 0):.1f}%",
                 f"{result.get('mean_reward', 0):.2f}",
                 f"{result.get('std_reward', 0):.2f}",
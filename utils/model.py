@@ -2,6 +2,7 @@ import numpy as np
 from poke_env.player import DefaultBattleOrder, ForfeitBattleOrder, Player, BattleOrder
 from poke_env.environment import Pokemon, Battle, Move
 from tabulate import tabulate
+from utils.type_chart import damage_multipliers
 
 def simple_embed_battle(battle: Battle):
         # -1 indicates that the move does not have a base power
@@ -14,8 +15,10 @@ def simple_embed_battle(battle: Battle):
             moves_base_power[i] = (
                 move.base_power / 100
             )  # Simple rescaling to facilitate learning
-            if move.type:
-                moves_dmg_multiplier[i] = battle.opponent_active_pokemon.damage_multiplier(move)
+        if battle.available_moves:
+            moves_dmg_multiplier[: len(battle.available_moves)] = damage_multipliers(
+                battle.gen, battle.opponent_active_pokemon, battle.available_moves
+            )
 
         # We count how many pokemons have fainted in each team
         fainted_mon_team = len([mon for mon in battle.team.values() if mon.fainted]) / 6
@@ -130,6 +133,97 @@ def get_valid_actions(battle: Battle) -> list[int]:
 
     return valid_actions
 
+def get_action_order_mask(battle: Battle, n_actions: int = 26) -> np.ndarray:
+    """
+    Mask of the actions that simple_action_to_order turns into a valid order.
+
+    Mirrors its checks: actions 0-5 pick one of the available switches, the
+    others pick move ``(action - 6) % 4`` of the active pokémon.
+
+    Args:
+        battle: Current battle
+        n_actions: Size of the action space
+
+    Returns:
+        np.ndarray: Boolean mask of length ``n_actions``
+    """
+    mask = np.zeros(n_actions, dtype=bool)
+
+    if not battle.trapped:
+        mask[: min(6, len(battle.available_switches), n_actions)] = True
+
+    if not battle.force_switch and battle.active_pokemon is not None:
+        mvs = (
+            battle.available_moves
+            if len(battle.available_moves) == 1
+            and battle.available_moves[0].id in ["struggle", "recharge"]
+            else list(battle.active_pokemon.moves.values())
+        )
+        available_ids = {m.id for m in battle.available_moves}
+        for action in range(6, n_actions):
+            move_idx = (action - 6) % 4
+            mask[action] = move_idx < len(mvs) and mvs[move_idx].id in available_ids
+
+    return mask
+
+def get_env_action_mask(battle: Battle | None, n_actions: int = 26) -> np.ndarray:
+    """
+    Mask of the legal actions of the env action space.
+
+    Mirrors the checks of SinglesEnv.action_to_order: actions 0-5 switch to the
+    pokémon at that position of the team, the others use move
+    ``(action - 6) % 4`` of the active pokémon with the gimmick of their block
+    (none, mega, z-move, dynamax, terastallize).
+
+    Args:
+        battle: Current battle, or None before the first request
+        n_actions: Size of the action space
+
+    Returns:
+        np.ndarray: Boolean mask of length ``n_actions``. Every action is
+            allowed when none is legal, so a masked policy can still act
+    """
+    mask = np.zeros(n_actions, dtype=bool)
+    if battle is None:
+        mask[:] = True
+        return mask
+
+    if not battle.trapped:
+        switches = {p.base_species for p in battle.available_switches}
+        for i, pokemon in enumerate(list(battle.team.values())[: min(6, n_actions)]):
+            mask[i] = pokemon.base_species in switches
+
+    if not battle.force_switch and battle.active_pokemon is not None:
+        mvs = (
+            battle.available_moves
+            if len(battle.available_moves) == 1
+            and battle.available_moves[0].id in ["struggle", "recharge"]
+            else list(battle.active_pokemon.moves.values())
+        )
+        available_ids = {m.id for m in battle.available_moves}
+        gimmicks = [
+            True,
+            battle.can_mega_evolve,
+            battle.can_z_move,
+            battle.can_dynamax,
+            battle.can_tera is not None,
+        ]
+        for action in range(6, n_actions):
+            move_idx = (action - 6) % 4
+            gimmick = (action - 6) // 4
+            if move_idx >= len(mvs) or mvs[move_idx].id not in available_ids:
+                continue
+            if gimmick == 2:
+                mask[action] = gimmick < len(gimmicks) and battle.can_z_move and (
+                    mvs[move_idx] in battle.active_pokemon.available_z_moves
+                )
+            else:
+                mask[action] = gimmick < len(gimmicks) and gimmicks[gimmick]
+
+    if not mask.any():
+        mask[:] = True
+    return mask
+
 # Método estático de SinglesEnv
 def simple_order_to_action(
         order: BattleOrder, battle: Battle, fake: bool = False, strict: bool = True
@@ -2,8 +2,13 @@
 Model management utilities for the Pokémon RL project.
 """
 
+import numpy as np
 from datetime import datetime
 from pathlib import Path
+from stable_baselines3 import PPO, DQN
+from stable_baselines3.common.base_class import BaseAlgorithm
+from stable_baselines3.common.buffers import ReplayBuffer
+from utils.episode_log import load_episode_log
 from utils.types import RLModel
 from utils.output_utils import get_output_dir
 
@@ -18,6 +23,55 @@ def get_model_path(model_type: RLModel):
     )
 
 
+# Replaces the replay buffer saved with a DQN, such as the memmap buffer of a
+# training run, with a minimal in-memory one when the model only plays
+DQN_INFERENCE_OBJECTS = {
+    "replay_buffer_class": ReplayBuffer,
+    "replay_buffer_kwargs": {},
+    "buffer_size": 1,
+}
+
+
+def load_model(model_type: RLModel, model_path: str | Path, env=None) -> BaseAlgorithm:
+    """
+    Load a trained model for inference, or to continue training on ``env``.
+
+    A DQN loaded for inference does not rebuild the replay buffer of its
+    training run, see ``DQN_INFERENCE_OBJECTS``.
+
+    Raises:
+        ValueError: If loading the model type is not implemented
+    """
+    if model_type == RLModel.PPO:
+        return PPO.load(model_path, env=env, device="cpu")
+    elif model_type == RLModel.DQN:
+        custom_objects = DQN_INFERENCE_OBJECTS if env is None else None
+        return DQN.load(model_path, env=env, custom_objects=custom_objects)
+    elif model_type == RLModel.MASKABLE_PPO:
+        from sb3_contrib import MaskablePPO
+
+        return MaskablePPO.load(model_path, env=env, device="cpu")
+    raise ValueError(f"Model type {model_type.value} evaluation not implemented yet")
+
+
+def load_pretrained_policy(model: BaseAlgorithm, model_type: RLModel, model_path: str | Path):
+    """
+    Copy the policy weights of a pretrained model into a new model.
+
+    Only the weights are copied, the model keeps its own hyperparameters,
+    optimizer and replay buffer.
+
+    Raises:
+        FileNotFoundError: If the pretrained model does not exist
+    """
+    if not Path(model_path).exists():
+        raise FileNotFoundError(
+            f"Pretrained model not found at {model_path}, run the pretrain command first"
+        )
+    pretrained = load_model(model_type, model_path)
+    model.policy.load_state_dict(pretrained.policy.state_dict())
+
+
 def get_monitor_dir():
     """
     Get the monitor directory path for training logs.
@@ -39,3 +93,41 @@ def get_monitor_file_path():
     """
     monitor_dir = get_monitor_dir()
     return monitor_dir / "latest"
+
+
+def summarize_sample_efficiency(
+    episode_log_dir: str | Path, window: int = 100, target_win_rate: float = 0.5
+) -> dict:
+    """
+    Summarize how efficiently a run used its environment steps.
+
+    Only the length, result and invalid actions columns of the episode log
+    are read.
+
+    Args:
+        episode_log_dir: Episode log of the run
+        window: Number of episodes of the rolling win rate
+        target_win_rate: Win rate whose first crossing is reported
+
+    Returns:
+        dict: ``episodes``, ``timesteps``, ``invalid_action_rate`` (None if the
+            monitor does not record it), ``final_win_rate`` over the last
+            ``window`` episodes and ``timesteps_to_target`` (None if the
+            rolling win rate never reached ``target_win_rate``)
+    """
+    df = load_episode_log(episode_log_dir, columns=["l", "won", "invalid_actions"])
+    steps = df["l"].to_numpy(np.int64).cumsum()
+    win_rate = df["won"].rolling(window, min_periods=window).mean().to_numpy()
+    reached = np.flatnonzero(win_rate >= target_win_rate)
+
+    invalid_action_rate = None
+    if steps.size:
+        invalid_action_rate = df["invalid_actions"].sum() / steps[-1]
+
+    return {
+        "episodes": len(df),
+        "timesteps": int(steps[-1]) if steps.size else 0,
+        "invalid_action_rate": invalid_action_rate,
+        "final_win_rate": df["won"].tail(window).mean() if len(df) else 0.0,
+        "timesteps_to_target": int(steps[reached[0]]) if reached.size else None,
+    }
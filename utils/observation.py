@@ -0,0 +1,256 @@
+"""
+Observation builder writing into preallocated buffers.
+"""
+
+from functools import lru_cache
+from typing import Sequence
+import numpy as np
+from gymnasium import spaces
+from poke_env.environment import AbstractBattle
+
+from utils.type_chart import defender_matchups, move_type_id
+
+
+# Base powers and multipliers of the four move slots when no move is available
+_NO_MOVES = [-1.0] * 4 + [1.0] * 4
+
+# Events that can faint or revive a pokémon
+_FAINT_EVENTS = {"faint", "-damage", "-heal"}
+
+
+class FaintTracker:
+    """
+    Count the fainted pokémon of both teams from the battle events.
+
+    Events are read from ``battle.observations`` and
+    ``battle.current_observation``, resuming where the previous update stopped,
+    so each event is only looked at once per battle.
+    """
+
+    def __init__(self, battle: AbstractBattle):
+        self.battle = battle
+        self.fainted: set[str] = set()
+        self.team = 0
+        self.opponent = 0
+        self._turn = 0
+        self._observation = None
+        self._index = 0
+
+    def update(self) -> tuple[int, int]:
+        """
+        Process the events received since the last update.
+
+        Returns:
+            tuple[int, int]: Fainted pokémon of the player and of the opponent
+        """
+        battle = self.battle
+        current = battle.current_observation
+        if self._observation is not current:
+            # Finish the turns recorded since the last update
+            for turn in range(self._turn, battle.turn):
+                observation = battle.observations.get(turn)
+                if observation is None:
+                    continue
+                start = self._index if observation is self._observation else 0
+                self._process(observation.events, start)
+            self._observation, self._index, self._turn = current, 0, battle.turn
+        self._index = self._process(current.events, self._index)
+        return self.team, self.opponent
+
+    def _process(self, events: list[list[str]], start: int) -> int:
+        for i in range(start, len(events)):
+            event = events[i]
+            if len(event) < 3 or event[1] not in _FAINT_EVENTS:
+                continue
+            if event[1] == "faint":
+                self._set_fainted(event[2], True)
+            elif len(event) < 4:
+                continue
+            elif event[1] == "-damage":
+                if event[3] == "0 fnt":
+                    self._set_fainted(event[2], True)
+            elif event[3] != "0 fnt":
+                # Revived pokémon (Revival Blessing) are healed from fainted
+                self._set_fainted(event[2], False)
+        return len(events)
+
+    def _set_fainted(self, identifier: str, fainted: bool):
+        # Same identifier normalization as AbstractBattle.get_pokemon
+        if identifier[3] != " ":
+            identifier = identifier[:2] + identifier[3:]
+        if (identifier in self.fainted) == fainted:
+            return
+        delta = 1 if fainted else -1
+        if fainted:
+            self.fainted.add(identifier)
+        else:
+            self.fainted.discard(identifier)
+        if identifier[:2] == self.battle.player_role:
+            self.team += delta
+        else:
+            self.opponent += delta
+
+
+class _SideBuffers:
+    """Buffers and fainted counts of the battles of one player."""
+
+    def __init__(self, size: int, n_buffers: int):
+        self.buffers = np.empty((n_buffers, size), dtype=np.float32)
+        self.next_buffer = 0
+        self.tracker: FaintTracker | None = None
+        # Python scratch values, copied to the buffer with a single NumPy call
+        self.values = [0.0] * size
+
+
+class ObservationBuilder:
+    """
+    Build the observations of ``simple_embed_battle`` without allocating them.
+
+    Each player writes into its own preallocated buffers, used in turn. The
+    returned array stays valid until ``n_buffers`` more observations have been
+    built for the same player, which is enough for SB3: vectorized envs copy
+    the observations, except for the terminal one which is read before the
+    next step.
+    """
+
+    OBSERVATION_SIZE = 10
+
+    def __init__(self, n_buffers: int = 2):
+        self.n_buffers = n_buffers
+        self._sides: dict[str, _SideBuffers] = {}
+
+    def build(self, battle: AbstractBattle) -> np.ndarray:
+        """
+        Write the observation of a battle in the next buffer of its player.
+
+        Returns:
+            np.ndarray: The float32 observation, a reused buffer
+        """
+        side = self._sides.get(battle.player_username)
+        if side is None:
+            side = self._sides[battle.player_username] = _SideBuffers(
+                self.OBSERVATION_SIZE, self.n_buffers
+            )
+        if side.tracker is None or side.tracker.battle is not battle:
+            side.tracker = FaintTracker(battle)
+
+        obs = side.buffers[side.next_buffer]
+        side.next_buffer = (side.next_buffer + 1) % self.n_buffers
+
+        # -1 indicates that the move does not have a base power or is not available
+        values = side.values
+        values[:8] = _NO_MOVES
+        moves = battle.available_moves
+        if moves:
+            matchups = defender_matchups(battle.gen, battle.opponent_active_pokemon)
+            for i, move in enumerate(moves):
+                values[i] = move.base_power / 100  # Simple rescaling to facilitate learning
+                values[4 + i] = matchups[move_type_id(move)]
+
+        # Fainted pokémon in each team
+        fainted_team, fainted_opponent = side.tracker.update()
+        values[8] = fainted_team / 6
+        values[9] = fainted_opponent / 6
+
+        obs[:] = values
+        return obs
+
+
+class ObservationCodec:
+    """
+    Store observations as one uint8 code per feature.
+
+    Each feature has a table of at most 256 float32 values, and a value is
+    encoded as the index of the nearest table entry. Values found in the table
+    decode exactly. Other values decode to their nearest entry, so the error
+    is at most half the gap between the two entries around them, or the
+    distance to the table bounds.
+    """
+
+    MAX_CODES = 256
+
+    def __init__(self, tables: Sequence[Sequence[float]]):
+        """
+        Args:
+            tables: Possible values of each feature
+
+        Raises:
+            ValueError: If a table has more than 256 values
+        """
+        self.tables = [np.unique(np.asarray(table, dtype=np.float32)) for table in tables]
+        for i, table in enumerate(self.tables):
+            if len(table) > self.MAX_CODES:
+                raise ValueError(
+                    f"Feature {i} has {len(table)} values, at most {self.MAX_CODES} fit in uint8"
+                )
+        # Boundaries between consecutive values, for the nearest entry search.
+        # The boundaries of all features are searched at once: feature i is
+        # shifted by i * span, and values are clipped to stay in their range
+        self._low = np.array([table[0] - 1 for table in self.tables], dtype=np.float64)
+        self._high = np.array([table[-1] + 1 for table in self.tables], dtype=np.float64)
+        span = float(np.max(self._high - self._low)) + 1
+        self._shifts = (np.arange(len(self.tables)) * span - self._low).astype(np.float64)
+        self._midpoints = np.concatenate(
+            [
+                (table[1:] + table[:-1]).astype(np.float64) / 2 + shift
+                for table, shift in zip(self.tables, self._shifts)
+            ]
+        )
+        self._shifted_low = self._low + self._shifts
+        self._shifted_high = self._high + self._shifts
+        self._first_codes = np.cumsum([0] + [len(table) - 1 for table in self.tables[:-1]])
+        self._decode_table = np.stack(
+            [np.pad(table, (0, self.MAX_CODES - len(table)), mode="edge") for table in self.tables]
+        )
+        self._features = np.arange(len(self.tables))
+
+    @property
+    def n_features(self) -> int:
+        return len(self.tables)
+
+    def code_space(self) -> spaces.Box:
+        """Space of the encoded observations."""
+        return spaces.Box(0, self.MAX_CODES - 1, (self.n_features,), dtype=np.uint8)
+
+    def encode(self, obs: np.ndarray) -> np.ndarray:
+        """
+        Encode observations whose last axis holds the features.
+
+        Returns:
+            np.ndarray: uint8 codes with the shape of ``obs``
+        """
+        keys = np.add(obs, self._shifts, dtype=np.float64)
+        # In-place bounds, np.clip has a much larger overhead on small arrays
+        np.maximum(keys, self._shifted_low, out=keys)
+        np.minimum(keys, self._shifted_high, out=keys)
+        codes = np.searchsorted(self._midpoints, keys)
+        codes -= self._first_codes
+        return codes.astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Decode codes whose last axis holds the features.
+
+        Returns:
+            np.ndarray: float32 observations with the shape of ``codes``
+        """
+        return self._decode_table[self._features, codes]
+
+    def to_json(self) -> list[list[float]]:
+        """Tables of the codec, to check that stored codes use the same ones."""
+        return [table.tolist() for table in self.tables]
+
+
+@lru_cache(maxsize=None)
+def get_observation_codec() -> ObservationCodec:
+    """
+    Codec of the observations of ObservationBuilder and simple_embed_battle.
+
+    Every value they produce decodes exactly: base powers up to 254 in steps
+    of 0.01 or -1, products of type multipliers and fainted counts in sixths.
+    """
+    base_powers = [-1.0] + [power / 100 for power in range(ObservationCodec.MAX_CODES - 1)]
+    multipliers = [0.0, 0.125, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0]
+    fainted = [count / 6 for count in range(7)]
+    return ObservationCodec([base_powers] * 4 + [multipliers] * 4 + [fainted] * 2)
+
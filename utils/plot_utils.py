@@ -2,91 +2,264 @@
 Plotting utilities for training analysis.
 """
 
-import os
 from pathlib import Path
-import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.figure import Figure
+from utils.episode_log import count_episode_parts, load_new_episodes
 from utils.types import RLModel
-import pandas as pd
 
 
-def plot_training_learning_curve(
-    model_type: RLModel, monitor_path: str | Path, save_path: str | Path
-):
+def rolling_stats(
+    values: np.ndarray, window: int, history: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
     """
-    Generate and save a learning curve plot from monitor data.
+    Trailing rolling mean and standard deviation, in one cumulative-sum pass.
+
+    The first values of a series use the values available so far.
 
     Args:
-        model_type: The type of model that was trained
-        monitor_dir: Directory containing monitor CSV files
+        values: New values
+        window: Number of values of each window
+        history: Values preceding ``values``, only the last ``window - 1`` are
+            used
 
     Returns:
-        str: Path to the saved plot file
+        tuple[np.ndarray, np.ndarray]: Mean and standard deviation of the
+            window ending at each new value
     """
-    try:
-        # Load monitor results
-        df = pd.read_csv(monitor_path, skiprows=1)
+    if history is None:
+        history = np.empty(0)
+    history = history[max(len(history) - (window - 1), 0) :]
+    joined = np.concatenate([history, values]).astype(np.float64)
+    if not len(values):
+        return np.empty(0), np.empty(0)
+    # Shifted by the first value, which keeps the sums of squares small
+    shift = joined[0]
+    sums = np.concatenate([[0.0], np.cumsum(joined - shift)])
+    squares = np.concatenate([[0.0], np.cumsum((joined - shift) ** 2)])
+    end = np.arange(len(history) + 1, len(joined) + 1)
+    start = np.maximum(end - window, 0)
+    count = end - start
+    mean = (sums[end] - sums[start]) / count
+    variance = (squares[end] - squares[start]) / count - mean**2
+    return mean + shift, np.sqrt(np.maximum(variance, 0.0))
+
+
+class LearningCurvePlotter:
+    """
+    Learning curve of a training, updated with the new episodes only.
+
+    Episodes are reduced into at most ``max_points`` bins holding the min,
+    max and mean of their rewards and of their rolling statistics. Once
+    there are too many bins, neighbouring bins are merged and the bin size
+    doubles, so memory and rendering time stay flat however long the run is.
+    """
+
+    def __init__(self, model_type: RLModel, window: int = 50, max_points: int = 2000):
+        """
+        Args:
+            model_type: The type of model that was trained
+            window: Episodes of the rolling statistics
+            max_points: Maximum number of bins drawn
+        """
+        self.model_type = model_type
+        self.window = window
+        self.max_points = max_points
+        self.episodes = 0
+        self.bin_size = 1
+        # Episodes processed of each part of the episode log
+        self.parts: dict[str, int] = {}
+        self.late_episodes = 0
+        self._last_t = -np.inf
+        self._tail = np.empty(0)
+        self._reward_sum = 0.0
+        self._bins = {
+            name: np.empty(0)
+            for name in ("count", "min", "max", "sum", "rolling_mean", "rolling_std")
+        }
+
+    def update(self, rewards: np.ndarray):
+        """
+        Add the rewards of the episodes following the last processed one.
+
+        Args:
+            rewards: Rewards of the new episodes, in order
+        """
+        rewards = np.asarray(rewards, dtype=np.float64)
+        if not len(rewards):
+            return
+        rolling_mean, rolling_std = rolling_stats(rewards, self.window, self._tail)
+        history = np.concatenate([self._tail, rewards])
+        self._tail = history[max(len(history) - (self.window - 1), 0) :]
+        self.episodes += len(rewards)
+        self._reward_sum += rewards.sum()
+
+        # Fill the last bin, then cut the rest into new bins
+        counts = self._bins["count"]
+        first = 0
+        if len(counts) and counts[-1] < self.bin_size:
+            first = int(min(self.bin_size - counts[-1], len(rewards)))
+            head = slice(0, first)
+            self._bins["count"][-1] += first
+            self._bins["min"][-1] = min(self._bins["min"][-1], rewards[head].min())
+            self._bins["max"][-1] = max(self._bins["max"][-1], rewards[head].max())
+            self._bins["sum"][-1] += rewards[head].sum()
+            self._bins["rolling_mean"][-1] += rolling_mean[head].sum()
+            self._bins["rolling_std"][-1] += rolling_std[head].sum()
+        if first < len(rewards):
+            starts = np.arange(first, len(rewards), self.bin_size)
+            new_bins = {
+                "count": np.diff(np.append(starts, len(rewards))).astype(np.float64),
+                "min": np.minimum.reduceat(rewards, starts),
+                "max": np.maximum.reduceat(rewards, starts),
+                "sum": np.add.reduceat(rewards, starts),
+                "rolling_mean": np.add.reduceat(rolling_mean, starts),
+                "rolling_std": np.add.reduceat(rolling_std, starts),
+            }
+            for name, values in new_bins.items():
+                self._bins[name] = np.concatenate([self._bins[name], values])
+
+        while len(self._bins["count"]) > self.max_points:
+            self._merge_bins()
+
+    def _merge_bins(self):
+        """Merge the bins two by two, doubling the bin size."""
+        pairs = np.arange(0, len(self._bins["count"]), 2)
+        for name, values in self._bins.items():
+            if name == "min":
+                self._bins[name] = np.minimum.reduceat(values, pairs)
+            elif name == "max":
+                self._bins[name] = np.maximum.reduceat(values, pairs)
+            else:
+                self._bins[name] = np.add.reduceat(values, pairs)
+        self.bin_size *= 2
+
+    def update_from_log(
+        self, episode_log_dir: str | Path, parts: dict[str, int] | None = None
+    ):
+        """
+        Add the episodes of an episode log not processed yet.
 
-        if df.empty:
-            raise ValueError("No training data found in monitor files")
+        Only the episodes written since the last update are read, and those
+        of all the parts are added in the order they ended. The update is
+        exact when ``parts`` holds the episodes of each part at a moment every
+        writer had flushed, such as the ``episode_parts`` of a checkpoint: no
+        episode ending before it can be written later. Otherwise, an episode
+        written after episodes of other writers ending later is dropped and
+        counted in ``late_episodes``, which only a log with several writers
+        can cause.
 
-        # Create the plot
-        plt.figure(figsize=(12, 6))
+        Args:
+            episode_log_dir: Directory of the episode log
+            parts: Episodes of each part to process up to, every episode on
+                disk by default
+        """
+        if parts is None:
+            parts = count_episode_parts(episode_log_dir)
+        rows = {
+            part: (self.parts.get(part, 0), stop)
+            for part, stop in parts.items()
+            if stop > self.parts.get(part, 0)
+        }
+        if not rows:
+            return
+        df = load_new_episodes(episode_log_dir, rows, columns=["r"])
+        late = df["t"].to_numpy() < self._last_t
+        self.late_episodes += int(late.sum())
+        self.update(df["r"].to_numpy()[~late])
+        if not late.all():
+            self._last_t = df["t"].iloc[-1]
+        self.parts.update({part: stop for part, (_, stop) in rows.items()})
 
-        # Plot raw rewards
-        plt.subplot(1, 2, 1)
-        plt.plot(
-            df.index, df["r"], alpha=0.6, color="lightblue", label="Episode Rewards"
+    def render(self, save_path: str | Path, dpi: int = 300):
+        """
+        Draw the binned learning curve and save it.
+
+        Raises:
+            ValueError: If no episode was added
+        """
+        if self.episodes == 0:
+            raise ValueError("No training data found in the episode log")
+
+        counts = self._bins["count"]
+        # Bins are drawn at their center episode, counted from 0
+        x = np.cumsum(counts) - (counts + 1) / 2
+        marker = "o" if len(x) == 1 else None
+        figure = Figure(figsize=(12, 6))
+
+        # Reward range and mean of each bin
+        axes = figure.add_subplot(1, 2, 1)
+        axes.fill_between(
+            x, self._bins["min"], self._bins["max"], color="lightblue", alpha=0.4, linewidth=0
         )
-        plt.title(f"{model_type.value} - Episode Rewards")
-        plt.xlabel("Episode")
-        plt.ylabel("Reward")
-        plt.grid(True, alpha=0.3)
-        plt.legend()
-
-        # Plot smoothed rewards (rolling average)
-        plt.subplot(1, 2, 2)
-        window_size = max(1, min(50, len(df) // 10))  # Adaptive window size
-        if len(df) > 1:
-            rolling_mean = df["r"].rolling(window=window_size, center=True).mean()
-            plt.plot(
-                df.index,
-                rolling_mean,
-                color="darkblue",
-                linewidth=2,
-                label=f"Rolling Average (window={window_size})",
-            )
-        else:
-            # If only one episode, just plot the single point
-            plt.plot(
-                df.index,
-                df["r"],
-                "o",
-                color="darkblue",
-                markersize=8,
-                label="Single Episode",
-            )
-
-        plt.title(f"{model_type.value} - Learning Curve (Smoothed)")
-        plt.xlabel("Episode")
-        plt.ylabel("Average Reward")
-        plt.grid(True, alpha=0.3)
-        plt.legend()
-
-        # Add overall title and statistics
-        mean_reward = df["r"].mean()
-        max_reward = df["r"].max()
-        min_reward = df["r"].min()
-        total_episodes = len(df)
-
-        plt.suptitle(
-            f"{model_type.value} Training Results - {total_episodes} Episodes\n"
-            f"Mean: {mean_reward:.2f} | Max: {max_reward:.2f} | Min: {min_reward:.2f}",
+        axes.plot(
+            x,
+            self._bins["sum"] / counts,
+            color="steelblue",
+            alpha=0.8,
+            marker=marker,
+            label=(
+                "Episode Rewards"
+                if self.bin_size == 1
+                else f"Episode Rewards (min/mean/max of {self.bin_size})"
+            ),
+        )
+        axes.set_title(f"{self.model_type.value} - Episode Rewards")
+        axes.set_xlabel("Episode")
+        axes.set_ylabel("Reward")
+        axes.grid(True, alpha=0.3)
+        axes.legend()
+
+        # Rolling statistics
+        axes = figure.add_subplot(1, 2, 2)
+        rolling_mean = self._bins["rolling_mean"] / counts
+        rolling_std = self._bins["rolling_std"] / counts
+        axes.fill_between(
+            x,
+            rolling_mean - rolling_std,
+            rolling_mean + rolling_std,
+            color="darkblue",
+            alpha=0.15,
+            linewidth=0,
+        )
+        axes.plot(
+            x,
+            rolling_mean,
+            color="darkblue",
+            linewidth=2,
+            marker=marker,
+            label=f"Rolling Average ± Std (window={self.window})",
+        )
+        axes.set_title(f"{self.model_type.value} - Learning Curve (Smoothed)")
+        axes.set_xlabel("Episode")
+        axes.set_ylabel("Average Reward")
+        axes.grid(True, alpha=0.3)
+        axes.legend()
+
+        figure.suptitle(
+            f"{self.model_type.value} Training Results - {self.episodes} Episodes\n"
+            f"Mean: {self._reward_sum / self.episodes:.2f} | "
+            f"Max: {self._bins['max'].max():.2f} | Min: {self._bins['min'].min():.2f}",
             fontsize=14,
         )
+        figure.tight_layout()
+        figure.savefig(save_path, dpi=dpi, bbox_inches="tight")
+
 
-        plt.tight_layout()
-        # Save the plot
-        plt.savefig(save_path, dpi=300, bbox_inches="tight")
-        plt.close()  # Close the figure to free memory
+def plot_training_learning_curve(
+    model_type: RLModel, episode_log_dir: str | Path, save_path: str | Path
+):
+    """
+    Generate and save a learning curve plot from the episode log.
+
+    Args:
+        model_type: The type of model that was trained
+        episode_log_dir: Episode log of the training, only its rewards are read
+        save_path: Path of the plot file
+    """
+    try:
+        plotter = LearningCurvePlotter(model_type)
+        plotter.update_from_log(episode_log_dir)
+        plotter.render(save_path)
     except Exception as e:
         raise RuntimeError(f"Failed to generate learning curve plot: {e}")
@@ -0,0 +1,277 @@
+"""
+Replay buffers for DQN training: compressed in memory or persisted on disk.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.buffers import BaseBuffer, ReplayBuffer
+from stable_baselines3.common.off_policy_algorithm import OffPolicyAlgorithm
+from stable_baselines3.common.type_aliases import ReplayBufferSamples
+from stable_baselines3.common.vec_env import VecNormalize
+
+from utils.observation import ObservationCodec, get_observation_codec
+
+
+class _EncodedObservationsMixin:
+    """
+    Store the observations of a replay buffer as codec codes.
+
+    Observations are encoded when added and decoded when sampled. Discrete
+    actions are stored as uint8 as well. Without a codec, the buffer behaves
+    like SB3's ReplayBuffer.
+    """
+
+    codec: ObservationCodec | None = None
+
+    def _stored_action_dtype(self) -> np.dtype:
+        if (
+            self.codec is not None
+            and isinstance(self.action_space, spaces.Discrete)
+            and self.action_space.n <= ObservationCodec.MAX_CODES
+        ):
+            return np.dtype(np.uint8)
+        return np.dtype(self._maybe_cast_dtype(self.action_space.dtype))
+
+    def add(self, obs, next_obs, action, reward, done, infos) -> None:
+        if self.codec is not None:
+            # A single encode call for both, its cost is mostly per call
+            obs, next_obs = self.codec.encode(np.stack([obs, next_obs]))
+        super().add(obs, next_obs, action, reward, done, infos)
+
+    def _get_samples(
+        self, batch_inds: np.ndarray, env: VecNormalize | None = None
+    ) -> ReplayBufferSamples:
+        if self.codec is None:
+            return super()._get_samples(batch_inds, env)
+
+        # Same sampling as ReplayBuffer._get_samples, decoding the observations
+        env_indices = np.random.randint(0, high=self.n_envs, size=(len(batch_inds),))
+        if self.optimize_memory_usage:
+            next_obs = self.observations[(batch_inds + 1) % self.buffer_size, env_indices, :]
+        else:
+            next_obs = self.next_observations[batch_inds, env_indices, :]
+
+        data = (
+            self._normalize_obs(self.codec.decode(self.observations[batch_inds, env_indices, :]), env),
+            self.actions[batch_inds, env_indices, :].astype(
+                self._maybe_cast_dtype(self.action_space.dtype)
+            ),
+            self._normalize_obs(self.codec.decode(next_obs), env),
+            # Only use dones that are not due to timeouts
+            (self.dones[batch_inds, env_indices] * (1 - self.timeouts[batch_inds, env_indices])).reshape(-1, 1),
+            self._normalize_reward(self.rewards[batch_inds, env_indices].reshape(-1, 1), env),
+        )
+        return ReplayBufferSamples(*tuple(map(self.to_torch, data)))
+
+
+class CompressedReplayBuffer(_EncodedObservationsMixin, ReplayBuffer):
+    """
+    In-memory replay buffer storing observations as uint8 codes.
+
+    With the default codec, a 10-feature observation takes 10 bytes instead of
+    40 and every observation decodes exactly, so a transition takes 33 bytes
+    instead of 100.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int,
+        observation_space: spaces.Space,
+        action_space: spaces.Space,
+        device: str = "auto",
+        n_envs: int = 1,
+        optimize_memory_usage: bool = False,
+        handle_timeout_termination: bool = True,
+        codec: ObservationCodec | None = None,
+    ):
+        """
+        Args:
+            buffer_size: Maximum number of transitions
+            observation_space: Observation space of the env
+            action_space: Action space of the env
+            device: Device of the sampled tensors
+            n_envs: Number of parallel environments
+            optimize_memory_usage: Store the next observations in the
+                observation array, as in SB3's ReplayBuffer
+            handle_timeout_termination: Store the timeouts, as in SB3's
+                ReplayBuffer
+            codec: Codec of the observations, defaults to the one of the
+                env observations
+        """
+        self.codec = codec if codec is not None else get_observation_codec()
+        # Allocate the observation arrays with the dtype of the codes
+        super().__init__(
+            buffer_size,
+            self.codec.code_space(),
+            action_space,
+            device,
+            n_envs=n_envs,
+            optimize_memory_usage=optimize_memory_usage,
+            handle_timeout_termination=handle_timeout_termination,
+        )
+        self.observation_space = observation_space
+        self.actions = self.actions.astype(self._stored_action_dtype())
+
+
+class MemmapReplayBuffer(_EncodedObservationsMixin, ReplayBuffer):
+    """
+    SB3 replay buffer whose arrays are ``np.memmap`` files in a directory.
+
+    The arrays are only paged in by the OS when read or written, so the buffer
+    can be larger than the RAM. A ``metadata.json`` file records the layout of
+    the arrays and the write position. It is updated by ``flush`` every
+    ``flush_interval`` additions and when training stops. An existing buffer
+    with the same layout is reopened with its transitions, so an interrupted
+    run can resume without replaying battles. With a codec, observations are
+    stored as uint8 codes, as in CompressedReplayBuffer.
+    """
+
+    METADATA_FILE = "metadata.json"
+
+    def __init__(
+        self,
+        buffer_size: int,
+        observation_space: spaces.Space,
+        action_space: spaces.Space,
+        device: str = "auto",
+        n_envs: int = 1,
+        optimize_memory_usage: bool = False,
+        handle_timeout_termination: bool = True,
+        path: str | Path | None = None,
+        flush_interval: int = 10_000,
+        codec: ObservationCodec | None = None,
+    ):
+        """
+        Args:
+            buffer_size: Maximum number of transitions
+            observation_space: Observation space of the env
+            action_space: Action space of the env
+            device: Device of the sampled tensors
+            n_envs: Number of parallel environments
+            optimize_memory_usage: Store the next observations in the
+                observation array, as in SB3's ReplayBuffer
+            handle_timeout_termination: Store the timeouts, as in SB3's
+                ReplayBuffer
+            path: Directory of the memmap files
+            flush_interval: Additions between two flushes of the metadata
+            codec: If given, codec of the stored observations
+
+        Raises:
+            ValueError: If no path is given, or if the buffer at ``path`` has
+                a different layout
+        """
+        if path is None:
+            raise ValueError("MemmapReplayBuffer requires a path")
+        # The arrays are memmaps, so ReplayBuffer.__init__ is not used: it
+        # would allocate them in RAM
+        BaseBuffer.__init__(
+            self, buffer_size, observation_space, action_space, device, n_envs=n_envs
+        )
+        self.buffer_size = max(buffer_size // n_envs, 1)
+        if optimize_memory_usage and handle_timeout_termination:
+            raise ValueError(
+                "ReplayBuffer does not support optimize_memory_usage = True "
+                "and handle_timeout_termination = True simultaneously."
+            )
+        self.optimize_memory_usage = optimize_memory_usage
+        self.handle_timeout_termination = handle_timeout_termination
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.codec = codec
+        self._additions = 0
+
+        layout = self._layout()
+        metadata = self._read_metadata()
+        if metadata is not None and (
+            metadata["arrays"] != layout or metadata.get("codec") != self._codec_json()
+        ):
+            raise ValueError(
+                f"The replay buffer at {self.path} has a different layout, "
+                "delete it or train with another name"
+            )
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        mode = "w+" if metadata is None else "r+"
+        for name, spec in layout.items():
+            array = np.memmap(
+                self.path / f"{name}.dat",
+                dtype=np.dtype(spec["dtype"]),
+                mode=mode,
+                shape=tuple(spec["shape"]),
+            )
+            setattr(self, name, array)
+
+        if metadata is None:
+            self.flush()
+        else:
+            self.pos = metadata["pos"]
+            self.full = metadata["full"]
+
+    def _layout(self) -> dict[str, dict[str, Any]]:
+        """Shape and dtype of every array, as stored in the metadata."""
+        obs_shape = [self.buffer_size, self.n_envs, *self.obs_shape]
+        scalar_shape = [self.buffer_size, self.n_envs]
+        obs_dtype = np.dtype(
+            np.uint8 if self.codec is not None else self.observation_space.dtype
+        ).str
+        layout = {"observations": {"shape": obs_shape, "dtype": obs_dtype}}
+        if not self.optimize_memory_usage:
+            layout["next_observations"] = {"shape": obs_shape, "dtype": obs_dtype}
+        layout["actions"] = {
+            "shape": [self.buffer_size, self.n_envs, self.action_dim],
+            "dtype": self._stored_action_dtype().str,
+        }
+        for name in ("rewards", "dones", "timeouts"):
+            layout[name] = {"shape": scalar_shape, "dtype": np.dtype(np.float32).str}
+        return layout
+
+    def _codec_json(self) -> list[list[float]] | None:
+        return None if self.codec is None else self.codec.to_json()
+
+    def _read_metadata(self) -> dict | None:
+        metadata_path = self.path / self.METADATA_FILE
+        if not metadata_path.exists():
+            return None
+        with open(metadata_path) as f:
+            return json.load(f)
+
+    def add(self, *args, **kwargs) -> None:
+        super().add(*args, **kwargs)
+        self._additions += 1
+        if self._additions % self.flush_interval == 0:
+            self.flush()
+
+    def flush(self):
+        """Write the arrays to disk, then the metadata pointing to them."""
+        for name in self._layout():
+            getattr(self, name).flush()
+        metadata = {
+            "pos": self.pos,
+            "full": self.full,
+            "arrays": self._layout(),
+            "codec": self._codec_json(),
+        }
+        tmp_path = self.path / f"{self.METADATA_FILE}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(tmp_path, self.path / self.METADATA_FILE)
+
+
+def resume_from_replay_buffer(model: OffPolicyAlgorithm):
+    """
+    Start learning right away if a reopened replay buffer is already filled.
+
+    The warm-up of ``learning_starts`` steps is reduced by the number of
+    transitions in the buffer.
+    """
+    transitions = model.replay_buffer.size() * model.replay_buffer.n_envs
+    if transitions:
+        model.learning_starts = max(model.learning_starts - transitions, 0)
+        logging.getLogger("Training").info(
+            f"♻️ Resuming with {transitions} transitions in the replay buffer"
+        )
@@ -0,0 +1,176 @@
+"""
+Shared-memory structures of the asynchronous actor-learner training.
+
+Both structures are backed by ``multiprocessing`` raw arrays, so they can be
+given to spawned processes as arguments and are read and written without
+locks or pickling.
+"""
+
+import ctypes
+import numpy as np
+import torch
+
+
+def _as_array(raw, dtype, shape) -> np.ndarray:
+    return np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+
+class TransitionRing:
+    """
+    Single-producer, single-consumer ring buffer of transitions.
+
+    The actor never waits for the learner: when the ring is full, the oldest
+    transitions are overwritten and counted as dropped by the reader. The
+    write counter is only increased once a transition is fully written, and
+    the reader discards the slots overwritten while it was copying them,
+    including the slot the actor may be writing.
+    """
+
+    def __init__(self, ctx, capacity: int, obs_dim: int):
+        """
+        Args:
+            ctx: Multiprocessing context of the processes sharing the ring
+            capacity: Number of transitions held by the ring
+            obs_dim: Size of the observations
+        """
+        self.capacity = capacity
+        self.obs_dim = obs_dim
+        self._obs = ctx.RawArray(ctypes.c_float, capacity * obs_dim)
+        self._next_obs = ctx.RawArray(ctypes.c_float, capacity * obs_dim)
+        self._actions = ctx.RawArray(ctypes.c_int64, capacity)
+        self._rewards = ctx.RawArray(ctypes.c_float, capacity)
+        self._dones = ctx.RawArray(ctypes.c_bool, capacity)
+        self._truncated = ctx.RawArray(ctypes.c_bool, capacity)
+        self._written = ctx.RawValue(ctypes.c_uint64, 0)
+        self._read = 0
+        self.dropped = 0
+        self._views = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_views"] = None
+        return state
+
+    def _arrays(self) -> tuple[np.ndarray, ...]:
+        # NumPy views are created lazily, once in each process
+        if self._views is None:
+            shape = (self.capacity, self.obs_dim)
+            self._views = (
+                _as_array(self._obs, np.float32, shape),
+                _as_array(self._next_obs, np.float32, shape),
+                _as_array(self._actions, np.int64, self.capacity),
+                _as_array(self._rewards, np.float32, self.capacity),
+                _as_array(self._dones, np.bool_, self.capacity),
+                _as_array(self._truncated, np.bool_, self.capacity),
+            )
+        return self._views
+
+    @property
+    def written(self) -> int:
+        """Number of transitions written since the ring was created."""
+        return self._written.value
+
+    def push(
+        self,
+        obs: np.ndarray,
+        action: int,
+        reward: float,
+        next_obs: np.ndarray,
+        done: bool,
+        truncated: bool,
+    ):
+        """Write a transition, overwriting the oldest one if the ring is full."""
+        obs_array, next_obs_array, actions, rewards, dones, truncations = self._arrays()
+        written = self._written.value
+        slot = written % self.capacity
+        obs_array[slot] = obs
+        next_obs_array[slot] = next_obs
+        actions[slot] = action
+        rewards[slot] = reward
+        dones[slot] = done
+        truncations[slot] = truncated
+        self._written.value = written + 1
+
+    def pop_all(self) -> tuple[np.ndarray, ...] | None:
+        """
+        Copy the transitions written since the last call.
+
+        Returns:
+            tuple | None: Arrays of observations, next observations, actions,
+                rewards, dones and truncations, or None if nothing is new
+        """
+        written = self._written.value
+        start = max(self._read, written - self.capacity)
+        self.dropped += start - self._read
+        if start == written:
+            return None
+
+        slots = np.arange(start, written) % self.capacity
+        batch = tuple(array[slots] for array in self._arrays())
+
+        # Drop the transitions overwritten while they were copied, and the
+        # one in the slot being written, index ``_written - capacity``
+        overwritten = min(self._written.value + 1 - self.capacity - start, len(slots))
+        if overwritten > 0:
+            batch = tuple(array[overwritten:] for array in batch)
+            self.dropped += overwritten
+        self._read = written
+        return batch if len(batch[0]) else None
+
+
+class SharedWeights:
+    """
+    Parameters of a network published by the learner to the actors.
+
+    A version counter works as a sequence lock: it is odd while the learner
+    writes, and readers retry later if it changed during their copy.
+    """
+
+    def __init__(self, ctx, n_parameters: int):
+        """
+        Args:
+            ctx: Multiprocessing context of the processes sharing the weights
+            n_parameters: Number of scalar parameters of the network
+        """
+        self.n_parameters = n_parameters
+        self._parameters = ctx.RawArray(ctypes.c_float, n_parameters)
+        self._version = ctx.RawValue(ctypes.c_uint64, 0)
+        self._exploration_rate = ctx.RawValue(ctypes.c_double, 1.0)
+
+    @property
+    def version(self) -> int:
+        """Number of completed publications, 0 before the first one."""
+        return self._version.value // 2
+
+    @property
+    def exploration_rate(self) -> float:
+        """Exploration rate of the learner at the last publication."""
+        return self._exploration_rate.value
+
+    def publish(self, module: torch.nn.Module, exploration_rate: float):
+        """Write the parameters of a module and the exploration rate."""
+        vector = torch.nn.utils.parameters_to_vector(module.parameters()).detach().cpu()
+        self._version.value += 1
+        np.frombuffer(self._parameters, dtype=np.float32)[:] = vector.numpy()
+        self._exploration_rate.value = exploration_rate
+        self._version.value += 1
+
+    def pull(self, module: torch.nn.Module, known_version: int) -> int:
+        """
+        Load the parameters into a module if a newer version is available.
+
+        Args:
+            module: Network with the same architecture as the published one
+            known_version: Version already loaded in the module
+
+        Returns:
+            int: The version loaded in the module
+        """
+        sequence = self._version.value
+        if sequence % 2 or sequence // 2 == known_version:
+            return known_version
+        vector = torch.tensor(np.frombuffer(self._parameters, dtype=np.float32))
+        if self._version.value != sequence:
+            return known_version
+        torch.nn.utils.vector_to_parameters(vector, module.parameters())
+        return sequence // 2
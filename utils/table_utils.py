@@ -79,42 +79,3 @@ def create_evaluation_table(
     df.to_csv(csv_path, index=False)
 
     return str(table_path), df
-
-def create_battle_results_dataframe(
-    model_type: RLModel,
-    battle_rewards: list,
-    battle_results: list,
-    battle_steps: list | None = None,
-):
-    """
-    Create a detailed DataFrame with individual battle results.
-
-    Args:
-        model_type: The type of model evaluated
-        battle_rewards: List of rewards from each battle
-        battle_results: List of battle results (True for win, False for loss)
-        battle_steps: Optional list of steps taken in each battle
-
-    Returns:
-        pd.DataFrame: Detailed battle results
-    """
-    battle_data = {
-        "Battle_Number": list(range(1, len(battle_rewards) + 1)),
-        "Reward": battle_rewards,
-        "Result": ["Win" if result else "Loss" for result in battle_results],
-        "Win": battle_results,
-    }
-
-    # Add steps if provided
-    if battle_steps is not None:
-        battle_data["Steps"] = battle_steps
-
-    df = pd.DataFrame(battle_data)
-
-    # Save detailed results to CSV
-    output_dir = get_evaluate_output_dir()
-    csv_filename = f"{model_type.value}_detailed_battle_results.csv"
-    csv_path = output_dir / csv_filename
-    df.to_csv(csv_path, index=False)
-
-    return df
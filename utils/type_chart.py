@@ -0,0 +1,115 @@
+"""
+Precomputed type effectiveness tables for fast observation embedding.
+"""
+
+from functools import lru_cache
+import numpy as np
+from poke_env.data import GenData
+from poke_env.environment import Move, Pokemon, PokemonType
+
+
+# Integer id of every poke-env type, plus one id for a missing second type
+TYPE_IDS = {pokemon_type: i for i, pokemon_type in enumerate(PokemonType)}
+NO_TYPE = len(TYPE_IDS)
+
+# Types without matchups: they always deal and take neutral damage
+_NEUTRAL_TYPES = {PokemonType.THREE_QUESTION_MARKS, PokemonType.STELLAR}
+
+# Type id of each move id per generation, move types never change in a battle
+_MOVE_TYPE_IDS: dict[int, dict[str, int]] = {}
+
+
+@lru_cache(maxsize=None)
+def get_type_chart(gen: int) -> np.ndarray:
+    """
+    Get the type chart of a generation as a read-only array.
+
+    ``chart[defending_type_id, attacking_type_id]`` holds the multiplier of
+    poke-env's chart. Rows and columns of neutral types and of ``NO_TYPE`` are
+    all ones.
+
+    Args:
+        gen: Battle generation
+
+    Returns:
+        np.ndarray: Float64 array of shape (NO_TYPE + 1, NO_TYPE + 1)
+    """
+    chart = np.ones((NO_TYPE + 1, NO_TYPE + 1))
+    for defending, row in GenData.from_gen(gen).type_chart.items():
+        for attacking, multiplier in row.items():
+            chart[TYPE_IDS[PokemonType[defending]], TYPE_IDS[PokemonType[attacking]]] = (
+                multiplier
+            )
+    chart.setflags(write=False)
+    return chart
+
+
+@lru_cache(maxsize=None)
+def get_matchup_chart(gen: int) -> np.ndarray:
+    """
+    Get the multipliers on every pair of defending types.
+
+    ``matchups[type_1_id, type_2_id, attacking_type_id]`` is the product of the
+    type chart entries of both defending types, computed the same way as
+    poke-env does.
+
+    Returns:
+        np.ndarray: Float64 array of shape (NO_TYPE + 1,) * 3
+    """
+    chart = get_type_chart(gen)
+    matchups = chart[:, None, :] * chart[None, :, :]
+    matchups.setflags(write=False)
+    return matchups
+
+
+def move_type_id(move: Move) -> int:
+    """Get the type id of a move, cached by generation and move id."""
+    if type(move) is not Move:
+        return TYPE_IDS[move.type]
+    type_ids = _MOVE_TYPE_IDS.setdefault(move._gen, {})
+    type_id = type_ids.get(move._id)
+    if type_id is None:
+        type_id = type_ids[move._id] = TYPE_IDS[move.type]
+    return type_id
+
+
+def pokemon_type_ids(pokemon: Pokemon) -> tuple[int, int]:
+    """
+    Get the defending type ids of a pokémon, accounting for terastallization.
+
+    A neutral first type makes every move neutral, so both ids are NO_TYPE.
+    """
+    type_1, type_2 = pokemon.type_1, pokemon.type_2
+    if type_1 in _NEUTRAL_TYPES:
+        return NO_TYPE, NO_TYPE
+    return TYPE_IDS[type_1], NO_TYPE if type_2 is None else TYPE_IDS[type_2]
+
+
+def defender_matchups(gen: int, defender: Pokemon) -> np.ndarray:
+    """
+    Multiplier of every attacking type on a pokémon.
+
+    Returns:
+        np.ndarray: Read-only float64 view indexed by attacking type id
+    """
+    type_1, type_2 = pokemon_type_ids(defender)
+    return get_matchup_chart(gen)[type_1, type_2]
+
+
+def damage_multipliers(gen: int, defender: Pokemon, moves: list[Move]) -> np.ndarray:
+    """
+    Damage multipliers of several moves on a pokémon with one gather.
+
+    Gives the same values as ``defender.damage_multiplier(move)`` for each
+    move.
+
+    Args:
+        gen: Battle generation
+        defender: Pokémon receiving the moves
+        moves: Moves to evaluate
+
+    Returns:
+        np.ndarray: Float64 multiplier of each move
+    """
+    attacking = np.array([move_type_id(move) for move in moves], dtype=np.intp)
+    return defender_matchups(gen, defender)[attacking]
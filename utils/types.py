@@ -8,6 +8,7 @@ from enum import Enum
 class RLModel(str, Enum):
     PPO = "ppo"
     DQN = "dqn"
+    MASKABLE_PPO = "maskable_ppo"
 
 
 class RLPlayer(str, Enum):
@@ -15,3 +16,13 @@ class RLPlayer(str, Enum):
     DQN_MAX = "dqn_max"
     RANDOM = "random"
     MAX = "max"
+
+
+class Simulator(str, Enum):
+    SERVER = "server"
+    LOCAL = "local"
+
+
+class Backend(str, Enum):
+    SB3 = "sb3"
+    RLLIB = "rllib"